@@ -0,0 +1,71 @@
+"""measurements natural key
+
+Revision ID: 3afd8f57b53b
+Revises: 63b740456855
+Create Date: 2026-10-19 20:02:41.318904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3afd8f57b53b'
+down_revision: Union[str, Sequence[str], None] = '63b740456855'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # retried requests stored some samples more than once, one row of
+    # every (component, type, timestamp) is kept
+    op.execute(
+        """
+        DELETE FROM measurements m
+        USING measurements d
+        WHERE m.component_id = d.component_id
+          AND m.measurement_type = d.measurement_type
+          AND m.timestamp = d.timestamp
+          AND m.id > d.id
+        """
+    )
+    # built concurrently so ingestion keeps running, the unique index
+    # replaces the plain one on the same columns. duplicates written by
+    # the old code meanwhile make the build fail and leave an INVALID
+    # index: drop it and run the upgrade again
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_measurements_component_type_time',
+            'measurements',
+            ['component_id', 'measurement_type', 'timestamp'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_measurements_component_type_time',
+            table_name='measurements',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_measurements_component_type_time',
+            'measurements',
+            ['component_id', 'measurement_type', 'timestamp'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'uq_measurements_component_type_time',
+            table_name='measurements',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
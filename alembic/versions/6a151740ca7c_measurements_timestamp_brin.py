@@ -0,0 +1,60 @@
+"""measurements timestamp brin
+
+Revision ID: 6a151740ca7c
+Revises: 198748de9f31
+Create Date: 2026-10-19 18:37:25.774442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a151740ca7c'
+down_revision: Union[str, Sequence[str], None] = '198748de9f31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # built concurrently so ingestion keeps running, the brin index goes
+    # in before the b-tree goes away so range queries are never unindexed
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_measurements_timestamp_brin',
+            'measurements',
+            ['timestamp'],
+            unique=False,
+            postgresql_using='brin',
+            postgresql_with={'autosummarize': 'on'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_measurements_timestamp',
+            table_name='measurements',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_measurements_timestamp',
+            'measurements',
+            ['timestamp'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_measurements_timestamp_brin',
+            table_name='measurements',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,46 @@
+"""components name trigram index
+
+Revision ID: 7f3a91c2b4e8
+Revises: d2cc900c17e7
+Create Date: 2026-10-19 18:52:40.117305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3a91c2b4e8'
+down_revision: Union[str, Sequence[str], None] = 'd2cc900c17e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # built concurrently so a big components table is not locked for writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_components_name_trgm',
+            'components',
+            ['name'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_components_name_trgm',
+            table_name='components',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import gzip
+import zlib
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional, responses are only gzipped without it
+    zstandard = None
+
+# besides text/*, event streams are left out: every event has to go out
+# as soon as it is written
+_COMPRESSIBLE_TYPES = {"application/json", "application/x-ndjson"}
+
+
+def available_encodings() -> list[str]:
+    """
+    the content codings the api can produce, preferred first.
+    """
+    if zstandard is not None:
+        return ["zstd", "gzip"]
+    return ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """
+    the coding to answer an Accept-Encoding header with, None for
+    identity. the highest q wins, zstd at equal q, q=0 refuses a coding.
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for coding in available_encodings():
+        quality = weights.get(coding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compressible(content_type: str | None) -> bool:
+    media_type = (content_type or "").partition(";")[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return (
+        media_type.startswith("text/")
+        or media_type in _COMPRESSIBLE_TYPES
+        or media_type.endswith("+json")
+    )
+
+
+def compressor(encoding: str):
+    """
+    streaming compressor of a coding, compress(chunk) and a final flush().
+    """
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+    # wbits 31: deflate with the gzip header and trailer
+    return zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        # one shot, the frame also carries the content size
+        return zstandard.ZstdCompressor(settings.COMPRESSION_ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def encode_body(data: bytes, encoding: str | None) -> tuple[str | None, bytes]:
+    """
+    (content coding, body) of a whole response body, bodies under
+    COMPRESSION_MIN_SIZE stay as they are.
+    """
+    if encoding is None or len(data) < settings.COMPRESSION_MIN_SIZE:
+        return None, data
+    return encoding, compress(data, encoding)
@@ -1,30 +1,48 @@
 from __future__ import annotations
 
+import time
+
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
 from app.core.security import decode_token
 from app.db.connection import get_db
-from app.models.users import User, UserRole
-from app.services.users import get_user_by_username
+from app.models.api_keys import ApiKeyScope
+from app.models.users import UserRole
+from app.services.api_keys import ApiKeySnapshot, api_key_registry
+from app.services.users import (
+    CachedToken,
+    UserSnapshot,
+    get_user_by_username,
+    token_cache,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+) -> UserSnapshot:
     """
     takes the current user from the request.
     it takes the token.
-    it returns the user.
+    it returns a snapshot of the user.
+    resolved tokens are cached so most requests skip both the jwt
+    decoding and the user query.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached.user
+
     try:
         payload = decode_token(token)
         username = payload.get("sub")
@@ -34,13 +52,21 @@ def get_current_user(
         raise credentials_exception
 
     user = get_user_by_username(db, username=username)
-    if not user:
+    if not user or not user.is_active:
         raise credentials_exception
 
-    return user
+    snapshot = UserSnapshot.from_user(user)
+
+    # never keep a token in the cache longer than the token itself lives
+    expires_in = payload.get("exp", 0) - time.time()
+    token_cache.set(
+        token, CachedToken(claims=payload, user=snapshot), ttl_seconds=expires_in
+    )
+
+    return snapshot
 
 
-def require_manager(user: User = Depends(get_current_user)) -> User:
+def require_manager(user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
     """
     it checks if the current user is a manager.
     it receives the current user.
@@ -51,3 +77,40 @@ def require_manager(user: User = Depends(get_current_user)) -> User:
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
         )
     return user
+
+
+def require_scope(scope: ApiKeyScope):
+    """
+    builds a dependency that accepts either a manager (jwt) or an
+    api key (X-API-Key header) holding the given scope.
+    it returns the UserSnapshot or the ApiKeySnapshot.
+    """
+
+    def dependency(
+        db: Session = Depends(get_db),
+        api_key: str | None = Depends(api_key_header),
+        token: str | None = Depends(optional_oauth2_scheme),
+    ) -> UserSnapshot | ApiKeySnapshot:
+        if api_key:
+            key = api_key_registry.lookup(db, api_key)
+            if key is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid API key",
+                )
+            if scope.value not in key.scopes:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Not enough permissions",
+                )
+            return key
+
+        if not token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return require_manager(get_current_user(db, token))
+
+    return dependency
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from fastapi import HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+FIELDS_QUERY = Query(
+    default=None,
+    description="comma separated fields to return (id is always there), "
+    "the others are not even read from the database",
+)
+
+
+def parse_fields(fields: str | None, allowed: Iterable[str]) -> list[str] | None:
+    """
+    the ?fields= of a request as a list starting with id, None when the
+    whole object was asked for. unknown names are a 400.
+    """
+    if fields is None:
+        return None
+
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    return list(dict.fromkeys(["id", *requested]))
+
+
+def sparse_dump(obj: Any, fields: list[str]) -> dict:
+    """
+    the requested fields of an orm object, the ones its class doesn't
+    have (type specific fields of another component type) are left out.
+    """
+    return {name: getattr(obj, name) for name in fields if hasattr(type(obj), name)}
+
+
+def sparse_response(content: Any) -> JSONResponse:
+    """
+    bypasses the response_model, which would need every field.
+    """
+    return JSONResponse(jsonable_encoder(content))
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.compression import (
+    compressible,
+    compressor,
+    encode_body,
+    negotiate_encoding,
+)
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.metrics import (
+    RequestDbStats,
+    current_request_stats,
+    route_db_metrics,
+    route_label,
+    route_latency_metrics,
+)
+from app.core.profiling import SamplingProfiler, profile_store
+from app.db.connection import get_db
+from app.models.users import UserRole
+from app.services.users import UserSnapshot
+
+
+class QueryAccountingMiddleware:
+    """
+    counts the statements (and the time spent in them) of every request.
+    the totals go in a Server-Timing header and in the per route metrics.
+    plain ASGI so streamed bodies are accounted until the last chunk.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDbStats(scope=scope)
+        token = current_request_stats.set(stats)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            route_db_metrics.record(stats)
+
+
+# one profiled request at a time, the profiler samples the whole process
+_profiling_lock = threading.Lock()
+
+
+def _current_user(scope: Scope, token: str) -> UserSnapshot | None:
+    """
+    the user of the token as get_current_user resolves it (active user,
+    current role, through the token cache), None if it isn't valid.
+    """
+    # the session the routes would get (tests override get_db)
+    get_session = scope["app"].dependency_overrides.get(get_db, get_db)
+    sessions = get_session()
+    try:
+        return get_current_user(next(sessions), token)
+    except HTTPException:
+        return None
+    finally:
+        sessions.close()
+
+
+async def _wants_profile(scope: Scope) -> bool:
+    """
+    the request asked for a profile (X-Profile: 1) and carries the token
+    of a user who is a manager right now, not only when it was issued.
+    """
+    headers = Headers(scope=scope)
+    if headers.get("x-profile", "").lower() not in ("1", "true"):
+        return False
+
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    user = await run_in_threadpool(_current_user, scope, token)
+    return user is not None and user.role == UserRole.manager
+
+
+class LatencyMiddleware:
+    """
+    records the latency of every request in the per route histograms.
+    requests sent by a manager with "X-Profile: 1" are also run under the
+    sampling profiler, the folded stacks are stored and their id is
+    returned in the X-Profile-Id header (see /metrics/profiles).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiler = None
+        profile_id = None
+        if await _wants_profile(scope) and _profiling_lock.acquire(blocking=False):
+            profiler = SamplingProfiler(settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            profile_id = str(uuid.uuid4())
+            profiler.start()
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start" and profile_id:
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            elapsed = time.perf_counter() - started
+            label = route_label(scope)
+            route_latency_metrics.record(label, elapsed)
+
+            if profiler is not None:
+                try:
+                    folded = profiler.stop()
+                    profile_store.add(profile_id, label, elapsed * 1000, folded)
+                finally:
+                    _profiling_lock.release()
+
+
+class CompressionMiddleware:
+    """
+    gzip or zstd (with the zstandard package) content coding negotiated
+    from Accept-Encoding. whole bodies under COMPRESSION_MIN_SIZE,
+    responses that already have a Content-Encoding (precompressed
+    reports) and event streams are sent as they are, streamed bodies are
+    compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        # the start is held until the first chunk tells whether (and how)
+        # the body is compressed
+        start: Message | None = None
+        stream = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, stream
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(scope=start)
+                pending, start = start, None
+                if "content-encoding" in headers or not compressible(
+                    headers.get("content-type")
+                ):
+                    await send(pending)
+                    await send(message)
+                    return
+
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    content_encoding, body = encode_body(body, encoding)
+                    if content_encoding:
+                        headers["Content-Encoding"] = content_encoding
+                        headers["Content-Length"] = str(len(body))
+                    await send(pending)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                headers["Content-Encoding"] = encoding
+                if "content-length" in headers:
+                    del headers["content-length"]
+                stream = compressor(encoding)
+                await send(pending)
+
+            if stream is None:
+                await send(message)
+                return
+
+            data = stream.compress(body)
+            if not more_body:
+                data += stream.flush()
+                await send({"type": "http.response.body", "body": data})
+            elif data:
+                await send(
+                    {"type": "http.response.body", "body": data, "more_body": True}
+                )
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import require_manager
+from app.db.connection import get_db
+from app.services.users import UserSnapshot
+from app.schemas.api_keys import ApiKeyCreate, ApiKeyCreated, ApiKeyRead
+from app.services.api_keys import create_api_key, list_api_keys, revoke_api_key
+
+
+router = APIRouter(prefix="/api-keys", tags=["api-keys"])
+
+
+@router.post("", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED)
+def api_keys_create(
+    data: ApiKeyCreate,
+    db: Session = Depends(get_db),
+    user: UserSnapshot = Depends(require_manager),
+):
+    api_key, raw_key = create_api_key(db, name=data.name, scopes=data.scopes)
+    return ApiKeyCreated(
+        **ApiKeyRead.model_validate(api_key).model_dump(), key=raw_key
+    )
+
+
+@router.get("", response_model=list[ApiKeyRead])
+def api_keys_list(
+    limit: int = 50,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    user: UserSnapshot = Depends(require_manager),
+):
+    return list_api_keys(db, limit, offset)
+
+
+@router.delete("/{api_key_id}", response_model=ApiKeyRead)
+def api_keys_revoke(
+    api_key_id: UUID,
+    db: Session = Depends(get_db),
+    user: UserSnapshot = Depends(require_manager),
+):
+    try:
+        return revoke_api_key(db, api_key_id)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="API key not found")
@@ -1,24 +1,52 @@
 from __future__ import annotations
-from typing import Optional
+import csv
+import json
+from typing import Literal, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.orm import Session
 
-from app.db.connection import get_db
-from app.schemas.components import ComponentCreate, ComponentRead
+from app.core.config import settings
+from app.db.connection import get_db, get_read_db
+from app.schemas.components import (
+    ComponentCreate,
+    ComponentImportResult,
+    ComponentRead,
+)
+from app.schemas.measurements import MeasurementLatestRead
 from app.services.components import (
+    COMPONENT_FIELDS,
+    EXPORT_COLUMNS,
     list_components,
+    search_components,
     create_component,
+    bulk_create_components,
+    iter_components_export,
+    parse_components_csv,
     update_component,
     delete_component,
 )
+from app.services.measurements import get_component_latest
 from app.api.deps import get_current_user, require_manager
-from app.models.users import User
+from app.api.fieldsets import (
+    FIELDS_QUERY,
+    parse_fields,
+    sparse_dump,
+    sparse_response,
+)
+from app.api.streaming import csv_chunks, ndjson_lines
+from app.services.users import UserSnapshot
 
 
 router = APIRouter(prefix="/components", tags=["component"])
 
+_components_adapter = TypeAdapter(list[ComponentCreate])
+
 
 @router.get("", response_model=list[ComponentRead])
 def components_list(
@@ -26,27 +54,151 @@ def components_list(
     substation: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: Session = Depends(get_read_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    selected = parse_fields(fields, COMPONENT_FIELDS)
+    components = list_components(
+        db, component_type, substation, limit, offset, fields=selected
+    )
+    if selected is None:
+        return components
+    return sparse_response([sparse_dump(c, selected) for c in components])
+
+
+@router.get("/search", response_model=list[ComponentRead])
+def components_search(
+    q: str = Query(min_length=2, max_length=200),
+    limit: int = Query(default=20, ge=1, le=200),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: Session = Depends(get_read_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    selected = parse_fields(fields, COMPONENT_FIELDS)
+    components = search_components(db, q, limit, fields=selected)
+    if selected is None:
+        return components
+    return sparse_response([sparse_dump(c, selected) for c in components])
+
+
+@router.get("/export")
+def components_export(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    component_type: Optional[str] = None,
+    substation: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    streams every component in the flat import format (NDJSON or CSV).
+    """
+    rows = iter_components_export(db, component_type, substation)
+
+    if format == "csv":
+        content = csv_chunks(rows, EXPORT_COLUMNS)
+        media_type = "text/csv"
+    else:
+        content = ndjson_lines(rows)
+        media_type = "application/x-ndjson"
+
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="components.{format}"'
+        },
+    )
+
+
+@router.post(
+    "/bulk",
+    response_model=ComponentImportResult,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"type": "object"}}
+                },
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def components_bulk_create(
+    request: Request,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: UserSnapshot = Depends(require_manager),
 ):
-    return list_components(db, component_type, substation, limit, offset)
+    """
+    creates many components at once, all or nothing.
+    the body is a JSON array of components or a CSV with the export columns.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+
+    try:
+        if content_type.startswith("text/csv"):
+            raw = parse_components_csv(body.decode("utf-8-sig"))
+        else:
+            raw = json.loads(body)
+    except (UnicodeDecodeError, ValueError, csv.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed body"
+        )
+
+    if isinstance(raw, list) and len(raw) > settings.COMPONENT_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.COMPONENT_IMPORT_MAX_ROWS} components per import",
+        )
+
+    try:
+        components = _components_adapter.validate_python(raw)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=jsonable_encoder(e.errors(include_url=False, include_context=False)),
+        )
+
+    created = await run_in_threadpool(
+        bulk_create_components, db, [component.model_dump() for component in components]
+    )
+    return {"created": created}
 
 
 @router.post("", response_model=ComponentRead)
 def components_create(
     data: ComponentCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(require_manager),
+    user: UserSnapshot = Depends(require_manager),
 ):
     return create_component(db, payload=data.model_dump())
 
 
+@router.get("/{component_id}/latest", response_model=list[MeasurementLatestRead])
+def components_latest(
+    component_id: UUID,
+    db: Session = Depends(get_read_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    the current reading of every measurement type of the component.
+    """
+    latest = get_component_latest(db, component_id)
+    if latest is None:
+        raise HTTPException(status_code=404, detail="Component not found")
+    return latest
+
+
 @router.put("/{component_id}", response_model=ComponentRead)
 def components_update(
     component_id: UUID,
     data: ComponentCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(require_manager),
+    user: UserSnapshot = Depends(require_manager),
 ):
     try:
         return update_component(db, component_id, payload=data.model_dump())
@@ -70,7 +222,7 @@ def components_update(
 def components_delete(
     component_id: UUID,
     db: Session = Depends(get_db),
-    user: User = Depends(require_manager),
+    user: UserSnapshot = Depends(require_manager),
 ):
     try:
         return delete_component(db, component_id)
@@ -1,25 +1,228 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.db.connection import get_db
-from app.schemas.measurements import MeasurementCreate, MeasurementRead
-from app.services.measurements import create_measurement
+from app.db.connection import get_db, get_read_db
+from app.schemas.measurements import (
+    LiveSubscription,
+    MeasurementBatch,
+    MeasurementBatchResult,
+    MeasurementCreate,
+    MeasurementLatestRead,
+    MeasurementRead,
+)
+from app.services.measurement_events import subscribe_measurements
+from app.services.measurements import (
+    create_measurement,
+    create_measurements,
+    list_latest_values,
+)
 
-from app.api.deps import require_manager
-from app.models.users import User
+from app.api.deps import get_current_user, require_scope
+from app.models.api_keys import ApiKeyScope
+from app.models.components import ComponentType
+from app.services.users import UserSnapshot
 
 router = APIRouter(prefix="/measurements", tags=["measurement"])
 
+_TOO_OLD = "Measurement older than the retention window"
+
 
 @router.post("", response_model=MeasurementRead, status_code=status.HTTP_201_CREATED)
 def measurements_create(
-    data: MeasurementCreate, db: Session = Depends(get_db), user=Depends(require_manager)
+    data: MeasurementCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    user=Depends(require_scope(ApiKeyScope.measurements_ingest)),
+):
+    """
+    201 with the sample written (new, or a corrected value with
+    MEASUREMENT_ON_CONFLICT=update), 200 with the stored one when the
+    same component, type and timestamp was already sent. 422 for a
+    sample older than MEASUREMENT_RETENTION_DAYS, it is rolled up already.
+    """
+    try:
+        measurement, written = create_measurement(db, payload=data.model_dump())
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Component not found"
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=_TOO_OLD,
+        )
+    if not written:
+        response.status_code = status.HTTP_200_OK
+    return measurement
+
+
+@router.post("/batch", response_model=MeasurementBatchResult)
+def measurements_create_batch(
+    data: MeasurementBatch,
+    db: Session = Depends(get_db),
+    user=Depends(require_scope(ApiKeyScope.measurements_ingest)),
 ):
+    """
+    stores many samples in one transaction. samples already stored are
+    not written again, a gateway can resend a whole batch after a timeout.
+    a sample older than MEASUREMENT_RETENTION_DAYS fails the batch (422).
+    """
     try:
-        return create_measurement(db, payload=data.model_dump())
+        written = create_measurements(db, [item.model_dump() for item in data])
     except LookupError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Component not found"
         )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=_TOO_OLD,
+        )
+    return {
+        "received": len(data),
+        "written": written,
+        "duplicates": len(data) - written,
+    }
+
+
+@router.get("/latest", response_model=list[MeasurementLatestRead])
+def measurements_latest(
+    substation: Optional[str] = None,
+    component_type: Optional[ComponentType] = None,
+    measurement_type: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_read_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    the current reading of every component (and measurement type)
+    matching the filters.
+    """
+    return list_latest_values(
+        db, substation, component_type, measurement_type, limit, offset
+    )
+
+
+# control messages put in the subscription queue by the receiving side
+_RESUBSCRIBED = object()
+_DISCONNECTED = object()
+
+
+def _bearer_token(websocket: WebSocket) -> str | None:
+    scheme, _, token = websocket.headers.get("authorization", "").partition(" ")
+    return token if scheme.lower() == "bearer" and token else None
+
+
+@router.websocket("/live")
+async def measurements_live(
+    websocket: WebSocket,
+    token: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    """
+    live measurements. the token goes in the "token" query parameter
+    (browsers can't set headers on a websocket) or in an Authorization
+    header. the client sends
+      {"component_ids": [...], "measurement_types": [...]}
+    to (re)subscribe and receives {"type": "measurement", ...} for every
+    sample accepted by this api process. a client that doesn't keep up
+    loses its oldest samples and gets {"type": "dropped", "count": n}.
+    """
+    token = token or _bearer_token(websocket)
+    try:
+        await run_in_threadpool(get_current_user, db, token or "")
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    finally:
+        # nothing else needs the database, don't hold a pooled connection
+        await run_in_threadpool(db.close)
+
+    await websocket.accept()
+
+    subscription = subscribe_measurements([])
+    measurement_types: set[str] | None = None
+
+    async def receive_subscriptions() -> None:
+        nonlocal subscription, measurement_types
+        try:
+            while True:
+                message = await websocket.receive_text()
+                try:
+                    request = LiveSubscription.model_validate_json(message)
+                except ValidationError as error:
+                    subscription.put_nowait(
+                        {
+                            "type": "error",
+                            "detail": error.errors(
+                                include_url=False, include_context=False
+                            ),
+                        }
+                    )
+                    continue
+
+                previous = subscription
+                subscription = subscribe_measurements(request.component_ids)
+                measurement_types = (
+                    set(request.measurement_types)
+                    if request.measurement_types
+                    else None
+                )
+                subscription.put_nowait(
+                    {
+                        "type": "subscribed",
+                        "component_ids": sorted(subscription.topics),
+                        "measurement_types": request.measurement_types,
+                    }
+                )
+                previous.close()
+                previous.put_nowait(_RESUBSCRIBED)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            # wakes up the sending side, whatever stopped the loop
+            subscription.close()
+            subscription.put_nowait(_DISCONNECTED)
+
+    receiver = asyncio.create_task(receive_subscriptions())
+    try:
+        while True:
+            current = subscription
+            message = await current.get()
+            if message is _RESUBSCRIBED:
+                continue
+            if message is _DISCONNECTED:
+                break
+
+            dropped = current.take_dropped()
+            if dropped:
+                await websocket.send_json({"type": "dropped", "count": dropped})
+            if (
+                message["type"] == "measurement"
+                and measurement_types is not None
+                and message["measurement_type"] not in measurement_types
+            ):
+                continue
+            await websocket.send_json(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        subscription.close()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import require_manager
+from app.core.metrics import route_db_metrics, route_latency_metrics
+from app.core.profiling import profile_store
+from app.db import connection
+from app.db.connection import pool_stats
+from app.services.users import UserSnapshot
+
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/db-pool")
+def metrics_db_pool(user: UserSnapshot = Depends(require_manager)):
+    """
+    live stats of the connection pools (primary and replica) of this process.
+    """
+    replica = connection.read_replica
+    return {
+        "primary": pool_stats(connection.engine),
+        "replica": pool_stats(replica.engine) if replica else None,
+        "replica_lag_seconds": replica.lag_seconds() if replica else None,
+    }
+
+
+@router.get("/routes")
+def metrics_routes(user: UserSnapshot = Depends(require_manager)):
+    """
+    statements and db time per route since the process started,
+    the most db-expensive routes first.
+    """
+    return route_db_metrics.snapshot()
+
+
+@router.get("/latency")
+def metrics_latency(user: UserSnapshot = Depends(require_manager)):
+    """
+    p50/p95/p99 latency per route since the process started,
+    the slowest routes (by p99) first.
+    """
+    return route_latency_metrics.snapshot()
+
+
+@router.get("/profiles")
+def metrics_profiles(user: UserSnapshot = Depends(require_manager)):
+    """
+    the last profiles taken with the X-Profile: 1 request header.
+    """
+    return [
+        {
+            "id": profile.id,
+            "route": profile.route,
+            "created_at": profile.created_at,
+            "duration_ms": profile.duration_ms,
+            "samples": profile.samples,
+        }
+        for profile in profile_store.list()
+    ]
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def metrics_profile(profile_id: str, user: UserSnapshot = Depends(require_manager)):
+    """
+    folded stacks of a profile, ready for flamegraph.pl or speedscope.
+    """
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.folded
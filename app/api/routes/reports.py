@@ -1,16 +1,45 @@
 from __future__ import annotations
 
+import asyncio
+import json
+from functools import partial
+from typing import AsyncIterator, Literal, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, load_only
 
+from app.api.compression import encode_body, negotiate_encoding
 from app.api.deps import get_current_user, require_manager
-from app.db.connection import get_db
+from app.api.fieldsets import (
+    FIELDS_QUERY,
+    parse_fields,
+    sparse_dump,
+    sparse_response,
+)
+from app.api.streaming import csv_chunks, ndjson_lines
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pubsub import Subscription
+from app.db.connection import get_db, get_read_db
 from app.models.reports import Report, ReportStatus
-from app.models.users import User
+from app.services.users import UserSnapshot
 from app.schemas.reports import ReportCreate, ReportRead
+from app.services.report_events import (
+    FINAL_STATUSES,
+    get_report_status,
+    subscribe_report_status,
+    wait_for_listener,
+)
+from app.services.report_results import (
+    ReportSection,
+    iter_report_section,
+    section_columns,
+)
 
 
 router = APIRouter(prefix="/reports", tags=["reports"])
@@ -20,7 +49,7 @@ router = APIRouter(prefix="/reports", tags=["reports"])
 def create_report(
     data: ReportCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(require_manager),
+    user: UserSnapshot = Depends(require_manager),
 ):
     if data.to_date <= data.from_date:
         raise HTTPException(
@@ -31,6 +60,11 @@ def create_report(
     report = Report(
         from_date=data.from_date,
         to_date=data.to_date,
+        filters_json=(
+            data.filters.model_dump(mode="json", exclude_none=True)
+            if data.filters
+            else None
+        ),
         status=ReportStatus.PENDING,
     )
 
@@ -40,24 +74,278 @@ def create_report(
     return report
 
 
+REPORT_FIELDS = tuple(ReportRead.model_fields)
+
+
+def _report_options(fields: list[str] | None) -> list:
+    """
+    loads only the requested columns (the big json sections are often
+    not), status is always there for the long poll.
+    """
+    if fields is None:
+        return []
+    columns = dict.fromkeys([Report.status, *(getattr(Report, f) for f in fields)])
+    return [load_only(*columns, raiseload=True)]
+
+
+# DONE reports never change: their serialized (and compressed) body is
+# kept per content coding, a hit doesn't even read the report row.
+# bounded by the bytes of the bodies, not only by their number
+report_body_cache: TTLCache[tuple[UUID, str], tuple[str | None, bytes]] = TTLCache(
+    max_size=settings.REPORT_BODY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.REPORT_BODY_CACHE_TTL_SECONDS,
+    max_bytes=settings.REPORT_BODY_CACHE_MAX_BYTES,
+    size_of=lambda cached: len(cached[1]),
+)
+
+
+def _body_key(report_id: UUID, encoding: str | None) -> tuple[UUID, str]:
+    return report_id, encoding or "identity"
+
+
+def _encoded_response(content_encoding: str | None, body: bytes) -> Response:
+    headers = {"Vary": "Accept-Encoding"}
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _report_response(
+    report: Report, fields: list[str] | None, encoding: str | None = None
+):
+    if fields is not None:
+        return sparse_response(sparse_dump(report, fields))
+    if report.status != ReportStatus.DONE:
+        return report
+
+    key = _body_key(report.id, encoding)
+    cached = report_body_cache.get(key)
+    if cached is None:
+        body = ReportRead.model_validate(report).model_dump_json().encode()
+        cached = encode_body(body, encoding)
+        if len(cached[1]) <= settings.REPORT_BODY_CACHE_MAX_BODY_BYTES:
+            report_body_cache.set(key, cached)
+    return _encoded_response(*cached)
+
+
 @router.get("", response_model=list[ReportRead])
 def list_reports(
     limit: int = 50,
     offset: int = 0,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: Session = Depends(get_read_db),
+    user: UserSnapshot = Depends(get_current_user),
 ):
-    reports = select(Report).order_by(Report.created_at.desc()).offset(offset).limit(limit)
-    return db.execute(reports).scalars().all()
+    selected = parse_fields(fields, REPORT_FIELDS)
+    reports = (
+        select(Report)
+        .options(*_report_options(selected))
+        .order_by(Report.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    reports = db.execute(reports).scalars().all()
+    if selected is None:
+        return reports
+    return sparse_response([sparse_dump(report, selected) for report in reports])
+
+
+def _load_report(
+    db: Session, primary_db: Session, report_id: UUID, options: list = ()
+) -> Report | None:
+    report = db.get(Report, report_id, options=options)
+    if not report and db is not primary_db:
+        # just created and not replicated yet
+        report = primary_db.get(Report, report_id, options=options)
+    return report
+
+
+def _release(*sessions: Session) -> None:
+    for db in sessions:
+        db.close()
+
+
+async def _wait_final_status(subscription: Subscription, timeout: float) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while (remaining := deadline - loop.time()) > 0:
+        try:
+            event = await subscription.get(timeout=remaining)
+        except TimeoutError:
+            return
+        if ReportStatus(event["status"]) in FINAL_STATUSES:
+            return
 
 
 @router.get("/{report_id}", response_model=ReportRead)
-def get_report(
+async def get_report(
     report_id: UUID,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    request: Request,
+    wait: float = Query(default=0, ge=0, le=settings.REPORT_MAX_WAIT_SECONDS),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
+    user: UserSnapshot = Depends(get_current_user),
 ):
-    report = db.get(Report, report_id)
+    """
+    with wait > 0 a PENDING or RUNNING report is returned only once it
+    is DONE or FAILED, or after wait seconds, whichever comes first.
+    no db connection is held while waiting, the worker NOTIFY wakes
+    the request up.
+    a poll can ask for fields=status (and maybe one section) only.
+    a whole DONE report is served from its cached compressed body.
+    """
+    selected = parse_fields(fields, REPORT_FIELDS)
+    options = _report_options(selected)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+
+    if selected is None:
+        cached = report_body_cache.get(_body_key(report_id, encoding))
+        if cached is not None:
+            return _encoded_response(*cached)
+
+    if not wait:
+        report = await run_in_threadpool(
+            _load_report, db, primary_db, report_id, options
+        )
+        if not report:
+            raise HTTPException(status_code=404, detail="Report not found")
+        return await run_in_threadpool(_report_response, report, selected, encoding)
+
+    # subscribed before reading the status so no change falls in between
+    with subscribe_report_status(report_id) as subscription:
+        await run_in_threadpool(wait_for_listener, primary_db)
+        report = await run_in_threadpool(
+            _load_report, db, primary_db, report_id, options
+        )
+        if not report:
+            raise HTTPException(status_code=404, detail="Report not found")
+        if report.status in FINAL_STATUSES:
+            return await run_in_threadpool(
+                _report_response, report, selected, encoding
+            )
+
+        await run_in_threadpool(_release, db, primary_db)
+        await _wait_final_status(subscription, wait)
+
+    # from the primary: the replica may not have the new status yet
+    report = await run_in_threadpool(
+        partial(primary_db.get, Report, report_id, options=options)
+    )
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
-    return report
+    return await run_in_threadpool(_report_response, report, selected, encoding)
+
+
+def _status_event(report_id: UUID, report_status: ReportStatus) -> str:
+    data = json.dumps({"id": str(report_id), "status": report_status.value})
+    return f"event: status\ndata: {data}\n\n"
+
+
+def _read_status(bind: Engine, report_id: UUID) -> ReportStatus | None:
+    with Session(bind) as db:
+        return get_report_status(db, report_id)
+
+
+async def _status_stream(
+    subscription: Subscription,
+    bind: Engine,
+    report_id: UUID,
+    current: ReportStatus,
+) -> AsyncIterator[str]:
+    with subscription:
+        yield _status_event(report_id, current)
+        while current not in FINAL_STATUSES:
+            try:
+                event = await subscription.get(
+                    timeout=settings.REPORT_EVENTS_KEEPALIVE_SECONDS
+                )
+                new_status = ReportStatus(event["status"])
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                # safety net for notifications lost while the listener
+                # was reconnecting, a short session only for this read
+                new_status = await run_in_threadpool(_read_status, bind, report_id)
+                if new_status is None:
+                    return
+
+            if new_status != current:
+                current = new_status
+                yield _status_event(report_id, current)
+
+
+@router.get("/{report_id}/events")
+async def report_events(
+    report_id: UUID,
+    db: Session = Depends(get_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    server-sent events with the status changes of a report, the stream
+    ends once the report is DONE or FAILED.
+    the first event is the current status. no db connection is held
+    while waiting, changes come from the worker NOTIFYs.
+    """
+    # subscribed before reading the status so no change falls in between
+    subscription = subscribe_report_status(report_id)
+    try:
+        await run_in_threadpool(wait_for_listener, db)
+        current = await run_in_threadpool(get_report_status, db, report_id)
+        await run_in_threadpool(db.close)
+    except Exception:
+        subscription.close()
+        raise
+
+    if current is None:
+        subscription.close()
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    return StreamingResponse(
+        _status_stream(subscription, db.get_bind(), report_id, current),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{report_id}/download")
+def report_download(
+    report_id: UUID,
+    section: ReportSection = "daily_measurement_averages",
+    format: Literal["ndjson", "csv"] = "ndjson",
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    streams one result section of a DONE report, row by row, as NDJSON
+    or CSV. memory stays flat whatever the size of the report.
+    """
+    report_status = get_report_status(db, report_id)
+    if report_status != ReportStatus.DONE and db is not primary_db:
+        # just created or just finished, not replicated yet: the rows
+        # are streamed from the primary then
+        db = primary_db
+        report_status = get_report_status(db, report_id)
+    if report_status is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    if report_status != ReportStatus.DONE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Report is {report_status.value}",
+        )
+
+    rows = iter_report_section(db, report_id, section)
+
+    if format == "csv":
+        content = csv_chunks(rows, section_columns(section))
+        media_type = "text/csv"
+    else:
+        content = ndjson_lines(rows)
+        media_type = "application/x-ndjson"
+
+    filename = f"report-{report_id}-{section}.{format}"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
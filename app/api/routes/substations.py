@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.db.connection import get_read_db
+from app.services.users import UserSnapshot
+from app.schemas.substations import SubstationSummaryRead
+from app.services.substations import (
+    get_substation_summary,
+    list_substation_summaries,
+)
+
+
+router = APIRouter(prefix="/substations", tags=["substations"])
+
+
+@router.get("", response_model=list[SubstationSummaryRead])
+def substations_list(
+    limit: int = 50,
+    offset: int = 0,
+    db: Session = Depends(get_read_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    return list_substation_summaries(db, limit, offset)
+
+
+@router.get("/{substation}", response_model=SubstationSummaryRead)
+def substations_get(
+    substation: str,
+    db: Session = Depends(get_read_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    summary = get_substation_summary(db, substation)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Substation not found")
+    return summary
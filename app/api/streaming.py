@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+from fastapi.encoders import jsonable_encoder
+
+# a csv chunk is sent once the buffer gets past this size
+CSV_CHUNK_BYTES = 64 * 1024
+
+
+def ndjson_lines(rows: Iterable[dict]) -> Iterator[str]:
+    # only the values json can't encode (uuids, datetimes ecc...) go
+    # through jsonable_encoder, running it on every row is 3x slower
+    for row in rows:
+        yield json.dumps(row, default=jsonable_encoder) + "\n"
+
+
+def csv_chunks(rows: Iterable[dict], columns: list[str]) -> Iterator[str]:
+    """
+    the header, then the rows in chunks of about CSV_CHUNK_BYTES.
+    keys of a row missing from columns are ignored.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() > CSV_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import app.models
+
+from app.api.compression import zstandard
+from app.benchmarks.stats import summarize_latencies
+from app.core.config import settings
+from app.db.connection import create_db_engine
+from app.models.measurements import Measurement
+from app.models.reports import Report, ReportStatus
+from app.report_worker import compute_report
+from app.schemas.reports import ReportRead
+
+
+def build_report(db: Session, from_date: datetime, to_date: datetime) -> Report:
+    """
+    a DONE report over [from_date, to_date), computed like the worker
+    does but not stored.
+    """
+    now = datetime.now(timezone.utc)
+    report = Report(
+        id=uuid.uuid4(),
+        from_date=from_date,
+        to_date=to_date,
+        status=ReportStatus.DONE,
+        created_at=now,
+        job_started_at=now,
+        job_finished_at=now,
+        attempts=0,
+    )
+    (
+        report.components_by_type_json,
+        report.transformer_capacity_by_voltage_json,
+        report.line_length_by_voltage_json,
+        report.daily_measurement_averages_json,
+        report.measurement_quantiles_json,
+    ) = compute_report(db, report)
+    return report
+
+
+def serialize(report: Report) -> bytes:
+    return ReportRead.model_validate(report).model_dump_json().encode()
+
+
+def codecs() -> dict:
+    """
+    name -> (compress, decompress) of every coding and level measured.
+    """
+    result = {}
+    for level in (1, 6, 9):
+        result[f"gzip-{level}"] = (
+            lambda data, level=level: gzip.compress(data, level, mtime=0),
+            gzip.decompress,
+        )
+    if zstandard is not None:
+        for level in (1, 3, 9):
+            compressor = zstandard.ZstdCompressor(level)
+            result[f"zstd-{level}"] = (
+                compressor.compress,
+                zstandard.ZstdDecompressor().decompress,
+            )
+    return result
+
+
+def _cpu_ms(function, data: bytes, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        function(data)
+        timings.append((time.process_time() - started) * 1000)
+    return summarize_latencies(timings)
+
+
+def measure(body: bytes, repeat: int) -> dict:
+    result = {"identity_bytes": len(body), "codecs": {}}
+    for name, (compress, decompress) in codecs().items():
+        compressed = compress(body)
+        result["codecs"][name] = {
+            "bytes": len(compressed),
+            "ratio": round(len(body) / len(compressed), 2),
+            "compress_cpu": _cpu_ms(compress, body, repeat),
+            "decompress_cpu": _cpu_ms(decompress, compressed, repeat),
+        }
+    # what the middleware does on a streamed body: one chunk at a time
+    chunks = [body[i : i + 64 * 1024] for i in range(0, len(body), 64 * 1024)]
+
+    def streamed(data: bytes) -> bytes:
+        stream = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+        return b"".join(stream.compress(chunk) for chunk in chunks) + stream.flush()
+
+    result["gzip_streamed_cpu"] = _cpu_ms(streamed, body, repeat)
+    return result
+
+
+def main() -> None:
+    """
+    bytes sent and cpu cost of gzip/zstd (zstd needs the zstandard
+    package) at a few levels for DONE reports of 1/7/30 day windows
+    ending at the newest measurement, on the measurements already in the
+    database. also shows the per request cost the precompressed report
+    cache saves: serializing plus compressing the report.
+    read only, nothing is stored.
+    example:
+      python -m app.scripts.seed_data --components 1000 --rows 10000000
+      python -m app.benchmarks.bench_compression --output compression.json
+    """
+    parser = argparse.ArgumentParser(
+        description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--days", default="1,7,30", help="window sizes in days")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    settings.DB_SLOW_QUERY_MS = 0
+    engine = create_db_engine(args.database_url, application_name="powergrid-bench")
+
+    results = {"reports": {}}
+    with Session(engine) as db:
+        newest = db.execute(select(func.max(Measurement.timestamp))).scalar_one()
+        if newest is None:
+            raise SystemExit("no measurements, seed some with app.scripts.seed_data")
+
+        for days in args.days.split(","):
+            print(f"{days}d ...", flush=True)
+            from_date = newest - timedelta(days=int(days))
+            report = build_report(db, from_date, newest)
+            body = serialize(report)
+
+            result = measure(body, args.repeat)
+            result["serialize_cpu"] = _cpu_ms(
+                lambda _: serialize(report), body, args.repeat
+            )
+            results["reports"][f"{days}d"] = result
+
+    engine.dispose()
+
+    text_result = json.dumps(results, indent=2, default=str)
+    print(text_result)
+    if args.output:
+        args.output.write_text(text_result + "\n")
+
+
+if __name__ == "__main__":
+    main()
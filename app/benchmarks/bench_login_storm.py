@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+
+import httpx
+
+from app.benchmarks.stats import summarize_latencies
+
+
+def _login(client: httpx.Client, username: str, password: str) -> httpx.Response:
+    return client.post(
+        "/token",
+        data={"username": username, "password": password},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+
+def _probe(
+    base_url: str, token: str, path: str, stop: threading.Event, latencies: list
+) -> None:
+    with httpx.Client(
+        base_url=base_url, headers={"Authorization": f"Bearer {token}"}
+    ) as client:
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            response.raise_for_status()
+
+
+def _login_storm(
+    base_url: str,
+    username: str,
+    password: str,
+    stop: threading.Event,
+    latencies: list,
+    statuses: Counter,
+) -> None:
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = _login(client, username, password)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] += 1
+
+
+def run_phase(args, token: str, login_clients: int) -> dict:
+    """
+    runs the probe client (and optionally the login clients) for
+    args.duration seconds and returns latency summaries.
+    """
+    stop = threading.Event()
+    probe_latencies: list[float] = []
+    login_latencies: list[float] = []
+    login_statuses: Counter = Counter()
+
+    threads = [
+        threading.Thread(
+            target=_probe,
+            args=(args.base_url, token, args.probe_path, stop, probe_latencies),
+        )
+    ]
+    for _ in range(login_clients):
+        threads.append(
+            threading.Thread(
+                target=_login_storm,
+                args=(
+                    args.base_url,
+                    args.username,
+                    args.password,
+                    stop,
+                    login_latencies,
+                    login_statuses,
+                ),
+            )
+        )
+
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "login_clients": login_clients,
+        "probe": summarize_latencies(probe_latencies),
+        "login": summarize_latencies(login_latencies),
+        "login_statuses": {str(code): count for code, count in login_statuses.items()},
+    }
+
+
+def main() -> None:
+    """
+    measures the latency of an ordinary api call while many clients
+    hammer /token, against a running server.
+    example:
+      python -m app.benchmarks.bench_login_storm --base-url http://localhost:8000
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="manager")
+    parser.add_argument("--password", default="managerpass")
+    parser.add_argument("--probe-path", default="/components?limit=1")
+    parser.add_argument("--login-clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with httpx.Client(base_url=args.base_url) as client:
+        response = _login(client, args.username, args.password)
+        response.raise_for_status()
+        token = response.json()["access_token"]
+
+    results = {
+        "baseline": run_phase(args, token, login_clients=0),
+        "login_storm": run_phase(args, token, login_clients=args.login_clients),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import app.models
+
+from app.benchmarks.stats import summarize_latencies
+from app.core.config import settings
+from app.db.connection import create_db_engine
+from app.models.measurements import Measurement
+from app.report_worker import daily_averages
+
+BACKENDS = ("sql", "numpy")
+
+
+def run_backend(
+    db: Session, backend: str, from_date, to_date, repeat: int
+) -> tuple[dict, list[tuple]]:
+    """
+    wall time and worker cpu time of the daily averages with one backend,
+    what is left of the wall time is spent in the database (and on the
+    wire).
+    """
+    settings.REPORT_BACKEND = backend
+    wall, cpu = [], []
+    for _ in range(repeat):
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        rows = daily_averages(db, from_date, to_date, {})
+        wall.append((time.perf_counter() - wall_started) * 1000)
+        cpu.append((time.process_time() - cpu_started) * 1000)
+        db.rollback()
+
+    return {
+        "wall": summarize_latencies(wall),
+        "worker_cpu": summarize_latencies(cpu),
+        "outside_worker_p50_ms": summarize_latencies(
+            [w - c for w, c in zip(wall, cpu)]
+        )["p50_ms"],
+    }, rows
+
+
+def _max_difference(left: list[tuple], right: list[tuple]) -> float | None:
+    left = {row[:3]: row[3] for row in left}
+    right = {row[:3]: row[3] for row in right}
+    if left.keys() != right.keys():
+        return None
+    return max((abs(left[key] - right[key]) for key in left), default=0.0)
+
+
+def main() -> None:
+    """
+    compares the sql and numpy backends (REPORT_BACKEND) of the report
+    daily averages over 1/7/30 day windows ending at the newest
+    measurement, on the measurements already in the database.
+    for every window and backend it prints the wall time, the cpu time
+    of the worker process and the rest (database and transfer), plus the
+    largest difference between the averages of the two backends (null if
+    they don't have the same groups).
+    read only, nothing is stored.
+    example:
+      python -m app.scripts.seed_data --components 1000 --rows 10000000
+      python -m app.benchmarks.bench_report_backend --days 1,7,30 --output backends.json
+    """
+    parser = argparse.ArgumentParser(
+        description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--days", default="1,7,30", help="window sizes in days")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--chunk-rows", type=int, default=settings.REPORT_NUMPY_CHUNK_ROWS
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    settings.DB_SLOW_QUERY_MS = 0
+    settings.REPORT_NUMPY_CHUNK_ROWS = args.chunk_rows
+    engine = create_db_engine(args.database_url, application_name="powergrid-bench")
+
+    results = {"chunk_rows": args.chunk_rows, "windows": {}}
+    with Session(engine) as db:
+        newest = db.execute(select(func.max(Measurement.timestamp))).scalar_one()
+        if newest is None:
+            raise SystemExit("no measurements, seed some with app.scripts.seed_data")
+
+        for days in args.days.split(","):
+            from_date = newest - timedelta(days=int(days))
+            measurements = db.execute(
+                select(func.count()).where(Measurement.timestamp >= from_date)
+            ).scalar_one()
+            window = {"measurements": measurements, "backends": {}}
+            rows = {}
+            for backend in BACKENDS:
+                print(f"{days}d {backend} ...", flush=True)
+                window["backends"][backend], rows[backend] = run_backend(
+                    db, backend, from_date, newest, args.repeat
+                )
+            window["max_difference"] = _max_difference(*rows.values())
+            results["windows"][f"{days}d"] = window
+
+    engine.dispose()
+
+    text_result = json.dumps(results, indent=2, default=str)
+    print(text_result)
+    if args.output:
+        args.output.write_text(text_result + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection
+
+import app.models
+
+from app.benchmarks.stats import summarize_latencies
+from app.core.config import settings
+from app.db.connection import create_db_engine
+from app.models.measurements import Measurement
+from app.report_worker import daily_averages_query
+
+_BENCH_INDEX = "bench_measurements_timestamp"
+
+# every index that can serve the timestamp range, they are all dropped
+# before a strategy is measured so the planner can only use that one
+_TIMESTAMP_INDEXES = ("ix_measurements_timestamp", "ix_measurements_timestamp_brin")
+
+STRATEGIES = {
+    "none": None,
+    "btree": f"CREATE INDEX {_BENCH_INDEX} ON measurements (timestamp)",
+    "covering": (
+        f"CREATE INDEX {_BENCH_INDEX} ON measurements (timestamp) "
+        "INCLUDE (component_id, measurement_type, value)"
+    ),
+    "brin": (
+        f"CREATE INDEX {_BENCH_INDEX} ON measurements USING brin (timestamp) "
+        "WITH (autosummarize = on)"
+    ),
+}
+
+
+def _drop_timestamp_indexes(conn: Connection) -> None:
+    for name in (*_TIMESTAMP_INDEXES, _BENCH_INDEX):
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+
+def _restore_schema_index(conn: Connection) -> None:
+    _drop_timestamp_indexes(conn)
+    for index in Measurement.__table__.indexes:
+        if index.name in _TIMESTAMP_INDEXES:
+            index.create(conn, checkfirst=True)
+
+
+def _measurements_scan(plan: dict) -> dict | None:
+    """
+    first node of the plan reading the measurements table.
+    """
+    if plan.get("Relation Name") == "measurements":
+        return plan
+    for child in plan.get("Plans", []):
+        found = _measurements_scan(child)
+        if found is not None:
+            return found
+    return None
+
+
+def explain(conn: Connection, query) -> dict:
+    compiled = query.compile(dialect=conn.dialect)
+    result = conn.exec_driver_sql(
+        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {compiled}", compiled.params
+    ).scalar_one()
+    plan = result[0]["Plan"]
+
+    scan = _measurements_scan(plan) or {}
+    index_name = scan.get("Index Name")
+    # a bitmap heap scan gets its index from the bitmap index scan under it
+    for child in scan.get("Plans", []):
+        index_name = index_name or child.get("Index Name")
+
+    return {
+        "execution_ms": result[0]["Execution Time"],
+        "scan": scan.get("Node Type"),
+        "index": index_name,
+        "rows": scan.get("Actual Rows"),
+        "rows_removed_by_recheck": scan.get("Rows Removed by Index Recheck"),
+        "heap_fetches": scan.get("Heap Fetches"),
+        "shared_hit_blocks": plan.get("Shared Hit Blocks"),
+        "shared_read_blocks": plan.get("Shared Read Blocks"),
+    }
+
+
+def run_strategy(conn: Connection, strategy: str, windows: dict, repeat: int) -> dict:
+    _drop_timestamp_indexes(conn)
+
+    result = {"index_size_bytes": 0, "build_seconds": 0.0, "windows": {}}
+    ddl = STRATEGIES[strategy]
+    if ddl is not None:
+        started = time.perf_counter()
+        conn.exec_driver_sql(ddl)
+        result["build_seconds"] = time.perf_counter() - started
+        result["index_size_bytes"] = conn.execute(
+            text("SELECT pg_relation_size(:name)"), {"name": _BENCH_INDEX}
+        ).scalar_one()
+
+    # the visibility map makes index only scans possible, and the plan
+    # should not depend on when autovacuum last passed
+    conn.exec_driver_sql("VACUUM ANALYZE measurements")
+
+    for name, (from_date, to_date) in windows.items():
+        query = daily_averages_query(from_date, to_date)
+        plan = explain(conn, query)
+
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(query).all()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        result["windows"][name] = {
+            "plan": plan,
+            "latency": summarize_latencies(latencies),
+        }
+
+    return result
+
+
+def main() -> None:
+    """
+    compares timestamp index strategies for the report daily averages
+    query (daily_averages_query) on the measurements already in the
+    database: no index, b-tree, covering b-tree and brin.
+    for every strategy it prints index size, build time, the plan of the
+    measurements scan and the latency of 1/7/30 day windows ending at the
+    newest measurement.
+    it drops and builds indexes on the measurements table, run it on a
+    dedicated database. the schema index is put back at the end.
+    example (10^8 rows):
+      python -m app.scripts.seed_data --components 1000 --sample-interval 60 --rows 100000000
+      python -m app.benchmarks.bench_report_index --output index.json
+    """
+    parser = argparse.ArgumentParser(
+        description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument(
+        "--strategies",
+        type=lambda value: value.split(","),
+        default=list(STRATEGIES),
+        help=f"comma separated subset of {','.join(STRATEGIES)}",
+    )
+    parser.add_argument("--days", default="1,7,30", help="window sizes in days")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    unknown = set(args.strategies) - set(STRATEGIES)
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(sorted(unknown))}")
+
+    settings.DB_SLOW_QUERY_MS = 0
+    engine = create_db_engine(args.database_url, application_name="powergrid-bench")
+
+    # index builds and VACUUM can't run in a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        rows, newest = conn.execute(
+            select(func.count(), func.max(Measurement.timestamp))
+        ).one()
+        if not rows:
+            raise SystemExit("no measurements, seed some with app.scripts.seed_data")
+
+        windows = {
+            f"{days}d": (newest - timedelta(days=int(days)), newest)
+            for days in args.days.split(",")
+        }
+        results = {"measurements": rows, "strategies": {}}
+        try:
+            for strategy in args.strategies:
+                print(f"{strategy} ...", flush=True)
+                results["strategies"][strategy] = run_strategy(
+                    conn, strategy, windows, args.repeat
+                )
+        finally:
+            _restore_schema_index(conn)
+
+    engine.dispose()
+
+    text_result = json.dumps(results, indent=2, default=str)
+    print(text_result)
+    if args.output:
+        args.output.write_text(text_result + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+
+import app.models
+
+from app.benchmarks.grid import (
+    BENCH_PREFIX,
+    GridSpec,
+    generate_components,
+    generate_measurements,
+)
+from app.benchmarks.stats import summarize_latencies
+from app.core.config import settings
+from app.db.connection import create_db_engine
+from app.models.components import Component
+from app.models.measurements import Measurement
+from app.models.reports import Report
+from app.report_worker import compute_report
+from app.scripts.seed_data import copy_components, copy_measurements
+from app.services.components import bulk_create_components, list_components
+from app.services.measurements import insert_measurements, rebuild_latest_values
+from app.services.substations import rebuild_substation_summaries
+
+SCENARIOS = ("ingest", "list", "read", "report")
+
+
+def _timed(latencies: list[float], fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    latencies.append((time.perf_counter() - started) * 1000)
+    return result
+
+
+def _throughput(count: int, seconds: float, unit: str) -> dict:
+    return {
+        unit: count,
+        "seconds": seconds,
+        f"{unit}_per_second": count / seconds if seconds else None,
+    }
+
+
+def reset_grid(db: Session) -> None:
+    """
+    deletes the benchmark components (measurements and subclass rows go
+    with them through the foreign keys), everything else is left alone.
+    """
+    db.execute(delete(Component).where(Component.substation.like(f"{BENCH_PREFIX}%")))
+    db.commit()
+    rebuild_substation_summaries(db)
+
+
+def load_component_ids(db: Session) -> list:
+    query = (
+        select(Component.id)
+        .where(Component.substation.like(f"{BENCH_PREFIX}%"))
+        .order_by(Component.name)
+    )
+    return list(db.execute(query).scalars())
+
+
+def run_ingest(db: Session, spec: GridSpec, batch_size: int, method: str) -> dict:
+    """
+    creates the grid, either with COPY (app.scripts.seed_data, the fast
+    way to get big grids) or the way the api writes: components through
+    bulk_create_components and measurements with batched multi-row
+    INSERTs, one commit per batch.
+    """
+    reset_grid(db)
+    latencies: list[float] = []
+
+    if method == "copy":
+        started = time.perf_counter()
+        component_ids = copy_components(db.connection(), generate_components(spec))
+        components_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rows = copy_measurements(
+            db.connection(),
+            spec,
+            component_ids,
+            rows_per_chunk=batch_size,
+            on_chunk=lambda _, seconds: latencies.append(seconds * 1000),
+        )
+        db.commit()
+        seconds = time.perf_counter() - started
+        rebuild_substation_summaries(db)
+        rebuild_latest_values(db)
+    else:
+        started = time.perf_counter()
+        bulk_create_components(db, generate_components(spec))
+        components_seconds = time.perf_counter() - started
+
+        component_ids = load_component_ids(db)
+
+        rows = 0
+        started = time.perf_counter()
+        for batch in generate_measurements(spec, component_ids, batch_size):
+            batch_started = time.perf_counter()
+            insert_measurements(db, batch)
+            db.commit()
+            latencies.append((time.perf_counter() - batch_started) * 1000)
+            rows += len(batch)
+        seconds = time.perf_counter() - started
+
+    # fresh statistics, otherwise the read scenarios right after the
+    # ingest run with the planner estimates of an empty table
+    db.connection().exec_driver_sql("ANALYZE components, measurements")
+    db.commit()
+
+    return {
+        "components": _throughput(spec.components, components_seconds, "rows"),
+        "measurements": _throughput(rows, seconds, "rows"),
+        "method": method,
+        "batch_size": batch_size,
+        "batch_latency": summarize_latencies(latencies),
+    }
+
+
+def run_list(db: Session, spec: GridSpec, iterations: int, rng: random.Random) -> dict:
+    """
+    pages of GET /components: plain pagination at random offsets and
+    filtered by substation.
+    """
+    latencies: list[float] = []
+    substations = max(1, spec.components // spec.components_per_substation)
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        offset = rng.randrange(0, max(1, spec.components - 50))
+        _timed(latencies, list_components, db, limit=50, offset=offset)
+
+        substation = f"{BENCH_PREFIX}S{rng.randrange(substations):05d}"
+        _timed(latencies, list_components, db, substation=substation, limit=50)
+    seconds = time.perf_counter() - started
+
+    return {
+        **_throughput(len(latencies), seconds, "requests"),
+        "latency": summarize_latencies(latencies),
+    }
+
+
+def _read_series(db: Session, component_id, measurement_type, start, end) -> list:
+    query = (
+        select(Measurement.timestamp, Measurement.value)
+        .where(Measurement.component_id == component_id)
+        .where(Measurement.measurement_type == measurement_type)
+        .where(Measurement.timestamp >= start)
+        .where(Measurement.timestamp < end)
+        .order_by(Measurement.timestamp)
+    )
+    return db.execute(query).all()
+
+
+def run_read(
+    db: Session,
+    spec: GridSpec,
+    component_ids: list,
+    iterations: int,
+    window_seconds: float,
+    rng: random.Random,
+) -> dict:
+    """
+    reads one hour (window_seconds) of a random series, the typical
+    query of a dashboard plotting a component.
+    """
+    latencies: list[float] = []
+    rows = 0
+    span = max(0.0, (spec.end - spec.start).total_seconds() - window_seconds)
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        window_start = spec.start + timedelta(seconds=rng.uniform(0, span))
+        result = _timed(
+            latencies,
+            _read_series,
+            db,
+            rng.choice(component_ids),
+            rng.choice(spec.measurement_types),
+            window_start,
+            window_start + timedelta(seconds=window_seconds),
+        )
+        rows += len(result)
+    seconds = time.perf_counter() - started
+
+    return {
+        **_throughput(len(latencies), seconds, "requests"),
+        "window_seconds": window_seconds,
+        "rows_read": rows,
+        "latency": summarize_latencies(latencies),
+    }
+
+
+def run_report(db: Session, spec: GridSpec, iterations: int) -> dict:
+    """
+    runs compute_report (what the worker does for a report) over the
+    last day of the grid and over the whole grid.
+    """
+    periods = {
+        "last_day": (max(spec.start, spec.end - timedelta(days=1)), spec.end),
+        "full_range": (spec.start, spec.end),
+    }
+
+    result = {}
+    for name, (from_date, to_date) in periods.items():
+        # never added to the session, compute_report only reads the dates
+        report = Report(from_date=from_date, to_date=to_date)
+        latencies: list[float] = []
+        for _ in range(iterations):
+            _timed(latencies, compute_report, db, report)
+            db.rollback()
+        result[name] = {
+            "from_date": from_date.isoformat(),
+            "to_date": to_date.isoformat(),
+            "latency": summarize_latencies(latencies),
+        }
+    return result
+
+
+def run_suite(args) -> dict:
+    spec_kwargs = {
+        "components": args.components,
+        "measurement_types": tuple(args.measurement_types.split(",")),
+        "sample_interval_seconds": args.sample_interval,
+        "duration_seconds": args.duration,
+        "seed": args.seed,
+    }
+    if args.rows:
+        spec = GridSpec.for_measurements(args.rows, **spec_kwargs)
+    else:
+        spec = GridSpec(**spec_kwargs)
+
+    engine = create_db_engine(args.database_url, application_name="powergrid-bench")
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    rng = random.Random(args.seed)
+
+    url = make_url(args.database_url)
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "database": f"{url.host}:{url.port or 5432}/{url.database}",
+        "spec": spec.to_dict(),
+        "postgres": None,
+        "scenarios": {},
+    }
+
+    # big ingest batches are slow on purpose, don't log them as slow queries
+    settings.DB_SLOW_QUERY_MS = 0
+
+    with SessionLocal() as db:
+        results["postgres"] = db.execute(select(func.version())).scalar_one()
+
+        if "ingest" in args.scenarios:
+            print(f"ingest: {spec.total_measurements} measurements ...", flush=True)
+            results["scenarios"]["ingest"] = run_ingest(
+                db, spec, args.batch_size, args.ingest_method
+            )
+
+        component_ids = load_component_ids(db)
+        if not component_ids:
+            raise SystemExit("no benchmark grid in the database, run the ingest first")
+
+        if "list" in args.scenarios:
+            print("list ...", flush=True)
+            results["scenarios"]["list"] = run_list(db, spec, args.iterations, rng)
+        if "read" in args.scenarios:
+            print("read ...", flush=True)
+            results["scenarios"]["read"] = run_read(
+                db, spec, component_ids, args.iterations, args.read_window, rng
+            )
+        if "report" in args.scenarios:
+            print("report ...", flush=True)
+            results["scenarios"]["report"] = run_report(
+                db, spec, args.report_iterations
+            )
+
+    engine.dispose()
+    return results
+
+
+def main() -> None:
+    """
+    creates a synthetic grid in a postgres database and measures ingest,
+    list, read and report against it.
+    results (throughput and latency percentiles) are printed and saved
+    as json, compare two runs with app.benchmarks.compare.
+    only the components of the benchmark substations ("bench-...") are
+    ever deleted, still better to point it at a dedicated database.
+    example (10^6 measurements):
+      python -m app.benchmarks.bench_suite --rows 1000000 --output bench.json
+    """
+    parser = argparse.ArgumentParser(
+        description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--components", type=int, default=1_000)
+    parser.add_argument("--measurement-types", default="Voltage,Current,Power")
+    parser.add_argument(
+        "--sample-interval", type=float, default=60.0, help="seconds between samples"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=86_400.0, help="seconds of data per series"
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=None,
+        help="total measurements, overrides --duration",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=list(SCENARIOS),
+        help=f"comma separated subset of {','.join(SCENARIOS)}, "
+        "without ingest the grid already in the database is reused",
+    )
+    parser.add_argument(
+        "--ingest-method",
+        choices=("copy", "insert"),
+        default="copy",
+        help="copy: fastest load, insert: the batched INSERTs of the api",
+    )
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--report-iterations", type=int, default=3)
+    parser.add_argument("--read-window", type=float, default=3_600.0)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = run_suite(args)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
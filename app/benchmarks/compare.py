@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+_LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def flatten_metrics(results: dict) -> dict[str, float]:
+    """
+    the comparable numbers of a bench_suite result, keyed by their path
+    ("report.full_range.latency.p95_ms", "ingest.measurements.rows_per_second").
+    """
+    metrics: dict[str, float] = {}
+
+    def walk(node: dict, path: str) -> None:
+        for key, value in node.items():
+            name = f"{path}.{key}" if path else key
+            if isinstance(value, dict):
+                walk(value, name)
+            elif value is not None and (
+                key in _LATENCY_KEYS or key.endswith("_per_second")
+            ):
+                metrics[name] = float(value)
+
+    walk(results.get("scenarios", {}), "")
+    return metrics
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    """
+    one row per metric found in both runs. a latency going up or a
+    throughput going down by more than threshold (0.1 = 10%) is a
+    regression.
+    """
+    old = flatten_metrics(baseline)
+    new = flatten_metrics(current)
+
+    rows = []
+    for name in sorted(old.keys() & new.keys()):
+        if not old[name]:
+            continue
+        change = (new[name] - old[name]) / old[name]
+        worse = -change if name.endswith("_per_second") else change
+        rows.append(
+            {
+                "metric": name,
+                "baseline": old[name],
+                "current": new[name],
+                "change": change,
+                "regression": worse > threshold,
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    """
+    compares two bench_suite results and exits with 1 when something
+    got slower than --threshold.
+    example:
+      python -m app.benchmarks.compare before.json after.json --threshold 0.15
+    """
+    parser = argparse.ArgumentParser(
+        description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    if baseline.get("spec") != current.get("spec"):
+        print("warning: the two runs used different grid specs", file=sys.stderr)
+
+    rows = compare(baseline, current, args.threshold)
+    width = max((len(row["metric"]) for row in rows), default=10)
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['metric']:<{width}}  {row['baseline']:>12.2f}  "
+            f"{row['current']:>12.2f}  {row['change']:>+8.1%}{flag}"
+        )
+
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import math
+import random
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+from app.models.components import ComponentType, SwitchStatus
+
+# every benchmark substation (and so every benchmark component) starts
+# with this, the suite only ever deletes rows matching it
+BENCH_PREFIX = "bench-"
+
+# component types are mixed like in a real grid: few transformers,
+# a lot of lines and switches
+_TYPE_WEIGHTS = (
+    (ComponentType.transformer.value, 0.2),
+    (ComponentType.line.value, 0.4),
+    (ComponentType.switch.value, 0.4),
+)
+
+# (base value, daily swing) of every known measurement type, unknown
+# types get a generic 0..100 signal
+_SIGNALS = {
+    "Voltage": (132.0, 3.0),
+    "Current": (400.0, 150.0),
+    "Power": (50.0, 20.0),
+}
+
+_VOLTAGES_KV = (20.0, 66.0, 132.0, 220.0, 380.0)
+
+
+def _default_start() -> datetime:
+    return datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class GridSpec:
+    """
+    shape of a synthetic grid: how many components, which measurement
+    types every component reports, how often and for how long.
+    every component produces one series per measurement type, so the
+    number of measurements is
+    components * len(measurement_types) * samples_per_series.
+    """
+
+    components: int = 1_000
+    measurement_types: tuple[str, ...] = ("Voltage", "Current", "Power")
+    sample_interval_seconds: float = 60.0
+    duration_seconds: float = 86_400.0
+    start: datetime = field(default_factory=_default_start)
+    components_per_substation: int = 50
+    seed: int = 42
+
+    @property
+    def samples_per_series(self) -> int:
+        return max(1, int(self.duration_seconds // self.sample_interval_seconds))
+
+    @property
+    def total_measurements(self) -> int:
+        return (
+            self.components * len(self.measurement_types) * self.samples_per_series
+        )
+
+    @property
+    def end(self) -> datetime:
+        return self.start + timedelta(
+            seconds=self.samples_per_series * self.sample_interval_seconds
+        )
+
+    @classmethod
+    def for_measurements(cls, rows: int, **kwargs) -> GridSpec:
+        """
+        same spec with the duration picked so the grid has about `rows`
+        measurements.
+        """
+        spec = cls(**kwargs)
+        series = spec.components * len(spec.measurement_types)
+        samples = max(1, math.ceil(rows / series))
+        return cls(
+            **{
+                **kwargs,
+                "duration_seconds": samples * spec.sample_interval_seconds,
+            }
+        )
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["start"] = self.start.isoformat()
+        data["measurement_types"] = list(self.measurement_types)
+        data["samples_per_series"] = self.samples_per_series
+        data["total_measurements"] = self.total_measurements
+        return data
+
+
+def generate_components(spec: GridSpec) -> list[dict]:
+    """
+    the components of the grid as flat payloads (the same format taken
+    by bulk_create_components), always the same for the same spec.
+    """
+    rng = random.Random(spec.seed)
+    types = [component_type for component_type, _ in _TYPE_WEIGHTS]
+    weights = [weight for _, weight in _TYPE_WEIGHTS]
+
+    components = []
+    for index in range(spec.components):
+        component_type = rng.choices(types, weights)[0]
+        substation = f"{BENCH_PREFIX}S{index // spec.components_per_substation:05d}"
+        payload = {
+            "component_type": component_type,
+            "name": f"{BENCH_PREFIX}{component_type[0].upper()}-{index:07d}",
+            "substation": substation,
+        }
+        if component_type == ComponentType.transformer:
+            payload["capacity_mva"] = float(rng.randrange(10, 500, 10))
+            payload["voltage_kv"] = rng.choice(_VOLTAGES_KV)
+        elif component_type == ComponentType.line:
+            payload["length_km"] = round(rng.uniform(0.5, 80.0), 2)
+            payload["voltage_kv"] = rng.choice(_VOLTAGES_KV)
+        else:
+            payload["status"] = rng.choice(list(SwitchStatus)).value
+        components.append(payload)
+
+    return components
+
+
+def series_signals(
+    spec: GridSpec, components: int, rng: random.Random
+) -> list[tuple[str, float, float, float]]:
+    """
+    (measurement_type, base, swing, phase) of every series, component by
+    component. every series gets its own phase so they don't all peak
+    together.
+    """
+    return [
+        (
+            measurement_type,
+            *_SIGNALS.get(measurement_type, (50.0, 50.0)),
+            rng.uniform(0, 2 * math.pi),
+        )
+        for _ in range(components)
+        for measurement_type in spec.measurement_types
+    ]
+
+
+def generate_measurements(
+    spec: GridSpec, component_ids: list[uuid.UUID], batch_size: int = 10_000
+) -> Iterator[list[dict]]:
+    """
+    yields the measurements of the grid in batches of batch_size rows.
+    rows come in time order (every series at t0, then every series at
+    t1 ...) like a real ingest, and are never all in memory at once.
+    values are a daily sine wave plus some noise.
+    """
+    rng = random.Random(spec.seed + 1)
+    signals = series_signals(spec, len(component_ids), rng)
+    series_components = [
+        component_id
+        for component_id in component_ids
+        for _ in spec.measurement_types
+    ]
+
+    batch: list[dict] = []
+    for sample in range(spec.samples_per_series):
+        offset = sample * spec.sample_interval_seconds
+        timestamp = spec.start + timedelta(seconds=offset)
+        angle = 2 * math.pi * offset / 86_400
+
+        for component_id, (measurement_type, base, swing, phase) in zip(
+            series_components, signals
+        ):
+            value = base + swing * math.sin(angle + phase)
+            batch.append(
+                {
+                    "component_id": component_id,
+                    "timestamp": timestamp,
+                    "value": round(value + rng.gauss(0, swing * 0.05), 3),
+                    "measurement_type": measurement_type,
+                }
+            )
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+    if batch:
+        yield batch
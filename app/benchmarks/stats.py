@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import math
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    """
+    nearest-rank percentile of an already sorted list.
+    q goes from 0 to 100.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize_latencies(latencies_ms: list[float]) -> dict:
+    """
+    returns count, mean and p50/p95/p99/max of a list of latencies (ms).
+    """
+    values = sorted(latencies_ms)
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) if values else None,
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1] if values else None,
+    }
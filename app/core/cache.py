@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    small in-process cache with a max size and a per entry expiry.
+    oldest entries are evicted first when the cache is full (LRU).
+    with max_bytes the values (sized by size_of) are also bounded in
+    total, a value bigger than max_bytes alone is never stored.
+    it is thread safe because sync routes run on the threadpool.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        max_bytes: int | None = None,
+        size_of: Callable[[V], int] | None = None,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.size_of = size_of or (lambda value: 0)
+        self.bytes = 0
+        self._data: OrderedDict[K, tuple[float, V, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        """
+        returns the cached value or None if missing/expired.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value, _ = item
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V, ttl_seconds: float | None = None) -> None:
+        """
+        stores a value.
+        ttl_seconds can only shorten the cache ttl, never extend it.
+        """
+        ttl = self.ttl_seconds
+        if ttl_seconds is not None:
+            ttl = min(ttl, ttl_seconds)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        size = self.size_of(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, value, size)
+            self.bytes += size
+            while len(self._data) > self.max_size or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._data)))
+
+    def _remove(self, key: K) -> tuple[float, V, int] | None:
+        # callers hold the lock
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.bytes -= item[2]
+        return item
+
+    def pop(self, key: K) -> V | None:
+        with self._lock:
+            item = self._remove(key)
+        return item[1] if item else None
+
+    def discard_where(self, predicate) -> int:
+        """
+        removes every entry whose value matches the predicate.
+        returns how many entries were removed.
+        """
+        with self._lock:
+            keys = [
+                key for key, (_, value, _) in self._data.items() if predicate(value)
+            ]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,11 +8,102 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     DB_ECHO: bool = False
 
+    # connection pool, size it against postgres max_connections:
+    # (DB_POOL_SIZE + DB_MAX_OVERFLOW) * processes must stay below it
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # 0 disables the per-connection statement_timeout
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_APPLICATION_NAME: str = "powergrid-api"
+
+    # optional read replica for GET routes and report aggregations,
+    # it is skipped (primary used) while it lags more than the tolerance
+    DATABASE_READ_URL: str | None = None
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 2.0
+
+    # statements slower than this are logged with their route, 0 disables
+    DB_SLOW_QUERY_MS: float = 500.0
+
+    # opt-in request profiler (X-Profile: 1 header, managers only)
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILE_MAX_STORED: int = 20
+
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # token -> user resolution cache, bounds how stale a role/activation can be
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_MAX_ENTRIES: int = 10_000
+
+    # argon2 parameters, changing them rehashes passwords on the next login
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+
+    # dedicated pool for password hashing, logins beyond workers + queue get a 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 16
+
+    # api keys are stored as HMAC-SHA256, the secret defaults to JWT_SECRET_KEY
+    API_KEY_HMAC_SECRET: str | None = None
+    API_KEY_CACHE_TTL_SECONDS: int = 60
+
     REPORT_MAX_ATTEMPTS: int = 5
+    # where the daily averages of a report are grouped: "sql" in the
+    # database, "numpy" in the worker (needs the numpy extra), the rows
+    # are then streamed in chunks of REPORT_NUMPY_CHUNK_ROWS
+    REPORT_BACKEND: Literal["sql", "numpy"] = "sql"
+    REPORT_NUMPY_CHUNK_ROWS: int = 200_000
+
+    # report status streams: a comment line is sent (and the status
+    # re-checked in the db) every keepalive, messages a subscriber
+    # doesn't read in time are dropped beyond the queue size
+    REPORT_EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    PUBSUB_QUEUE_SIZE: int = 100
+    # upper bound of GET /reports/{id}?wait=
+    REPORT_MAX_WAIT_SECONDS: float = 60.0
+
+    # websocket live measurements: samples queued per connection before
+    # the oldest are dropped, components per subscription
+    LIVE_MEASUREMENTS_QUEUE_SIZE: int = 1_000
+    LIVE_MEASUREMENTS_MAX_COMPONENTS: int = 1_000
+
+    # raw measurements older than this are rolled up into hourly
+    # aggregates and deleted by app.maintenance, 0 keeps them forever
+    MEASUREMENT_RETENTION_DAYS: int = 0
+    MEASUREMENT_RETENTION_BATCH_SIZE: int = 10_000
+    MAINTENANCE_INTERVAL_SECONDS: int = 300
+
+    # report quantiles: the sketch of a day is stored once the day ended
+    # this long ago. samples written or deleted later mark it dirty, it is
+    # then read from the raw rows until app.maintenance rebuilds it
+    QUANTILE_SKETCH_DELAY_MINUTES: int = 60
+    # days app.maintenance looks back for days without a stored sketch
+    QUANTILE_SKETCH_LOOKBACK_DAYS: int = 7
+
+    # a sample already stored (same component, type and timestamp) is
+    # ignored, or gets the new value with "update"
+    MEASUREMENT_ON_CONFLICT: Literal["ignore", "update"] = "ignore"
+    MEASUREMENT_BATCH_MAX_ROWS: int = 10_000
+
+    COMPONENT_IMPORT_MAX_ROWS: int = 100_000
+
+    # gzip/zstd responses (zstd needs the zstandard package), bodies
+    # smaller than the min size are sent as they are
+    COMPRESSION_MIN_SIZE: int = 1_024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    # DONE reports never change, their compressed body is kept in memory,
+    # up to MAX_BYTES per process. bigger bodies than MAX_BODY_BYTES are
+    # encoded again on every request instead of pushing everything out
+    REPORT_BODY_CACHE_MAX_ENTRIES: int = 64
+    REPORT_BODY_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    REPORT_BODY_CACHE_MAX_BODY_BYTES: int = 4 * 1024 * 1024
+    REPORT_BODY_CACHE_TTL_SECONDS: int = 3_600
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+
+# label of the requests no route matched (404s): every raw path would be
+# a new label, anybody could grow the per route metrics forever
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_label(scope: dict) -> str:
+    """
+    "METHOD /path/{template}" of the matched route, "METHOD <unmatched>"
+    when nothing matched.
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None) or UNMATCHED_ROUTE
+    return f"{scope.get('method', '?')} {path}"
+
+
+@dataclass
+class RequestDbStats:
+    """
+    database work done while serving a single request.
+    it is filled by the engine events in app.db.connection.
+    """
+
+    scope: dict = field(default_factory=dict, repr=False)
+    queries: int = 0
+    db_seconds: float = 0.0
+
+    def route_label(self) -> str:
+        return route_label(self.scope)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"'
+
+
+# set by the middleware for the duration of every http request
+current_request_stats: ContextVar[RequestDbStats | None] = ContextVar(
+    "current_request_stats", default=None
+)
+
+
+class RouteDbMetrics:
+    """
+    per route totals of the RequestDbStats, since the process started.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict] = {}
+
+    def record(self, stats: RequestDbStats) -> None:
+        label = stats.route_label()
+        with self._lock:
+            route = self._routes.setdefault(
+                label,
+                {"requests": 0, "queries": 0, "db_seconds": 0.0, "max_queries": 0},
+            )
+            route["requests"] += 1
+            route["queries"] += stats.queries
+            route["db_seconds"] += stats.db_seconds
+            route["max_queries"] = max(route["max_queries"], stats.queries)
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            items = [(label, dict(values)) for label, values in self._routes.items()]
+
+        result = []
+        for label, values in items:
+            requests = values["requests"]
+            result.append(
+                {
+                    "route": label,
+                    "requests": requests,
+                    "queries_total": values["queries"],
+                    "queries_avg": values["queries"] / requests,
+                    "queries_max": values["max_queries"],
+                    "db_ms_total": values["db_seconds"] * 1000,
+                    "db_ms_avg": values["db_seconds"] * 1000 / requests,
+                }
+            )
+        return sorted(result, key=lambda item: item["db_ms_total"], reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_db_metrics = RouteDbMetrics()
+
+
+def _latency_bucket_bounds() -> list[float]:
+    # 0.5 ms .. ~2 min, each bucket 25% wider than the previous one,
+    # so a quantile read from the buckets is off by at most ~25%
+    bounds = []
+    bound = 0.0005
+    while bound < 120:
+        bounds.append(bound)
+        bound *= 1.25
+    return bounds
+
+
+LATENCY_BUCKETS = _latency_bucket_bounds()
+
+
+class LatencyHistogram:
+    """
+    fixed buckets histogram of latencies (seconds).
+    recording is O(log buckets) and memory doesn't grow with traffic.
+    """
+
+    def __init__(self) -> None:
+        # one more bucket for everything above the last bound
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """
+        upper bound of the bucket holding the q-th quantile (0 < q <= 1).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                if index < len(LATENCY_BUCKETS):
+                    return min(LATENCY_BUCKETS[index], self.max)
+                return self.max
+        return self.max
+
+
+class RouteLatencyMetrics:
+    """
+    one LatencyHistogram per route, since the process started. labels
+    come from route_label, so there are as many as routes (plus the
+    unmatched one) whatever paths are requested.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[str, LatencyHistogram] = {}
+
+    def record(self, label: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._routes.get(label)
+            if histogram is None:
+                histogram = self._routes[label] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def snapshot(self) -> list[dict]:
+        result = []
+        with self._lock:
+            for label, histogram in self._routes.items():
+                result.append(
+                    {
+                        "route": label,
+                        "requests": histogram.count,
+                        "mean_ms": histogram.total / histogram.count * 1000,
+                        "p50_ms": histogram.quantile(0.50) * 1000,
+                        "p95_ms": histogram.quantile(0.95) * 1000,
+                        "p99_ms": histogram.quantile(0.99) * 1000,
+                        "max_ms": histogram.max * 1000,
+                    }
+                )
+        return sorted(result, key=lambda item: item["p99_ms"], reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_latency_metrics = RouteLatencyMetrics()
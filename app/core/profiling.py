@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+from app.core.config import settings
+
+# leaf frames of threads that are just waiting for work, they are left
+# out of the samples so the flamegraph only shows threads doing something
+_IDLE_LEAVES = (
+    ("threading.py", None),
+    ("selectors.py", None),
+    ("queue.py", None),
+    (os.path.join("concurrent", "futures", "thread.py"), "_worker"),
+)
+
+
+def _is_idle(frame) -> bool:
+    filename = frame.f_code.co_filename
+    for suffix, function in _IDLE_LEAVES:
+        if filename.endswith(suffix) and function in (None, frame.f_code.co_name):
+            return True
+    return False
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+class SamplingProfiler:
+    """
+    samples the python stacks of every busy thread of the process at a
+    fixed interval and counts identical stacks.
+    the result is in the "folded" format (one "frame;frame;frame count"
+    line per stack), which flamegraph.pl, inferno and speedscope read.
+    it samples the whole process: concurrent requests show up too, so it
+    is meant to be triggered on a single request at a time.
+    """
+
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_seconds):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me or _is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.most_common()
+        )
+
+
+@dataclass(frozen=True)
+class StoredProfile:
+    id: str
+    route: str
+    created_at: float
+    duration_ms: float
+    samples: int
+    folded: str
+
+
+class ProfileStore:
+    """
+    keeps the last max_size profiles in memory.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._profiles: OrderedDict[str, StoredProfile] = OrderedDict()
+
+    def add(
+        self, profile_id: str, route: str, duration_ms: float, folded: str
+    ) -> StoredProfile:
+        profile = StoredProfile(
+            id=profile_id,
+            route=route,
+            created_at=time.time(),
+            duration_ms=duration_ms,
+            samples=sum(int(line.rsplit(" ", 1)[1]) for line in folded.splitlines()),
+            folded=folded,
+        )
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_size:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def get(self, profile_id: str) -> StoredProfile | None:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> list[StoredProfile]:
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+
+profile_store = ProfileStore(max_size=settings.PROFILE_MAX_STORED)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any
+
+
+class Subscription:
+    """
+    the queue of messages of one subscriber, for one or more topics.
+    it is bounded: a subscriber that doesn't keep up loses its oldest
+    messages instead of growing the memory of the process.
+    """
+
+    def __init__(
+        self, broker: Broker, topics: tuple[str, ...], max_size: int
+    ) -> None:
+        self.broker = broker
+        self.topics = topics
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.dropped = 0
+
+    def put_nowait(self, message: Any) -> None:
+        """
+        hands a message to this subscriber only (control messages of the
+        route owning it), dropping the oldest one when the queue is full.
+        must be called from the subscriber loop, publish is the thread
+        safe way in.
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: float | None = None) -> Any:
+        """
+        next message, raises TimeoutError after timeout seconds.
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def take_dropped(self) -> int:
+        """
+        messages dropped since the last call.
+        """
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+    def __enter__(self) -> Subscription:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class Broker:
+    """
+    in process fan-out of messages by topic to asyncio subscribers.
+    publish can be called from any thread (the postgres LISTEN thread),
+    messages are handed over to the loop of every subscriber.
+    """
+
+    def __init__(self, queue_size: int = 100) -> None:
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._topics: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, *topics: str) -> Subscription:
+        """
+        one queue for the messages of all the given topics.
+        must be called from a running event loop.
+        """
+        subscription = Subscription(self, topics, self.queue_size)
+        with self._lock:
+            for topic in topics:
+                self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[topic]
+
+    def publish(self, topic: str, message: Any) -> int:
+        """
+        returns the number of subscribers the message was handed to.
+        it never blocks on the subscribers, it is cheap enough to be
+        called on the ingest path.
+        """
+        with self._lock:
+            subscribers = self._topics.get(topic)
+            if not subscribers:
+                return 0
+            subscribers = list(subscribers)
+
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put_nowait, message)
+            except RuntimeError:
+                # loop already closed, the subscriber is gone
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+    @property
+    def active(self) -> bool:
+        """
+        whether anybody is subscribed to anything, lets publishers skip
+        building messages nobody reads.
+        """
+        return bool(self._topics)
+
+    def subscribers(self, topic: str) -> int:
+        with self._lock:
+            return len(self._topics.get(topic, ()))
@@ -1,14 +1,73 @@
 from __future__ import annotations
 
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Callable
 
 import jwt
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
 
 from app.core.config import settings
 
-password_hasher = PasswordHash.recommended()
+# the first hasher is the current one, hashes made by the others
+# (or by argon2 with different parameters) get rehashed on login
+password_hasher = PasswordHash(
+    (
+        Argon2Hasher(
+            time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+            memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+            parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+        ),
+        BcryptHasher(),
+    )
+)
+
+
+class PasswordHashingBusy(Exception):
+    """
+    raised when the password hashing pool is saturated.
+    """
+
+
+class BoundedExecutor:
+    """
+    thread pool that refuses work instead of queueing it forever.
+    at most max_workers jobs run and max_queue jobs wait, anything
+    beyond that raises PasswordHashingBusy right away.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def submit(self, fn: Callable, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+
+        def _run():
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+
+        try:
+            return self._executor.submit(_run)
+        except BaseException:
+            self._slots.release()
+            raise
+
+
+password_executor = BoundedExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    name="password-hash",
+)
 
 
 def hash_password(password: str) -> str:
@@ -29,6 +88,22 @@ def verify_password(password: str, hashed_password: str) -> bool:
     return password_hasher.verify(password, hashed_password)
 
 
+async def verify_and_update_password(
+    password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    verifying a password on the dedicated hashing pool.
+    takes a clear password check against the hashed version.
+    returns a tuple (valid, updated_hash), updated_hash is not None when
+    the stored hash was made with old parameters and must be replaced.
+    raises PasswordHashingBusy if the pool is saturated.
+    """
+    future = password_executor.submit(
+        password_hasher.verify_and_update, password, hashed_password
+    )
+    return await asyncio.wrap_future(future)
+
+
 def create_access_token(
     subject: str,
     expires_minutes: int | None = None,
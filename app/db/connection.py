@@ -1,16 +1,200 @@
-from sqlalchemy import create_engine
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from fastapi import Depends
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
+from app.core.metrics import current_request_stats
+
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.db.slow_queries")
+
+
+# listening on the Engine class covers every engine (primary, replica
+# and the ones built by the tests)
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started_at = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _account_query(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_query_started_at", None)
+    if started_at is None:
+        return
+    elapsed = time.perf_counter() - started_at
+
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+    if 0 < settings.DB_SLOW_QUERY_MS <= elapsed * 1000:
+        slow_query_logger.warning(
+            "slow query (%.1f ms) route=%s: %s",
+            elapsed * 1000,
+            stats.route_label() if stats is not None else "-",
+            " ".join(statement.split())[:2000],
+        )
 
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that keeps track of how long getting a connection takes
+    and how many checkouts timed out.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            checkouts = self._checkouts
+            return {
+                "pool_size": self.size(),
+                "checked_out": self.checkedout(),
+                "checked_in": self.checkedin(),
+                "overflow": max(self.overflow(), 0),
+                "max_overflow": self._max_overflow,
+                "checkouts": checkouts,
+                "checkout_timeouts": self._timeouts,
+                "wait_ms_total": self._wait_total * 1000,
+                "wait_ms_avg": (self._wait_total / checkouts * 1000) if checkouts else 0.0,
+                "wait_ms_max": self._wait_max * 1000,
+            }
+
+
+def create_db_engine(url: str, application_name: str | None = None) -> Engine:
+    """
+    creates an engine with the pool settings from the config.
+    every connection carries the application_name (visible in
+    pg_stat_activity) and, if configured, a statement_timeout.
+    """
+    connect_args = {"application_name": application_name or settings.DB_APPLICATION_NAME}
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+
+    return create_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        connect_args=connect_args,
     )
 
+
+def pool_stats(engine: Engine) -> dict:
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.stats()
+    return {"status": pool.status()}
+
+
+# 0 on a primary or on a replica that replayed everything it received,
+# otherwise the age of the last replayed transaction
+_REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(
+            extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """
+)
+
+
+class ReadReplica:
+    """
+    engine of the read replica plus a cached measure of its lag.
+    the lag is measured at most every DB_REPLICA_LAG_CHECK_SECONDS,
+    an unreachable replica counts as lagging forever.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.engine = create_db_engine(
+            url, application_name=f"{settings.DB_APPLICATION_NAME}-read"
+        )
+        self.sessionmaker = sessionmaker(
+            bind=self.engine, autoflush=False, autocommit=False
+        )
+        self._lock = threading.Lock()
+        self._lag: float | None = None
+        self._checked_at: float | None = None
+
+    def measure_lag(self) -> float | None:
+        try:
+            with self.engine.connect() as connection:
+                return float(connection.execute(_REPLICA_LAG_QUERY).scalar())
+        except Exception:
+            logger.warning("read replica lag check failed", exc_info=True)
+            return None
+
+    def lag_seconds(self) -> float | None:
+        now = time.monotonic()
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < settings.DB_REPLICA_LAG_CHECK_SECONDS
+        ):
+            return self._lag
+
+        # only one thread measures, the others use the last value
+        if self._lock.acquire(blocking=False):
+            try:
+                self._lag = self.measure_lag()
+                self._checked_at = time.monotonic()
+            finally:
+                self._lock.release()
+        return self._lag
+
+    def is_usable(self) -> bool:
+        lag = self.lag_seconds()
+        return lag is not None and lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+
+
+engine = create_db_engine(settings.DATABASE_URL)
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+read_replica = ReadReplica(settings.DATABASE_READ_URL) if settings.DATABASE_READ_URL else None
+
 def get_db() -> Session:
     db = SessionLocal()
     try:
@@ -18,3 +202,28 @@ def get_db() -> Session:
     finally:
         db.close()
 
+
+@contextmanager
+def read_session(primary: Session) -> Iterator[Session]:
+    """
+    session for read-only work.
+    it opens a replica session when a replica is configured and fresh
+    enough, otherwise it hands back the given primary session.
+    """
+    if read_replica is None or not read_replica.is_usable():
+        yield primary
+        return
+
+    db = read_replica.sessionmaker()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(db: Session = Depends(get_db)) -> Session:
+    """
+    dependency for GET routes, see read_session.
+    """
+    with read_session(db) as read_db:
+        yield read_db
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable
+
+import psycopg
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+
+logger = logging.getLogger(__name__)
+
+
+def notify(db: Session, channel: str, payload: str) -> None:
+    """
+    queues a postgres NOTIFY on the transaction of db, listeners get it
+    only when (and if) the transaction commits.
+    """
+    db.execute(select(func.pg_notify(channel, payload)))
+
+
+class PgListener:
+    """
+    thread holding one dedicated connection that LISTENs on a channel
+    and calls callback(payload) for every notification.
+    it reconnects on its own, notifications sent while it is
+    disconnected are lost.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        channel: str,
+        callback: Callable[[str], None],
+        reconnect_seconds: float = 1.0,
+    ) -> None:
+        # plain libpq conninfo, the listener doesn't go through sqlalchemy
+        self.conninfo = (
+            make_url(url)
+            .set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        self.channel = channel
+        self.callback = callback
+        self.reconnect_seconds = reconnect_seconds
+        self.ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _listen(self) -> None:
+        with psycopg.connect(self.conninfo, autocommit=True) as conn:
+            conn.execute(f'LISTEN "{self.channel}"')
+            self.ready.set()
+            while not self._stop.is_set():
+                # the timeout only bounds how long stop() waits
+                for notification in conn.notifies(timeout=1.0):
+                    try:
+                        self.callback(notification.payload)
+                    except Exception:
+                        logger.exception("notification callback failed")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("listener on %s disconnected", self.channel)
+            self.ready.clear()
+            self._stop.wait(self.reconnect_seconds)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name=f"pg-listen-{self.channel}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_listeners: dict[tuple[str, str], PgListener] = {}
+_listeners_lock = threading.Lock()
+
+
+def get_listener(url: str, channel: str, callback: Callable[[str], None]) -> PgListener:
+    """
+    the (started) listener of channel on the database at url, one per
+    process whatever the number of subscribers.
+    """
+    key = (url, channel)
+    with _listeners_lock:
+        listener = _listeners.get(key)
+        if listener is None:
+            listener = _listeners[key] = PgListener(url, channel, callback)
+            listener.start()
+        return listener
+
+
+def stop_listeners() -> None:
+    with _listeners_lock:
+        listeners = list(_listeners.values())
+        _listeners.clear()
+    for listener in listeners:
+        listener.stop()
@@ -1,15 +1,42 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from app.api.middleware import (
+    CompressionMiddleware,
+    LatencyMiddleware,
+    QueryAccountingMiddleware,
+)
 from app.db.connection import get_db
+from app.db.notifications import stop_listeners
 from app.api.routes.components import router as components_router
 from app.api.routes.measurements import router as measurements_router
 from app.api.routes.auth import router as auth_router
 from app.api.routes.reports import router as reports_router
+from app.api.routes.api_keys import router as api_keys_router
+from app.api.routes.substations import router as substations_router
+from app.api.routes.metrics import router as metrics_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # LISTEN threads are started on the first subscriber
+    stop_listeners()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+# innermost, the compression cost is in the request latency
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(QueryAccountingMiddleware)
+# added last so it is the outermost one and times everything
+app.add_middleware(LatencyMiddleware)
 app.include_router(components_router)
 app.include_router(measurements_router)
 app.include_router(auth_router)
 app.include_router(reports_router)
+app.include_router(api_keys_router)
+app.include_router(substations_router)
+app.include_router(metrics_router)
 
 
 @app.get("/hello")
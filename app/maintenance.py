@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.db.connection import SessionLocal
+from app.services.quantiles import ensure_sketches, rebuild_dirty_sketches
+from app.services.retention import apply_retention
+
+
+logger = logging.getLogger("maintenance")
+
+
+def run_once(db) -> int:
+    # sketches first: once rolled up, the samples of a day can't be
+    # sketched anymore. the recent days are enough as long as the
+    # maintenance runs, older ones get sketched by the reports using them
+    now = datetime.now(timezone.utc)
+    # sketches outdated by late samples or deleted components, whatever
+    # their age, before the retention rolls their samples up
+    rebuilt = rebuild_dirty_sketches(
+        db, max_seconds=settings.MAINTENANCE_INTERVAL_SECONDS / 4
+    )
+    if rebuilt:
+        logger.info("rebuilt the quantile sketches of %d dirty days", rebuilt)
+
+    sketched = ensure_sketches(
+        db,
+        now - timedelta(days=settings.QUANTILE_SKETCH_LOOKBACK_DAYS),
+        now,
+        max_seconds=settings.MAINTENANCE_INTERVAL_SECONDS / 4,
+    )
+    if sketched:
+        logger.info("stored the quantile sketches of %d days", sketched)
+
+    rolled_up = apply_retention(
+        db,
+        retention_days=settings.MEASUREMENT_RETENTION_DAYS,
+        batch_size=settings.MEASUREMENT_RETENTION_BATCH_SIZE,
+        # leave room for the next tick instead of running forever on a
+        # big backlog, the remaining rows are picked up next time
+        max_seconds=settings.MAINTENANCE_INTERVAL_SECONDS / 2,
+    )
+    if rolled_up:
+        logger.info("rolled up %d raw measurements", rolled_up)
+    return rolled_up
+
+
+def main() -> None:
+    """
+    periodic maintenance: stores the quantile sketches of the days that
+    ended and rebuilds the outdated ones, rolls up (and deletes) raw
+    measurements older than MEASUREMENT_RETENTION_DAYS.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--once", action="store_true", help="run a single pass")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if settings.MEASUREMENT_RETENTION_DAYS <= 0:
+        logger.info("MEASUREMENT_RETENTION_DAYS is 0, raw measurements are kept")
+
+    while True:
+        with SessionLocal() as db:
+            run_once(db)
+        if args.once:
+            return
+        time.sleep(settings.MAINTENANCE_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,12 @@
 from app.models.components import Component, Transformer, Line, Switch
-from app.models.measurements import Measurement
+from app.models.measurements import (
+    Measurement,
+    MeasurementLatest,
+    MeasurementRollup,
+    MeasurementSketch,
+    MeasurementSketchDay,
+)
 from app.models.users import User
 from app.models.reports import Report
+from app.models.api_keys import ApiKey
+from app.models.substations import SubstationSummary
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import enum
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, String, func
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ApiKeyScope(str, enum.Enum):
+    measurements_ingest = "measurements:ingest"
+
+
+class ApiKey(Base):
+    """
+    long-lived key for machine clients (field gateways ecc...).
+    only the HMAC of the key is stored, the key itself is shown once.
+    """
+
+    __tablename__ = "api_keys"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+
+    name: Mapped[str] = mapped_column(String(150), nullable=False)
+
+    # first chars of the key, useful to recognize it without storing it
+    key_prefix: Mapped[str] = mapped_column(String(16), nullable=False)
+
+    key_hash: Mapped[str] = mapped_column(
+        String(64), nullable=False, unique=True, index=True
+    )
+
+    scopes: Mapped[list[str]] = mapped_column(ARRAY(String(50)), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+
+    revoked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
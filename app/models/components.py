@@ -3,7 +3,18 @@ import uuid
 import enum
 
 from typing import List
-from sqlalchemy import String, Integer, ForeignKey, Float, Enum, Index, DateTime, func
+from sqlalchemy import (
+    DDL,
+    String,
+    Integer,
+    ForeignKey,
+    Float,
+    Enum,
+    Index,
+    DateTime,
+    event,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -50,6 +61,13 @@ class Component(Base):
 
     __table_args__ = (
         Index("ix_components_type_substation", "component_type", "substation"),
+        # trigram index for prefix/substring name search
+        Index(
+            "ix_components_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
     )
 
     __mapper_args__ = {
@@ -58,6 +76,15 @@ class Component(Base):
     }
 
 
+# the trigram index needs the extension when the tables are created
+# with metadata.create_all (tests), migrations create it on their own
+event.listen(
+    Component.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
+
+
 class Transformer(Component):
     __tablename__ = "transformers"
 
@@ -3,11 +3,25 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Index
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    false,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.db.base import Base
+from app.models.components import ComponentType
 
 
 class Measurement(Base):
@@ -24,9 +38,7 @@ class Measurement(Base):
         index=True,
     )
 
-    timestamp: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, index=True
-    )
+    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
     value: Mapped[float] = mapped_column(Float, nullable=False)
 
@@ -39,10 +51,128 @@ class Measurement(Base):
     )
 
     __table_args__ = (
+        # the natural key of a sample: ingestion is INSERT ... ON CONFLICT
+        # on it, so a retried request doesn't store the samples twice
         Index(
-            "ix_measurements_component_type_time",
+            "uq_measurements_component_type_time",
             "component_id",
             "measurement_type",
             "timestamp",
+            unique=True,
+        ),
+        # measurements arrive roughly in time order, so a brin index
+        # (min/max per block range) serves the report time ranges at a
+        # tiny fraction of the size of a b-tree.
+        # autosummarize keeps the freshly written ranges indexed without
+        # waiting for a vacuum
+        Index(
+            "ix_measurements_timestamp_brin",
+            "timestamp",
+            postgresql_using="brin",
+            postgresql_with={"autosummarize": "on"},
         ),
     )
+
+
+class MeasurementRollup(Base):
+    """
+    hourly aggregates of the raw measurements older than the retention
+    window (see app.maintenance), the raw rows are deleted once rolled up.
+    sum and count are kept instead of the avg so rollups of the same hour
+    can be merged and averaged again over any period.
+    """
+
+    __tablename__ = "measurement_rollups"
+
+    component_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("components.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    measurement_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    bucket: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True
+    )
+
+    value_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    value_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    value_min: Mapped[float] = mapped_column(Float, nullable=False)
+    value_max: Mapped[float] = mapped_column(Float, nullable=False)
+
+    __table_args__ = (Index("ix_measurement_rollups_bucket", "bucket"),)
+
+
+class MeasurementLatest(Base):
+    """
+    the newest sample of every (component, measurement type), kept up
+    to date on ingest so current readings are a primary key lookup
+    instead of a max(timestamp) search over the measurements.
+    it survives the retention, the raw row it comes from may be gone.
+    """
+
+    __tablename__ = "measurement_latest"
+
+    component_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("components.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    measurement_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    value: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # bulk reads filtered on the type only, without a substation
+    __table_args__ = (Index("ix_measurement_latest_type", "measurement_type"),)
+
+
+class MeasurementSketch(Base):
+    """
+    DDSketch of the samples of a closed day, per measurement type and
+    component type (see app.services.quantiles): one row per bucket with
+    its count. sketches of the same buckets merge by adding the counts,
+    so multi day quantiles never go back to the raw samples.
+    sign is -1, 0 (values too close to zero to be indexed) or 1, bucket is
+    the log index of the absolute value.
+    """
+
+    __tablename__ = "measurement_sketches"
+
+    day: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+
+    measurement_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    component_type: Mapped[ComponentType] = mapped_column(
+        Enum(ComponentType, name="component_type"), primary_key=True
+    )
+
+    sign: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class MeasurementSketchDay(Base):
+    """
+    the days whose sketches are stored, a day without samples has no
+    rows in measurement_sketches but still doesn't need to be rescanned.
+    dirty: samples of the day were written or deleted after its sketch
+    was built, the sketch gets rebuilt.
+    """
+
+    __tablename__ = "measurement_sketch_days"
+
+    day: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+
+    built_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    dirty: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, server_default=false()
+    )
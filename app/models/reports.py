@@ -58,9 +58,14 @@ class Report(Base):
 
     error_message: Mapped[str | None] = mapped_column(Text)
 
+    # optional lists of substations, component_types, component_ids and
+    # measurement_types the report is restricted to
+    filters_json: Mapped[dict | None] = mapped_column(JSONB)
+
     components_by_type_json: Mapped[list[dict] | None] = mapped_column(JSONB)
     transformer_capacity_by_voltage_json: Mapped[list[dict] | None] = mapped_column(
         JSONB
     )
     line_length_by_voltage_json: Mapped[list[dict] | None] = mapped_column(JSONB)
     daily_measurement_averages_json: Mapped[list[dict] | None] = mapped_column(JSONB)
+    measurement_quantiles_json: Mapped[dict | None] = mapped_column(JSONB)
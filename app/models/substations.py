@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from sqlalchemy import Float, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class SubstationSummary(Base):
+    """
+    per substation aggregates of the components table.
+    kept up to date by the component services, so reading it never
+    needs a scan of the components.
+    """
+
+    __tablename__ = "substation_summaries"
+
+    substation: Mapped[str] = mapped_column(String(200), primary_key=True)
+
+    transformer_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    line_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    switch_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    total_capacity_mva: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0
+    )
+    total_length_km: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
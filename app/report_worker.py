@@ -4,14 +4,26 @@ import logging
 import time
 from datetime import datetime, timezone
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, union_all
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.connection import SessionLocal
+from app.db.connection import SessionLocal, read_session
 from app.models.components import Component, Transformer, Line
-from app.models.measurements import Measurement
+from app.models.measurements import Measurement, MeasurementRollup
 from app.models.reports import Report, ReportStatus
+from app.services.quantiles import (
+    compute_quantiles,
+    ensure_sketches,
+    sketches_usable,
+)
+from app.services.report_filters import (
+    component_conditions,
+    measurement_conditions,
+    normalize_filters,
+)
+from app.services.report_events import notify_report_status
+from app.services.report_numpy import daily_averages_numpy
 
 
 logger = logging.getLogger("report-worker")
@@ -36,19 +48,118 @@ def claim_one_report(db: Session) -> Report | None:
     report.status = ReportStatus.RUNNING
     report.job_started_at = _utcnow()
     report.error_message = None
+    notify_report_status(db, report)
     db.commit()
 
     return report
 
 
+def daily_averages_query(
+    from_date: datetime, to_date: datetime, filters: dict | None = None
+):
+    """
+    (day, measurement_type, component_type, avg) of the measurements in
+    [from_date, to_date).
+    raw rows and the hourly rollups of the rows past the retention
+    window are merged through their sums and counts, a period can span
+    both. rollups are taken whole: an hour starting inside the period
+    counts entirely.
+    the timestamp range on the raw rows is served by the brin index, or
+    with component filters by the (component_id, measurement_type,
+    timestamp) index. filters are normalized ones (normalize_filters).
+    """
+    filters = filters or {}
+
+    raw_day = func.date_trunc("day", Measurement.timestamp)
+    raw = (
+        select(
+            raw_day.label("day"),
+            Measurement.measurement_type,
+            Measurement.component_id,
+            func.sum(Measurement.value).label("value_sum"),
+            func.count(Measurement.value).label("value_count"),
+        )
+        .where(Measurement.timestamp >= from_date)
+        .where(Measurement.timestamp < to_date)
+        .where(
+            *measurement_conditions(
+                filters, Measurement.component_id, Measurement.measurement_type
+            )
+        )
+        .group_by(raw_day, Measurement.measurement_type, Measurement.component_id)
+    )
+
+    rollup_day = func.date_trunc("day", MeasurementRollup.bucket)
+    rollups = (
+        select(
+            rollup_day.label("day"),
+            MeasurementRollup.measurement_type,
+            MeasurementRollup.component_id,
+            func.sum(MeasurementRollup.value_sum).label("value_sum"),
+            func.sum(MeasurementRollup.value_count).label("value_count"),
+        )
+        .where(MeasurementRollup.bucket >= from_date)
+        .where(MeasurementRollup.bucket < to_date)
+        .where(
+            *measurement_conditions(
+                filters,
+                MeasurementRollup.component_id,
+                MeasurementRollup.measurement_type,
+            )
+        )
+        .group_by(
+            rollup_day,
+            MeasurementRollup.measurement_type,
+            MeasurementRollup.component_id,
+        )
+    )
+
+    merged = union_all(raw, rollups).subquery("merged")
+
+    return (
+        select(
+            merged.c.day,
+            merged.c.measurement_type,
+            Component.component_type,
+            func.sum(merged.c.value_sum)
+            / func.nullif(func.sum(merged.c.value_count), 0),
+        )
+        .join(Component, Component.id == merged.c.component_id)
+        .group_by(merged.c.day, merged.c.measurement_type, Component.component_type)
+        # fully ordered, like the numpy backend: types by code point, the
+        # component types in their enum order
+        .order_by(
+            merged.c.day.asc(),
+            merged.c.measurement_type.collate("C"),
+            Component.component_type,
+        )
+    )
+
+
+def daily_averages(
+    db: Session, from_date: datetime, to_date: datetime, filters: dict
+) -> list[tuple]:
+    """
+    (day as a date, measurement_type, component_type, avg) rows, grouped
+    by the database or by the worker in numpy (REPORT_BACKEND).
+    """
+    if settings.REPORT_BACKEND == "numpy":
+        return daily_averages_numpy(db, from_date, to_date, filters)
+
+    rows = db.execute(daily_averages_query(from_date, to_date, filters)).all()
+    return [(day.date(), *rest) for day, *rest in rows]
+
+
 def compute_report(db: Session, report: Report):
+    # optional filters, pushed into every query below
+    filters = normalize_filters(report.filters_json)
 
     # components by type
     components_by_type = []
     res = db.execute(
-        select(Component.component_type, func.count(Component.id)).group_by(
-            Component.component_type
-        )
+        select(Component.component_type, func.count(Component.id))
+        .where(*component_conditions(filters))
+        .group_by(Component.component_type)
     ).all()
 
     for component_type, count in res:
@@ -62,7 +173,9 @@ def compute_report(db: Session, report: Report):
         select(
             Transformer.voltage_kv,
             func.coalesce(func.sum(Transformer.capacity_mva), 0.0),
-        ).group_by(Transformer.voltage_kv)
+        )
+        .where(*component_conditions(filters, Transformer))
+        .group_by(Transformer.voltage_kv)
     ).all()
 
     for voltage, capacity in res:
@@ -76,7 +189,9 @@ def compute_report(db: Session, report: Report):
         select(
             Line.voltage_kv,
             func.coalesce(func.sum(Line.length_km), 0.0),
-        ).group_by(Line.voltage_kv)
+        )
+        .where(*component_conditions(filters, Line))
+        .group_by(Line.voltage_kv)
     ).all()
 
     for voltage, length in res:
@@ -86,57 +201,59 @@ def compute_report(db: Session, report: Report):
 
     # daily measurement averages
     daily_measurement_averages = []
-
-    day_bucket = func.date_trunc("day", Measurement.timestamp).label("day")
-
-    res = db.execute(
-        select(
-            day_bucket,
-            Measurement.measurement_type,
-            Component.component_type,
-            func.avg(Measurement.value),
-        )
-        .join(Component, Component.id == Measurement.component_id)
-        .where(Measurement.timestamp >= report.from_date)
-        .where(Measurement.timestamp < report.to_date)
-        .group_by(day_bucket, Measurement.measurement_type, Component.component_type)
-        .order_by(day_bucket.asc())
-    ).all()
+    res = daily_averages(db, report.from_date, report.to_date, filters)
 
     for day, measurement_type, component_type, avg_value in res:
         daily_measurement_averages.append(
             {
-                "day": day.date().isoformat(),
+                "day": day.isoformat(),
                 "measurement_type": measurement_type,
                 "component_type": component_type,
                 "avg_value": float(avg_value) if avg_value else None,
             }
         )
 
+    # p50/p95/p99 per day and over the period, from the day sketches
+    measurement_quantiles = compute_quantiles(
+        db, report.from_date, report.to_date, filters=filters
+    )
+
     return (
         components_by_type,
         transformer_capacity_by_voltage,
         line_length_by_voltage,
         daily_measurement_averages,
+        measurement_quantiles,
     )
 
 
 def process_report(db: Session, report: Report) -> None:
     try:
-        (
-            components_by_type,
-            transformer_capacity_by_voltage,
-            line_length_by_voltage,
-            daily_measurement_averages,
-        ) = compute_report(db, report)
+        # the sketches of the closed days in the period are stored once,
+        # this and the next reports over those days merge them
+        if sketches_usable(normalize_filters(report.filters_json)):
+            ensure_sketches(db, report.from_date, report.to_date)
+
+        # aggregations can run on the read replica, the report row
+        # itself is always updated on the primary
+        with read_session(db) as read_db:
+            (
+                components_by_type,
+                transformer_capacity_by_voltage,
+                line_length_by_voltage,
+                daily_measurement_averages,
+                measurement_quantiles,
+            ) = compute_report(read_db, report)
 
         report.components_by_type_json = components_by_type
         report.transformer_capacity_by_voltage_json = transformer_capacity_by_voltage
         report.line_length_by_voltage_json = line_length_by_voltage
         report.daily_measurement_averages_json = daily_measurement_averages
+        report.measurement_quantiles_json = measurement_quantiles
 
         report.status = ReportStatus.DONE
         report.job_finished_at = _utcnow()
+        notify_report_status(db, report)
         db.commit()
 
     except Exception as exc:
@@ -152,6 +269,7 @@ def process_report(db: Session, report: Report) -> None:
         else:
             report.status = ReportStatus.PENDING
 
+        notify_report_status(db, report)
         db.commit()
 
 
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.models.api_keys import ApiKeyScope
+
+
+class ApiKeyCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=150)
+    scopes: list[ApiKeyScope] = Field(min_length=1)
+
+
+class ApiKeyRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    name: str
+    key_prefix: str
+    scopes: list[str]
+    created_at: datetime
+    revoked_at: datetime | None = None
+
+
+class ApiKeyCreated(ApiKeyRead):
+    # the clear key, returned only once at creation time
+    key: str
@@ -58,3 +58,7 @@ ComponentRead = Annotated[
     Union[TransformerRead, LineRead, SwitchRead],
     Field(discriminator="component_type"),
 ]
+
+
+class ComponentImportResult(BaseModel):
+    created: int
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Annotated
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from app.core.config import settings
+
 
 class MeasurementCreate(BaseModel):
     component_id: UUID
@@ -13,6 +16,23 @@ class MeasurementCreate(BaseModel):
     measurement_type: str = Field(min_length=1, max_length=50)
 
 
+# body of POST /measurements/batch
+MeasurementBatch = Annotated[
+    list[MeasurementCreate],
+    Field(min_length=1, max_length=settings.MEASUREMENT_BATCH_MAX_ROWS),
+]
+
+
+class MeasurementBatchResult(BaseModel):
+    """
+    written + duplicates = received, duplicates were already stored.
+    """
+
+    received: int
+    written: int
+    duplicates: int
+
+
 class MeasurementRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -21,3 +41,24 @@ class MeasurementRead(BaseModel):
     timestamp: datetime
     value: float
     measurement_type: str
+
+
+class LiveSubscription(BaseModel):
+    """
+    message a websocket client sends to (re)define what it receives,
+    no measurement_types means all of them.
+    """
+
+    component_ids: list[UUID] = Field(
+        min_length=1, max_length=settings.LIVE_MEASUREMENTS_MAX_COMPONENTS
+    )
+    measurement_types: list[str] | None = None
+
+
+class MeasurementLatestRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    component_id: UUID
+    measurement_type: str
+    timestamp: datetime
+    value: float
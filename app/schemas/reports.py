@@ -3,12 +3,36 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.models.components import ComponentType
+
+_MAX_FILTER_VALUES = 1_000
+
+
+class ReportFilters(BaseModel):
+    """
+    every filter is optional, the report covers what matches all of them.
+    """
+
+    substations: list[str] | None = Field(
+        default=None, min_length=1, max_length=_MAX_FILTER_VALUES
+    )
+    component_types: list[ComponentType] | None = Field(
+        default=None, min_length=1, max_length=_MAX_FILTER_VALUES
+    )
+    component_ids: list[UUID] | None = Field(
+        default=None, min_length=1, max_length=_MAX_FILTER_VALUES
+    )
+    measurement_types: list[str] | None = Field(
+        default=None, min_length=1, max_length=_MAX_FILTER_VALUES
+    )
 
 
 class ReportCreate(BaseModel):
     from_date: datetime
     to_date: datetime
+    filters: ReportFilters | None = None
 
 
 class ReportRead(BaseModel):
@@ -28,8 +52,11 @@ class ReportRead(BaseModel):
 
     error_message: str | None = None
 
+    filters_json: dict | None = None
+
     components_by_type_json: list[dict] | None = None
     transformer_capacity_by_voltage_json: list[dict] | None = None
     line_length_by_voltage_json: list[dict] | None = None
     daily_measurement_averages_json: list[dict] | None = None
+    measurement_quantiles_json: dict | None = None
 
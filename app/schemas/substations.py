@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SubstationSummaryRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    substation: str
+    transformer_count: int
+    line_count: int
+    switch_count: int
+    total_capacity_mva: float
+    total_length_km: float
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import timedelta
+from typing import Callable, Iterator
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+import app.models
+
+from app.benchmarks.grid import GridSpec, generate_components, series_signals
+from app.models.components import (
+    Component,
+    ComponentType,
+    Line,
+    Switch,
+    Transformer,
+)
+from app.models.measurements import Measurement
+from app.services.measurements import rebuild_latest_values
+from app.services.substations import rebuild_substation_summaries
+
+# version 4 / variant 1 bits of a uuid, set on 128 random bits they give a
+# valid uuid4 without going through uuid.UUID for every row
+_UUID4_CLEAR = ~((0xF << 76) | (0x3 << 62)) & ((1 << 128) - 1)
+_UUID4_SET = (0x4 << 76) | (0x2 << 62)
+
+_SUBCLASS_TABLES = {
+    ComponentType.transformer: Transformer.__table__,
+    ComponentType.line: Line.__table__,
+    ComponentType.switch: Switch.__table__,
+}
+
+_MEASUREMENT_COLUMNS = (
+    "id",
+    "component_id",
+    "timestamp",
+    "value",
+    "measurement_type",
+)
+
+
+def _copy_sql(table, columns) -> str:
+    return f"COPY {table.name} ({', '.join(columns)}) FROM STDIN"
+
+
+def _copy_rows(connection: Connection, table, columns, rows: list[tuple]) -> None:
+    cursor = connection.connection.driver_connection.cursor()
+    with cursor.copy(_copy_sql(table, columns)) as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def copy_components(connection: Connection, payloads: list[dict]) -> list[uuid.UUID]:
+    """
+    loads flat component payloads (ComponentCreate.model_dump() format)
+    with one COPY into components and one into every subclass table.
+    returns the ids of the created components, in the payloads order.
+    it does not update the substation summaries.
+    """
+    ids = [uuid.uuid4() for _ in payloads]
+
+    base_columns = ("id", "name", "substation", "component_type")
+    _copy_rows(
+        connection,
+        Component.__table__,
+        base_columns,
+        [
+            (
+                component_id,
+                payload["name"],
+                payload["substation"],
+                payload["component_type"],
+            )
+            for component_id, payload in zip(ids, payloads)
+        ],
+    )
+
+    for component_type, table in _SUBCLASS_TABLES.items():
+        columns = [column.name for column in table.columns]
+        rows = [
+            tuple(
+                component_id if column == "id" else payload[column]
+                for column in columns
+            )
+            for component_id, payload in zip(ids, payloads)
+            if ComponentType(payload["component_type"]) == component_type
+        ]
+        if rows:
+            _copy_rows(connection, table, columns, rows)
+
+    return ids
+
+
+def iter_measurement_chunks(
+    spec: GridSpec, component_ids: list[uuid.UUID], rows_per_chunk: int = 100_000
+) -> Iterator[tuple[bytes, int]]:
+    """
+    yields (COPY text data, rows) chunks with every measurement of the
+    grid, the same signals of generate_measurements.
+    rows are written straight as COPY text lines, one whole timestamp
+    (every series) at a time: no dict, datetime or UUID object per row.
+    """
+    rng = random.Random(spec.seed + 1)
+    signals = series_signals(spec, len(component_ids), rng)
+    # everything that doesn't change between samples is formatted once
+    series = [
+        (
+            f"\t{component_id}\t",
+            f"\t{measurement_type}\n",
+            base,
+            swing,
+            phase,
+            swing * 0.05,
+        )
+        for component_id, (measurement_type, base, swing, phase) in zip(
+            (
+                component_id
+                for component_id in component_ids
+                for _ in spec.measurement_types
+            ),
+            signals,
+        )
+    ]
+    # ids come from their own unseeded generator: the values are the same
+    # for the same spec, but seeding twice must not produce the same ids
+    getrandbits = random.Random().getrandbits
+    gauss = rng.gauss
+    sin = math.sin
+
+    lines: list[str] = []
+    for sample in range(spec.samples_per_series):
+        offset = sample * spec.sample_interval_seconds
+        timestamp = (spec.start + timedelta(seconds=offset)).isoformat()
+        angle = 2 * math.pi * offset / 86_400
+
+        lines.extend(
+            [
+                f"{getrandbits(128) & _UUID4_CLEAR | _UUID4_SET:032x}"
+                f"{head}{timestamp}\t"
+                f"{base + swing * sin(angle + phase) + gauss(0, noise):.3f}"
+                f"{tail}"
+                for head, tail, base, swing, phase, noise in series
+            ]
+        )
+
+        if len(lines) >= rows_per_chunk:
+            yield "".join(lines).encode(), len(lines)
+            lines = []
+
+    if lines:
+        yield "".join(lines).encode(), len(lines)
+
+
+def copy_measurements(
+    connection: Connection,
+    spec: GridSpec,
+    component_ids: list[uuid.UUID],
+    rows_per_chunk: int = 100_000,
+    on_chunk: Callable[[int, float], None] | None = None,
+) -> int:
+    """
+    loads every measurement of the grid with a single COPY.
+    on_chunk(rows, seconds) is called after each chunk is sent.
+    returns the number of rows.
+    """
+    table = Measurement.__table__
+    cursor = connection.connection.driver_connection.cursor()
+
+    total = 0
+    with cursor.copy(_copy_sql(table, _MEASUREMENT_COLUMNS)) as copy:
+        for data, rows in iter_measurement_chunks(spec, component_ids, rows_per_chunk):
+            started = time.perf_counter()
+            copy.write(data)
+            total += rows
+            if on_chunk is not None:
+                on_chunk(rows, time.perf_counter() - started)
+    return total
+
+
+def seed_grid(db: Session, spec: GridSpec, rows_per_chunk: int = 100_000) -> dict:
+    """
+    creates the components and measurements of spec in one transaction,
+    then refreshes the substation summaries and the planner statistics.
+    returns rows and seconds of every step.
+    """
+    connection = db.connection()
+
+    started = time.perf_counter()
+    component_ids = copy_components(connection, generate_components(spec))
+    components_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    measurements = copy_measurements(connection, spec, component_ids, rows_per_chunk)
+    db.commit()
+    measurements_seconds = time.perf_counter() - started
+
+    rebuild_substation_summaries(db)
+    rebuild_latest_values(db)
+    db.connection().exec_driver_sql("ANALYZE components, measurements")
+    db.commit()
+
+    return {
+        "components": len(component_ids),
+        "components_seconds": components_seconds,
+        "measurements": measurements,
+        "measurements_seconds": measurements_seconds,
+    }
+
+
+def main() -> None:
+    """
+    seeds a synthetic grid (see app.benchmarks.grid) with COPY.
+    it only adds rows, nothing is deleted.
+    example (100 components, 10M measurements):
+      python -m app.scripts.seed_data --components 100 --rows 10000000
+    """
+    parser = argparse.ArgumentParser(
+        description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--components", type=int, default=1_000)
+    parser.add_argument("--measurement-types", default="Voltage,Current,Power")
+    parser.add_argument("--sample-interval", type=float, default=60.0)
+    parser.add_argument("--duration", type=float, default=86_400.0)
+    parser.add_argument("--rows", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rows-per-chunk", type=int, default=100_000)
+    args = parser.parse_args()
+
+    spec_kwargs = {
+        "components": args.components,
+        "measurement_types": tuple(args.measurement_types.split(",")),
+        "sample_interval_seconds": args.sample_interval,
+        "duration_seconds": args.duration,
+        "seed": args.seed,
+    }
+    if args.rows:
+        spec = GridSpec.for_measurements(args.rows, **spec_kwargs)
+    else:
+        spec = GridSpec(**spec_kwargs)
+
+    engine = create_engine(args.database_url, pool_pre_ping=True)
+    with Session(engine) as db:
+        result = seed_grid(db, spec, args.rows_per_chunk)
+
+    rate = result["measurements"] / result["measurements_seconds"] * 60
+    print(
+        f"{result['components']} components, {result['measurements']} measurements "
+        f"in {result['measurements_seconds']:.1f}s ({rate:,.0f} rows/min)"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        raise
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.api_keys import ApiKey, ApiKeyScope
+
+API_KEY_PREFIX = "pgk_"
+
+# on an unknown key the registry reloads from the db at most this often,
+# so keys created by another replica show up quickly but a flood of bad
+# keys can't turn into a flood of queries
+_MISS_RELOAD_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class ApiKeySnapshot:
+    id: uuid.UUID
+    name: str
+    scopes: frozenset[str]
+
+    @classmethod
+    def from_api_key(cls, api_key: ApiKey) -> ApiKeySnapshot:
+        return cls(id=api_key.id, name=api_key.name, scopes=frozenset(api_key.scopes))
+
+
+def hash_api_key(raw_key: str) -> str:
+    """
+    keyed hash of an api key.
+    receives the clear key.
+    returns the hex HMAC-SHA256.
+    """
+    secret = settings.API_KEY_HMAC_SECRET or settings.JWT_SECRET_KEY
+    return hmac.new(
+        secret.encode(), raw_key.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def generate_api_key() -> str:
+    return API_KEY_PREFIX + secrets.token_urlsafe(32)
+
+
+class ApiKeyRegistry:
+    """
+    in-memory copy of the active api keys, keyed by their hash.
+    a lookup is a dict access, the db is only read when the copy is
+    older than API_KEY_CACHE_TTL_SECONDS (or on a miss, rate limited).
+    revocations done in this process are applied right away, the ones
+    done by other replicas are bounded by the ttl.
+    """
+
+    def __init__(self) -> None:
+        self._keys: dict[str, ApiKeySnapshot] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def reload(self, db: Session) -> None:
+        rows = db.execute(
+            select(ApiKey).where(ApiKey.revoked_at.is_(None))
+        ).scalars()
+        keys = {row.key_hash: ApiKeySnapshot.from_api_key(row) for row in rows}
+        with self._lock:
+            self._keys = keys
+            self._loaded_at = time.monotonic()
+
+    def _age(self) -> float:
+        if self._loaded_at is None:
+            return float("inf")
+        return time.monotonic() - self._loaded_at
+
+    def lookup(self, db: Session, raw_key: str) -> ApiKeySnapshot | None:
+        """
+        returns the snapshot of an active key or None.
+        """
+        if not raw_key.startswith(API_KEY_PREFIX):
+            return None
+
+        key_hash = hash_api_key(raw_key)
+
+        if self._age() > settings.API_KEY_CACHE_TTL_SECONDS:
+            self.reload(db)
+
+        snapshot = self._keys.get(key_hash)
+        if snapshot is None and self._age() > _MISS_RELOAD_SECONDS:
+            self.reload(db)
+            snapshot = self._keys.get(key_hash)
+
+        return snapshot
+
+    def add(self, key_hash: str, snapshot: ApiKeySnapshot) -> None:
+        with self._lock:
+            self._keys[key_hash] = snapshot
+
+    def discard(self, key_hash: str) -> None:
+        with self._lock:
+            self._keys.pop(key_hash, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys = {}
+            self._loaded_at = None
+
+
+api_key_registry = ApiKeyRegistry()
+
+
+def create_api_key(
+    db: Session, name: str, scopes: list[ApiKeyScope]
+) -> tuple[ApiKey, str]:
+    """
+    creates a new api key.
+    returns the stored ApiKey and the clear key (it can't be recovered later).
+    """
+    raw_key = generate_api_key()
+    api_key = ApiKey(
+        name=name,
+        key_prefix=raw_key[: len(API_KEY_PREFIX) + 6],
+        key_hash=hash_api_key(raw_key),
+        scopes=[ApiKeyScope(scope).value for scope in scopes],
+    )
+    db.add(api_key)
+    db.commit()
+    db.refresh(api_key)
+
+    api_key_registry.add(api_key.key_hash, ApiKeySnapshot.from_api_key(api_key))
+    return api_key, raw_key
+
+
+def list_api_keys(db: Session, limit: int = 50, offset: int = 0) -> list[ApiKey]:
+    query = (
+        select(ApiKey).order_by(ApiKey.created_at.desc()).offset(offset).limit(limit)
+    )
+    return db.execute(query).scalars().all()
+
+
+def revoke_api_key(db: Session, api_key_id: uuid.UUID) -> ApiKey:
+    api_key = db.get(ApiKey, api_key_id)
+    if not api_key:
+        raise LookupError("not_found")
+
+    if api_key.revoked_at is None:
+        api_key.revoked_at = datetime.now(timezone.utc)
+        db.commit()
+        db.refresh(api_key)
+
+    api_key_registry.discard(api_key.key_hash)
+    return api_key
@@ -1,11 +1,58 @@
 from __future__ import annotations
-from typing import Optional
+import csv
+import io
+import uuid
+from typing import Iterator, Optional
 from uuid import UUID
 
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.orm import Session, load_only, with_polymorphic
+from sqlalchemy import func, insert, select
 
 from app.models.components import Component, Transformer, Line, Switch, ComponentType
+from app.services.quantiles import mark_component_days_dirty
+from app.services.substations import apply_substation_deltas, component_contribution
+
+
+_BASE_FIELDS = ("id", "name", "substation", "component_type")
+
+# type specific fields and the subclass holding them
+_SUBCLASS_FIELDS = {
+    Transformer: ("capacity_mva", "voltage_kv"),
+    Line: ("length_km", "voltage_kv"),
+    Switch: ("status",),
+}
+
+COMPONENT_FIELDS = (*_BASE_FIELDS, "capacity_mva", "voltage_kv", "length_km", "status")
+
+
+def _components_select(fields: list[str] | None = None):
+    """
+    entity and select of the components with only the given fields
+    loaded, everything when None. subclass tables are joined only when
+    a type specific field is wanted, reading any other column raises
+    instead of lazy loading it.
+    """
+    if fields is None:
+        entity = with_polymorphic(Component, "*")
+        return entity, select(entity)
+
+    wanted = set(fields)
+    subclasses = [
+        cls for cls, names in _SUBCLASS_FIELDS.items() if wanted.intersection(names)
+    ]
+    # all of them: a row of a subclass left out of the join would be
+    # loaded with a second query
+    entity = with_polymorphic(Component, "*") if subclasses else Component
+
+    columns = [getattr(entity, name) for name in _BASE_FIELDS if name in wanted]
+    for cls in subclasses:
+        sub_entity = getattr(entity, cls.__name__)
+        columns += [
+            getattr(sub_entity, name)
+            for name in _SUBCLASS_FIELDS[cls]
+            if name in wanted
+        ]
+    return entity, select(entity).options(load_only(*columns, raiseload=True))
 
 
 def list_components(
@@ -14,13 +61,49 @@ def list_components(
     substation: OPtional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    fields: list[str] | None = None,
 ):
-    query = select(Component).offset(offset).limit(limit)
+    components, query = _components_select(fields)
+    query = query.offset(offset).limit(limit)
 
     if component_type:
-        query = query.where(Component.component_type == ComponentType(component_type))
+        query = query.where(
+            components.component_type == ComponentType(component_type)
+        )
     if substation:
-        query = query.where(Component.substation == substation)
+        query = query.where(components.substation == substation)
+
+    return db.execute(query).scalars().all()
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_components(
+    db: Session, q: str, limit: int = 20, fields: list[str] | None = None
+):
+    """
+    searches components by partial name (case insensitive).
+    prefix matches come first, then the rest ordered by trigram similarity.
+    the ILIKE filter is served by the ix_components_name_trgm gin index.
+    """
+    escaped = _escape_like(q)
+
+    # load the subclass columns in the same query, results are serialized
+    # with their type specific fields right after
+    components, query = _components_select(fields)
+    is_prefix = components.name.ilike(f"{escaped}%", escape="\\")
+
+    query = (
+        query.where(components.name.ilike(f"%{escaped}%", escape="\\"))
+        .order_by(
+            is_prefix.desc(),
+            func.similarity(components.name, q).desc(),
+            components.name.asc(),
+        )
+        .limit(limit)
+    )
 
     return db.execute(query).scalars().all()
 
@@ -30,6 +113,26 @@ def get_component(db: Session, component_id: UUID) -> Component | None:
     return db.execute(query).scalar_one_or_none()
 
 
+def _contribution(values, sign: int = 1) -> dict:
+    """
+    substation summary contribution of a payload dict or a Component.
+    """
+    if not isinstance(values, dict):
+        values = {
+            "component_type": values.component_type,
+            "substation": values.substation,
+            "capacity_mva": getattr(values, "capacity_mva", None),
+            "length_km": getattr(values, "length_km", None),
+        }
+    return component_contribution(
+        values["component_type"],
+        values["substation"],
+        capacity_mva=values.get("capacity_mva"),
+        length_km=values.get("length_km"),
+        sign=sign,
+    )
+
+
 def create_component(db: Session, payload: dict) -> Component:
     component_type = payload["component_type"]
 
@@ -43,6 +146,7 @@ def create_component(db: Session, payload: dict) -> Component:
         raise ValueError("Invalid component_type")
 
     db.add(new_component)
+    apply_substation_deltas(db, [_contribution(payload)])
     db.commit()
     db.refresh(new_component)
     return new_component
@@ -62,9 +166,12 @@ def update_component(db: Session, component_id: UUID, payload: dict) -> Componen
     if incoming_type != old_type:
         raise ValueError("component_type must not change")
 
+    previous = _contribution(component, sign=-1)
+
     for key, value in payload.items():
         setattr(component, key, value)
 
+    apply_substation_deltas(db, [previous, _contribution(payload)])
     db.commit()
     db.refresh(component)
     return component
@@ -76,5 +183,147 @@ def delete_component(db: Session, component_id: UUID) -> None:
     if not component:
         raise LookupError("not_found")
 
+    apply_substation_deltas(db, [_contribution(component, sign=-1)])
+    # its samples go with it, the stored quantile sketches counted them
+    mark_component_days_dirty(db, component_id)
     db.delete(component)
     db.commit()
+
+
+# columns of the flat import/export format, subclass columns are empty
+# for the component types that don't have them
+EXPORT_COLUMNS = [
+    "id",
+    "name",
+    "substation",
+    "component_type",
+    "capacity_mva",
+    "voltage_kv",
+    "length_km",
+    "status",
+]
+
+_SUBCLASS_TABLES = {
+    ComponentType.transformer.value: Transformer.__table__,
+    ComponentType.line.value: Line.__table__,
+    ComponentType.switch.value: Switch.__table__,
+}
+
+# rows per INSERT statement, keeps the bind parameters well below the
+# postgres limit while still sending big multi-row statements
+_BULK_CHUNK_SIZE = 5_000
+
+
+def _chunks(rows: list[dict], size: int) -> Iterator[list[dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def parse_components_csv(text: str) -> list[dict]:
+    """
+    reads the flat csv format (EXPORT_COLUMNS, id is ignored).
+    empty cells are dropped so the payload can be validated with the
+    ComponentCreate schema of each type.
+    returns a list of raw dicts.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {key: value for key, value in row.items() if key and value not in ("", None)}
+        for row in reader
+    ]
+
+
+def bulk_create_components(db: Session, payloads: list[dict]) -> int:
+    """
+    creates many components (of mixed types) in one transaction.
+    rows go straight into components and the subclass tables with
+    multi-row INSERTs instead of one ORM object (and commit) each.
+    payloads must be already validated (ComponentCreate.model_dump()).
+    returns the number of created components.
+    """
+    base_rows: list[dict] = []
+    subclass_rows: dict[str, list[dict]] = {key: [] for key in _SUBCLASS_TABLES}
+
+    for payload in payloads:
+        component_type = payload["component_type"]
+        if component_type not in _SUBCLASS_TABLES:
+            raise ValueError("Invalid component_type")
+
+        component_id = uuid.uuid4()
+        base_rows.append(
+            {
+                "id": component_id,
+                "name": payload["name"],
+                "substation": payload["substation"],
+                "component_type": component_type,
+            }
+        )
+
+        table = _SUBCLASS_TABLES[component_type]
+        row = {"id": component_id}
+        for column in table.columns:
+            if column.name != "id":
+                row[column.name] = payload[column.name]
+        subclass_rows[component_type].append(row)
+
+    try:
+        apply_substation_deltas(db, [_contribution(payload) for payload in payloads])
+        for chunk in _chunks(base_rows, _BULK_CHUNK_SIZE):
+            db.execute(insert(Component.__table__), chunk)
+        for component_type, rows in subclass_rows.items():
+            for chunk in _chunks(rows, _BULK_CHUNK_SIZE):
+                db.execute(insert(_SUBCLASS_TABLES[component_type]), chunk)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return len(base_rows)
+
+
+def iter_components_export(
+    db: Session,
+    component_type: Optional[str] = None,
+    substation: Optional[str] = None,
+    batch_size: int = 2_000,
+) -> Iterator[dict]:
+    """
+    yields every component as a flat dict (EXPORT_COLUMNS).
+    one outer-joined query read through a server-side cursor, so memory
+    stays flat whatever the number of components.
+    """
+    transformers = Transformer.__table__
+    lines = Line.__table__
+    switches = Switch.__table__
+
+    query = (
+        select(
+            Component.id,
+            Component.name,
+            Component.substation,
+            Component.component_type,
+            transformers.c.capacity_mva,
+            func.coalesce(transformers.c.voltage_kv, lines.c.voltage_kv).label(
+                "voltage_kv"
+            ),
+            lines.c.length_km,
+            switches.c.status,
+        )
+        .outerjoin(transformers, transformers.c.id == Component.id)
+        .outerjoin(lines, lines.c.id == Component.id)
+        .outerjoin(switches, switches.c.id == Component.id)
+        .order_by(Component.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    if component_type:
+        query = query.where(Component.component_type == ComponentType(component_type))
+    if substation:
+        query = query.where(Component.substation == substation)
+
+    for row in db.execute(query):
+        item = dict(row._mapping)
+        item["component_type"] = item["component_type"].value
+        if item["status"] is not None:
+            item["status"] = item["status"].value
+        yield item
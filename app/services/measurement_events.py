@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Iterable
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.pubsub import Broker, Subscription
+from app.models.measurements import Measurement
+
+# accepted samples by component id (str). in process only: a subscriber
+# sees the measurements ingested by the api process it is connected to
+measurement_broker = Broker(queue_size=settings.LIVE_MEASUREMENTS_QUEUE_SIZE)
+
+
+def measurement_event(measurement: Measurement) -> dict:
+    return {
+        "type": "measurement",
+        "id": str(measurement.id),
+        "component_id": str(measurement.component_id),
+        "measurement_type": measurement.measurement_type,
+        "timestamp": measurement.timestamp.isoformat(),
+        "value": measurement.value,
+    }
+
+
+def publish_measurements(measurements: Iterable[Measurement]) -> None:
+    """
+    hands committed measurements to the live subscribers of their
+    component. it never waits on a subscriber (slow ones lose their
+    oldest samples) and does nothing at all when nobody listens.
+    """
+    if not measurement_broker.active:
+        return
+    for measurement in measurements:
+        topic = str(measurement.component_id)
+        if measurement_broker.subscribers(topic):
+            measurement_broker.publish(topic, measurement_event(measurement))
+
+
+def subscribe_measurements(component_ids: Iterable[UUID]) -> Subscription:
+    """
+    one queue for the samples of all the given components, must be
+    called from the event loop.
+    """
+    return measurement_broker.subscribe(*{str(id) for id in component_ids})
@@ -1,15 +1,31 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
+from typing import Iterable, Optional
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Row, delete, insert as sa_insert, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from app.models.components import Component
-from app.models.measurements import Measurement
+from app.core.config import settings
+from app.models.components import Component, ComponentType
+from app.models.measurements import Measurement, MeasurementLatest
+from app.services.measurement_events import publish_measurements
+from app.services.quantiles import mark_days_dirty
+from app.services.retention import retention_cutoff
 
 
-def create_measurement(db: Session, payload: dict) -> Measurement:
+# a sample is identified by these, see uq_measurements_component_type_time
+_NATURAL_KEY = ("component_id", "measurement_type", "timestamp")
+
+
+def create_measurement(db: Session, payload: dict) -> tuple[Row, bool]:
+    """
+    stores one sample, returns it and whether it was written: False when
+    the same sample was already stored (a retry), the stored one is
+    returned then. raises ValueError if it is older than the retention.
+    """
     component_id: UUID = payload["component_id"]
 
     component = db.execute(
@@ -18,8 +34,223 @@ def create_measurement(db: Session, payload: dict) -> Measurement:
     if component is None:
         raise LookupError("component_not_found")
 
-    measurement = Measurement(**payload)
-    db.add(measurement)
+    written = insert_measurements(db, [payload])
+    db.commit()
+    if written:
+        publish_measurements(written)
+        return written[0], True
+
+    stored = select(*Measurement.__table__.c).where(
+        *(getattr(Measurement, key) == payload[key] for key in _NATURAL_KEY)
+    )
+    return db.execute(stored).one(), False
+
+
+def create_measurements(db: Session, payloads: list[dict]) -> int:
+    """
+    stores a batch of samples in one transaction, all or nothing: an
+    unknown component, or a sample older than the retention, fails the
+    whole batch. returns how many were written, samples already stored
+    are not counted.
+    """
+    component_ids = {payload["component_id"] for payload in payloads}
+    known = db.execute(select(Component.id).where(Component.id.in_(component_ids)))
+    if set(known.scalars()) != component_ids:
+        raise LookupError("component_not_found")
+
+    written = insert_measurements(db, payloads)
+    db.commit()
+    publish_measurements(written)
+    return len(written)
+
+
+def _reject_rolled_up(rows: list[dict]) -> None:
+    """
+    samples older than the retention cutoff can't be stored anymore:
+    their hour is already rolled up and the raw rows it came from are
+    gone, a retried one would be counted twice.
+    raises ValueError.
+    """
+    if settings.MEASUREMENT_RETENTION_DAYS <= 0:
+        return
+    cutoff = retention_cutoff(settings.MEASUREMENT_RETENTION_DAYS)
+    for row in rows:
+        timestamp: datetime = row["timestamp"]
+        if timestamp.tzinfo is None:
+            # stored as utc, the session time zone
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        if timestamp < cutoff:
+            raise ValueError("measurement_too_old")
+
+
+def insert_measurements(db: Session, rows: list[dict]) -> list[Row]:
+    """
+    INSERT ... ON CONFLICT on the natural key: a sample already stored is
+    skipped, or gets the new value with MEASUREMENT_ON_CONFLICT=update.
+    returns the rows actually written, a retried request writes nothing.
+    measurement_latest is updated from them, and the stored quantile
+    sketches of their days (late samples) are marked dirty.
+    raises ValueError, writing nothing, if a sample is older than the
+    MEASUREMENT_RETENTION_DAYS cutoff. it does not commit.
+    """
+    _reject_rolled_up(rows)
+
+    # one row per key, the last one wins as it would over several
+    # requests. sorted so concurrent batches lock the keys in the same order
+    unique = {tuple(row[key] for key in _NATURAL_KEY): row for row in rows}
+    values = [
+        unique[key]
+        for key in sorted(
+            unique, key=lambda key: (str(key[0]), key[1], key[2].isoformat())
+        )
+    ]
+    if not values:
+        return []
+
+    table = Measurement.__table__
+    query = insert(table)
+    if settings.MEASUREMENT_ON_CONFLICT == "update":
+        query = query.on_conflict_do_update(
+            index_elements=list(_NATURAL_KEY),
+            set_={"value": query.excluded.value},
+            # the same value again is a no-op too
+            where=table.c.value.is_distinct_from(query.excluded.value),
+        )
+    else:
+        query = query.on_conflict_do_nothing(index_elements=list(_NATURAL_KEY))
+
+    written = db.execute(query.returning(*table.c), values).all()
+    update_latest_values(db, [row._mapping for row in written])
+    mark_days_dirty(db, [row.timestamp for row in written])
+    return written
+
+
+def update_latest_values(db: Session, rows: Iterable[dict]) -> None:
+    """
+    upserts the newest sample of every (component, type) in rows into
+    measurement_latest, an existing value is only replaced by one at
+    least as new (a corrected value) so late samples never move it back
+    in time. rows must be the ones actually written.
+    it does not commit, it is meant to run in the transaction that
+    inserts the measurements.
+    """
+    newest: dict[tuple, dict] = {}
+    for row in rows:
+        key = (row["component_id"], row["measurement_type"])
+        current = newest.get(key)
+        if current is None or row["timestamp"] > current["timestamp"]:
+            newest[key] = row
+
+    if not newest:
+        return
+
+    # sorted so concurrent writers always lock the rows in the same order
+    values = [
+        {
+            "component_id": row["component_id"],
+            "measurement_type": row["measurement_type"],
+            "timestamp": row["timestamp"],
+            "value": row["value"],
+        }
+        for _, row in sorted(
+            newest.items(), key=lambda item: (str(item[0][0]), item[0][1])
+        )
+    ]
+
+    query = insert(MeasurementLatest).values(values)
+    query = query.on_conflict_do_update(
+        index_elements=[
+            MeasurementLatest.component_id,
+            MeasurementLatest.measurement_type,
+        ],
+        set_={
+            "timestamp": query.excluded.timestamp,
+            "value": query.excluded.value,
+        },
+        where=query.excluded.timestamp >= MeasurementLatest.timestamp,
+    )
+    db.execute(query)
+
+
+def rebuild_latest_values(db: Session) -> None:
+    """
+    recomputes measurement_latest from the measurements table.
+    only needed after writes that bypassed insert_measurements (COPY,
+    raw sql ecc...).
+    """
+    newest = (
+        select(
+            Measurement.component_id,
+            Measurement.measurement_type,
+            Measurement.timestamp,
+            Measurement.value,
+        )
+        .distinct(Measurement.component_id, Measurement.measurement_type)
+        .order_by(
+            Measurement.component_id,
+            Measurement.measurement_type,
+            Measurement.timestamp.desc(),
+        )
+    )
+
+    db.execute(delete(MeasurementLatest))
+    db.execute(
+        sa_insert(MeasurementLatest).from_select(
+            ["component_id", "measurement_type", "timestamp", "value"], newest
+        )
+    )
     db.commit()
-    db.refresh(measurement)
-    return measurement
+
+
+def get_component_latest(
+    db: Session, component_id: UUID
+) -> list[MeasurementLatest] | None:
+    """
+    the latest value of every measurement type of a component, None if
+    the component doesn't exist. a single query: the component left
+    joined to its rows of measurement_latest (primary key prefix).
+    """
+    query = (
+        select(Component.id, MeasurementLatest)
+        .outerjoin(MeasurementLatest, MeasurementLatest.component_id == Component.id)
+        .where(Component.id == component_id)
+        .order_by(MeasurementLatest.measurement_type)
+    )
+    rows = db.execute(query).all()
+    if not rows:
+        return None
+    return [latest for _, latest in rows if latest is not None]
+
+
+def list_latest_values(
+    db: Session,
+    substation: Optional[str] = None,
+    component_type: Optional[str] = None,
+    measurement_type: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> list[MeasurementLatest]:
+    """
+    the latest values of many components at once. filters on the
+    component go through the components indexes (substation, type),
+    then every component is a primary key lookup in measurement_latest.
+    """
+    query = select(MeasurementLatest)
+
+    if substation or component_type:
+        query = query.join(Component, Component.id == MeasurementLatest.component_id)
+    if substation:
+        query = query.where(Component.substation == substation)
+    if component_type:
+        query = query.where(Component.component_type == ComponentType(component_type))
+    if measurement_type:
+        query = query.where(MeasurementLatest.measurement_type == measurement_type)
+
+    query = (
+        query.order_by(
+            MeasurementLatest.component_id, MeasurementLatest.measurement_type
+        )
+        .offset(offset)
+        .limit(limit)
+    )
+    return db.execute(query).scalars().all()
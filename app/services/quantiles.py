@@ -0,0 +1,454 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import (
+    Integer,
+    SmallInteger,
+    and_,
+    case,
+    cast,
+    delete,
+    false,
+    func,
+    insert,
+    or_,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.components import Component
+from app.models.measurements import (
+    Measurement,
+    MeasurementSketch,
+    MeasurementSketchDay,
+)
+from app.services.report_filters import measurement_conditions
+from app.services.retention import retention_cutoff
+
+# DDSketch: a value x > 0 falls in bucket ceil(log_gamma(x)) and every
+# quantile read back from a bucket is within RELATIVE_ACCURACY of the true
+# sample. changing it makes the stored sketches unmergeable with the new
+# ones, empty measurement_sketches and measurement_sketch_days first
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LN_GAMMA = math.log(GAMMA)
+
+# absolute values below this are counted as zero, log() has no bucket
+# for them
+MIN_INDEXABLE_VALUE = 1e-9
+
+QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+_DAY = timedelta(days=1)
+
+
+def value_bucket(value: float) -> tuple[int, int]:
+    """
+    (sign, bucket) of a value, what raw_buckets_query computes in sql.
+    """
+    if abs(value) < MIN_INDEXABLE_VALUE:
+        return 0, 0
+    return int(math.copysign(1, value)), math.ceil(math.log(abs(value)) / _LN_GAMMA)
+
+
+def bucket_value(sign: int, bucket: int) -> float:
+    """
+    the value a bucket stands for, the one minimizing the relative error
+    over the bucket range (gamma^(k-1), gamma^k].
+    """
+    if sign == 0:
+        return 0.0
+    return sign * 2 * GAMMA**bucket / (GAMMA + 1)
+
+
+def sketch_quantiles(counts: dict[tuple[int, int], int]) -> dict:
+    """
+    count and QUANTILES of a sketch given as {(sign, bucket): count}.
+    """
+    # negatives first (the largest magnitude is the smallest value), then
+    # the zeros, then the positives
+    ordered = sorted(
+        counts.items(), key=lambda item: (item[0][0], item[0][0] * item[0][1])
+    )
+    total = sum(counts.values())
+    result: dict = {"count": total}
+    if not total:
+        return result | {name: None for name in QUANTILES}
+
+    for name, quantile in QUANTILES.items():
+        rank = quantile * (total - 1)
+        seen = 0
+        for (sign, bucket), count in ordered:
+            seen += count
+            if seen > rank:
+                result[name] = bucket_value(sign, bucket)
+                break
+    return result
+
+
+def _utc_day(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def closed_days(
+    from_date: datetime, to_date: datetime, now: datetime | None = None
+) -> list[datetime]:
+    """
+    the whole days of [from_date, to_date) that are over (plus the
+    QUANTILE_SKETCH_DELAY_MINUTES for late samples): the ones whose
+    sketch can be stored.
+    """
+    now = now or datetime.now(timezone.utc)
+    closed_before = now - timedelta(minutes=settings.QUANTILE_SKETCH_DELAY_MINUTES)
+
+    day = _utc_day(from_date)
+    if day < from_date:
+        day += _DAY
+
+    days = []
+    while day + _DAY <= to_date and day + _DAY <= closed_before:
+        days.append(day)
+        day += _DAY
+    return days
+
+
+def raw_buckets_query(
+    ranges: list[tuple[datetime, datetime]], filters: dict | None = None
+):
+    """
+    (day, measurement_type, component_type, sign, bucket, count) of the
+    raw measurements in the [from, to) ranges, narrowed by the (normalized)
+    report filters.
+    grouped by component first and joined to the components after, like
+    the daily averages.
+    """
+    value = Measurement.value
+    too_small = func.abs(value) < MIN_INDEXABLE_VALUE
+    sign = cast(case((too_small, 0), else_=func.sign(value)), SmallInteger)
+    bucket = case(
+        (too_small, 0),
+        else_=cast(func.ceil(func.ln(func.abs(value)) / _LN_GAMMA), Integer),
+    )
+    # utc days whatever the session time zone, like the day markers
+    day = func.date_trunc("day", Measurement.timestamp, "UTC")
+
+    query = (
+        select(
+            day.label("day"),
+            Measurement.measurement_type,
+            Measurement.component_id,
+            sign.label("sign"),
+            bucket.label("bucket"),
+            func.count().label("count"),
+        )
+        # every range is served by the brin index (a BitmapOr of them)
+        .where(
+            or_(
+                false(),
+                *(
+                    and_(Measurement.timestamp >= start, Measurement.timestamp < end)
+                    for start, end in ranges
+                ),
+            )
+        )
+        .where(
+            *measurement_conditions(
+                filters or {}, Measurement.component_id, Measurement.measurement_type
+            )
+        )
+        .group_by(
+            day, Measurement.measurement_type, Measurement.component_id, sign, bucket
+        )
+    )
+    per_component = query.subquery("per_component")
+
+    return (
+        select(
+            per_component.c.day,
+            per_component.c.measurement_type,
+            Component.component_type,
+            per_component.c.sign,
+            per_component.c.bucket,
+            func.sum(per_component.c.count).label("count"),
+        )
+        .join(Component, Component.id == per_component.c.component_id)
+        .group_by(
+            per_component.c.day,
+            per_component.c.measurement_type,
+            Component.component_type,
+            per_component.c.sign,
+            per_component.c.bucket,
+        )
+    )
+
+
+def build_day_sketch(db: Session, day: datetime) -> None:
+    """
+    (re)computes and stores the sketches of one day, and commits.
+    """
+    # a writer marking the day dirty meanwhile waits for this commit, so
+    # its samples are either in the new sketch or flag it dirty again
+    db.execute(
+        select(MeasurementSketchDay.day)
+        .where(MeasurementSketchDay.day == day)
+        .with_for_update()
+    )
+    db.execute(delete(MeasurementSketch).where(MeasurementSketch.day == day))
+    db.execute(
+        insert(MeasurementSketch).from_select(
+            ["day", "measurement_type", "component_type", "sign", "bucket", "count"],
+            raw_buckets_query([(day, day + _DAY)]),
+        )
+    )
+    marker = pg_insert(MeasurementSketchDay).values(day=day)
+    db.execute(
+        marker.on_conflict_do_update(
+            index_elements=[MeasurementSketchDay.day],
+            set_={"built_at": func.now(), "dirty": False},
+        )
+    )
+    db.commit()
+
+
+def _raw_kept_since(now: datetime | None = None) -> datetime | None:
+    """
+    start of the raw measurements the retention keeps, None if it keeps
+    them all. a day before it can't be sketched again from the raw rows.
+    """
+    if settings.MEASUREMENT_RETENTION_DAYS <= 0:
+        return None
+    return retention_cutoff(settings.MEASUREMENT_RETENTION_DAYS, now)
+
+
+def stored_days(
+    db: Session, days: list[datetime], now: datetime | None = None
+) -> set[datetime]:
+    """
+    the days with a usable stored sketch: up to date ones, and dirty ones
+    whose raw samples were partly rolled up already (the outdated sketch
+    is still closer than what is left of the raw rows).
+    """
+    if not days:
+        return set()
+    usable = MeasurementSketchDay.dirty.is_(False)
+    kept_since = _raw_kept_since(now)
+    if kept_since is not None:
+        usable = or_(usable, MeasurementSketchDay.day < kept_since)
+    query = (
+        select(MeasurementSketchDay.day)
+        .where(MeasurementSketchDay.day.in_(days))
+        .where(usable)
+    )
+    return set(db.execute(query).scalars())
+
+
+def mark_days_dirty(db: Session, timestamps: Iterable[datetime]) -> None:
+    """
+    flags the stored sketches of the days of timestamps as outdated,
+    to be called by whatever writes or deletes samples. only days that
+    are over can have a sketch, samples of today cost nothing.
+    it does not commit.
+    """
+    today = _utc_day(datetime.now(timezone.utc))
+    days = sorted({_utc_day(timestamp) for timestamp in timestamps})
+    days = [day for day in days if day < today]
+    if not days:
+        return
+    db.execute(
+        update(MeasurementSketchDay)
+        .where(MeasurementSketchDay.day.in_(days))
+        .values(dirty=True)
+    )
+
+
+def mark_component_days_dirty(db: Session, component_id: UUID) -> None:
+    """
+    flags the stored sketches of every day with samples of the component
+    as outdated, before the component (and its samples) are deleted.
+    it does not commit.
+    """
+    days = (
+        select(func.date_trunc("day", Measurement.timestamp, "UTC"))
+        .where(Measurement.component_id == component_id)
+        .distinct()
+    )
+    db.execute(
+        update(MeasurementSketchDay)
+        .where(MeasurementSketchDay.day.in_(days.scalar_subquery()))
+        .values(dirty=True)
+    )
+
+
+def ensure_sketches(
+    db: Session,
+    from_date: datetime,
+    to_date: datetime,
+    now: datetime | None = None,
+    max_seconds: float | None = None,
+) -> int:
+    """
+    stores the sketches of the closed days of [from_date, to_date) that
+    don't have one yet or have a dirty one, oldest first, one transaction
+    per day.
+    stops early after max_seconds. returns the number of days built.
+    """
+    days = closed_days(from_date, to_date, now)
+    existing = stored_days(db, days, now)
+    started = time.monotonic()
+    built = 0
+    for day in days:
+        if day in existing:
+            continue
+        if max_seconds is not None and time.monotonic() - started >= max_seconds:
+            break
+        build_day_sketch(db, day)
+        built += 1
+    return built
+
+
+def rebuild_dirty_sketches(
+    db: Session, now: datetime | None = None, max_seconds: float | None = None
+) -> int:
+    """
+    rebuilds every dirty sketch whose day is still fully in the raw
+    measurements, however old, oldest first. the ones partly rolled up
+    already keep their sketch.
+    stops early after max_seconds. returns the number of days rebuilt.
+    """
+    query = (
+        select(MeasurementSketchDay.day)
+        .where(MeasurementSketchDay.dirty.is_(True))
+        .order_by(MeasurementSketchDay.day)
+    )
+    kept_since = _raw_kept_since(now)
+    if kept_since is not None:
+        query = query.where(MeasurementSketchDay.day >= kept_since)
+    days = db.execute(query).scalars().all()
+    db.commit()
+
+    started = time.monotonic()
+    rebuilt = 0
+    for day in days:
+        if max_seconds is not None and time.monotonic() - started >= max_seconds:
+            break
+        build_day_sketch(db, day)
+        rebuilt += 1
+    return rebuilt
+
+
+def sketches_usable(filters: dict) -> bool:
+    """
+    stored sketches are per component type and measurement type, they
+    can't answer for a subset of the components.
+    """
+    return "substations" not in filters and "component_ids" not in filters
+
+
+def merged_buckets_query(
+    from_date: datetime,
+    to_date: datetime,
+    sketched_days: set[datetime],
+    filters: dict | None = None,
+):
+    """
+    bucket counts of [from_date, to_date): the stored sketches of
+    sketched_days, the raw measurements for the rest.
+    """
+    filters = filters or {}
+    # the parts of the period not covered by a stored day
+    ranges = []
+    start = from_date
+    for day in sorted(sketched_days):
+        if day > start:
+            ranges.append((start, day))
+        start = day + _DAY
+    if start < to_date:
+        ranges.append((start, to_date))
+
+    stored = select(
+        MeasurementSketch.day,
+        MeasurementSketch.measurement_type,
+        MeasurementSketch.component_type,
+        MeasurementSketch.sign,
+        MeasurementSketch.bucket,
+        MeasurementSketch.count,
+    ).where(MeasurementSketch.day.in_(list(sketched_days)))
+    if "component_types" in filters:
+        stored = stored.where(
+            MeasurementSketch.component_type.in_(filters["component_types"])
+        )
+    if "measurement_types" in filters:
+        stored = stored.where(
+            MeasurementSketch.measurement_type.in_(filters["measurement_types"])
+        )
+
+    return union_all(stored, raw_buckets_query(ranges, filters))
+
+
+def compute_quantiles(
+    db: Session,
+    from_date: datetime,
+    to_date: datetime,
+    now: datetime | None = None,
+    filters: dict | None = None,
+) -> dict:
+    """
+    p50/p95/p99 of the measurements in [from_date, to_date) per day and
+    over the whole period, per measurement type and component type.
+    stored day sketches are used where they exist, the raw samples are
+    only read for the other days (open ones, the partial days at the
+    edges, days nobody sketched yet), and for everything when the
+    filters select a subset of the components.
+    quantiles are within RELATIVE_ACCURACY of the exact ones. samples
+    already rolled up by the retention are only counted through the
+    sketches stored before they were deleted.
+    """
+    filters = filters or {}
+    sketched = set()
+    if sketches_usable(filters):
+        sketched = stored_days(db, closed_days(from_date, to_date, now), now)
+    rows = db.execute(
+        merged_buckets_query(from_date, to_date, sketched, filters)
+    ).all()
+
+    daily: dict[tuple, dict] = defaultdict(lambda: defaultdict(int))
+    period: dict[tuple, dict] = defaultdict(lambda: defaultdict(int))
+    for day, measurement_type, component_type, sign, bucket, count in rows:
+        component_type = getattr(component_type, "value", component_type)
+        # sums of bigint come back as numeric
+        count = int(count)
+        daily[(day, measurement_type, component_type)][(sign, bucket)] += count
+        period[(measurement_type, component_type)][(sign, bucket)] += count
+
+    return {
+        "relative_accuracy": RELATIVE_ACCURACY,
+        "daily": [
+            {
+                "day": day.date().isoformat(),
+                "measurement_type": measurement_type,
+                "component_type": component_type,
+                **sketch_quantiles(daily[(day, measurement_type, component_type)]),
+            }
+            for day, measurement_type, component_type in sorted(daily)
+        ],
+        "period": [
+            {
+                "measurement_type": measurement_type,
+                "component_type": component_type,
+                **sketch_quantiles(period[(measurement_type, component_type)]),
+            }
+            for measurement_type, component_type in sorted(period)
+        ],
+    }
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.pubsub import Broker, Subscription
+from app.db.notifications import get_listener, notify
+from app.models.reports import Report, ReportStatus
+
+REPORT_STATUS_CHANNEL = "report_status"
+
+FINAL_STATUSES = (ReportStatus.DONE, ReportStatus.FAILED)
+
+# status changes by report id (str), fed by the LISTEN thread
+report_broker = Broker(queue_size=settings.PUBSUB_QUEUE_SIZE)
+
+
+def notify_report_status(db: Session, report: Report) -> None:
+    """
+    tells every api process that report changed status.
+    it doesn't commit, the notification goes out with the transaction
+    that changes the status (or never, if it rolls back).
+    """
+    status = ReportStatus(report.status)
+    payload = json.dumps({"id": str(report.id), "status": status.value})
+    notify(db, REPORT_STATUS_CHANNEL, payload)
+
+
+def _dispatch(payload: str) -> None:
+    event = json.loads(payload)
+    report_broker.publish(event["id"], event)
+
+
+def subscribe_report_status(report_id: UUID) -> Subscription:
+    """
+    subscription to the status changes of a report, must be called
+    from the event loop. make sure the listener runs with
+    wait_for_listener before reading the current status, otherwise a
+    change in between can be missed.
+    """
+    return report_broker.subscribe(str(report_id))
+
+
+def wait_for_listener(db: Session, timeout: float = 5.0) -> bool:
+    """
+    starts (once per process) the LISTEN thread on the database of db
+    and waits until it listens. blocking, run it in a thread.
+    """
+    url = db.get_bind().url.render_as_string(hide_password=False)
+    listener = get_listener(url, REPORT_STATUS_CHANNEL, _dispatch)
+    return listener.ready.wait(timeout)
+
+
+def get_report_status(db: Session, report_id: UUID) -> ReportStatus | None:
+    """
+    only the status column, not the whole row with its json blobs.
+    """
+    query = select(Report.status).where(Report.id == report_id)
+    return db.execute(query).scalar_one_or_none()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.models.components import Component, ComponentType
+
+# keys of Report.filters_json, every one is an optional list of values
+FILTER_KEYS = ("substations", "component_types", "component_ids", "measurement_types")
+
+
+def normalize_filters(filters: dict | None) -> dict:
+    """
+    only the filters that are set, with typed values (uuids, enums).
+    """
+    filters = {key: values for key, values in (filters or {}).items() if values}
+    if "component_types" in filters:
+        filters["component_types"] = [
+            ComponentType(value) for value in filters["component_types"]
+        ]
+    if "component_ids" in filters:
+        filters["component_ids"] = [
+            value if isinstance(value, UUID) else UUID(value)
+            for value in filters["component_ids"]
+        ]
+    return filters
+
+
+def component_conditions(filters: dict, entity=Component) -> list:
+    """
+    where clauses on the components (or a subclass given as entity).
+    substation and type together are served by ix_components_type_substation.
+    """
+    conditions = []
+    if "substations" in filters:
+        conditions.append(entity.substation.in_(filters["substations"]))
+    if "component_types" in filters:
+        conditions.append(entity.component_type.in_(filters["component_types"]))
+    if "component_ids" in filters:
+        conditions.append(entity.id.in_(filters["component_ids"]))
+    return conditions
+
+
+def measurement_conditions(filters: dict, component_id, measurement_type) -> list:
+    """
+    where clauses on a measurements like table (raw rows, rollups) given
+    its component_id and measurement_type columns. the components are
+    narrowed first, then the rows are read through the
+    (component_id, measurement_type, timestamp) index.
+    """
+    conditions = []
+    if "measurement_types" in filters:
+        conditions.append(measurement_type.in_(filters["measurement_types"]))
+
+    if "substations" in filters or "component_types" in filters:
+        components = select(Component.id).where(*component_conditions(filters))
+        conditions.append(component_id.in_(components.scalar_subquery()))
+    elif "component_ids" in filters:
+        conditions.append(component_id.in_(filters["component_ids"]))
+    return conditions
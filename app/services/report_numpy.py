@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import (
+    ARRAY,
+    Date,
+    DateTime,
+    String,
+    bindparam,
+    cast,
+    func,
+    select,
+    text,
+)
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.components import Component, ComponentType
+from app.models.measurements import Measurement, MeasurementRollup
+from app.services.report_filters import measurement_conditions
+
+try:
+    import numpy as np
+except ImportError:  # optional, only REPORT_BACKEND=numpy needs it
+    np = None
+
+# every measurement type in the table, sorted: a loose index scan on
+# ix_measurements_measurement_type, one index probe per type
+_MEASUREMENT_TYPES = text(
+    """
+    WITH RECURSIVE types(name) AS (
+        SELECT min(measurement_type) FROM measurements
+        UNION ALL
+        SELECT (
+            SELECT min(measurement_type) FROM measurements
+            WHERE measurement_type > types.name
+        )
+        FROM types
+        WHERE types.name IS NOT NULL
+    )
+    SELECT name FROM types WHERE name IS NOT NULL
+    """
+)
+
+_COMPONENT_TYPES = [component_type.name for component_type in ComponentType]
+
+
+def _measurement_types(
+    db: Session, from_date: datetime, to_date: datetime, filters: dict
+) -> list[str]:
+    if "measurement_types" in filters:
+        return sorted(set(filters["measurement_types"]))
+
+    types = set(db.execute(_MEASUREMENT_TYPES).scalars())
+    rollup_types = (
+        select(MeasurementRollup.measurement_type)
+        .where(MeasurementRollup.bucket >= from_date)
+        .where(MeasurementRollup.bucket < to_date)
+        .distinct()
+    )
+    types.update(db.execute(rollup_types).scalars())
+    return sorted(types)
+
+
+def _cell_key(day, measurement_type, base: date, types: list[str]):
+    """
+    index of the (day, measurement type, component type) cell of a row,
+    computed by the database so only two numbers per row come back.
+    -1 for a type missing from types (first seen after they were read).
+    """
+    type_code = func.array_position(
+        cast(bindparam("types", types, type_=ARRAY(String)), ARRAY(String)),
+        measurement_type,
+    )
+    component_type_code = func.array_position(
+        cast(
+            bindparam("component_types", _COMPONENT_TYPES, type_=ARRAY(String)),
+            ARRAY(String),
+        ),
+        cast(Component.component_type, String),
+    )
+    day_offset = cast(day, Date) - bindparam("base", base, type_=Date)
+    key = (day_offset * len(types) + type_code - 1) * len(_COMPONENT_TYPES)
+    return func.coalesce(key + component_type_code - 1, -1)
+
+
+def _fetch_chunks(db: Session, query, chunk_rows: int):
+    """
+    the rows of query as float64 arrays of up to chunk_rows rows, read
+    through a server-side cursor of the session connection. the psycopg
+    tuples go straight into numpy, building sqlalchemy rows would cost
+    more than the whole aggregation.
+    """
+    compiled = query.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"render_postcompile": True}
+    )
+    connection = db.connection().connection.driver_connection
+    name = f"report_numpy_{uuid.uuid4().hex}"
+    with connection.cursor(name=name, binary=True) as cursor:
+        cursor.itersize = chunk_rows
+        cursor.execute(str(compiled), compiled.params)
+        while rows := cursor.fetchmany(chunk_rows):
+            chunk = np.array(rows, dtype=np.float64)
+            if chunk[:, 0].min() < 0:
+                raise RuntimeError("new measurement type during the report, retry")
+            yield chunk
+
+
+def daily_averages_numpy(
+    db: Session,
+    from_date: datetime,
+    to_date: datetime,
+    filters: dict | None = None,
+    chunk_rows: int | None = None,
+) -> list[tuple]:
+    """
+    the rows of daily_averages_query (day as a date, measurement_type,
+    component_type, avg) with the grouping done in numpy: the database
+    only filters the rows and numbers their cell, the values are streamed
+    in chunks and summed per cell with bincount.
+    raw rows and hourly rollups are merged through sums and counts, like
+    the sql backend.
+    """
+    if np is None:
+        raise RuntimeError("REPORT_BACKEND=numpy needs numpy (the numpy extra)")
+
+    filters = filters or {}
+    chunk_rows = chunk_rows or settings.REPORT_NUMPY_CHUNK_ROWS
+
+    # the days as the database sees them (session time zone), like the
+    # date_trunc of the sql backend
+    timestamptz = DateTime(timezone=True)
+    base, last = db.execute(
+        select(
+            cast(bindparam("from_date", from_date, type_=timestamptz), Date),
+            cast(bindparam("to_date", to_date, type_=timestamptz), Date),
+        )
+    ).one()
+    types = _measurement_types(db, from_date, to_date, filters)
+    if not types:
+        return []
+
+    shape = ((last - base).days + 1, len(types), len(_COMPONENT_TYPES))
+    cells = shape[0] * shape[1] * shape[2]
+    sums = np.zeros(cells)
+    counts = np.zeros(cells)
+
+    raw_key = _cell_key(
+        Measurement.timestamp, Measurement.measurement_type, base, types
+    )
+    raw = (
+        select(raw_key, Measurement.value)
+        .join(Component, Component.id == Measurement.component_id)
+        .where(Measurement.timestamp >= from_date)
+        .where(Measurement.timestamp < to_date)
+        .where(
+            *measurement_conditions(
+                filters, Measurement.component_id, Measurement.measurement_type
+            )
+        )
+    )
+    for chunk in _fetch_chunks(db, raw, chunk_rows):
+        keys = chunk[:, 0].astype(np.int64)
+        sums += np.bincount(keys, weights=chunk[:, 1], minlength=cells)
+        counts += np.bincount(keys, minlength=cells)
+
+    rollup_key = _cell_key(
+        MeasurementRollup.bucket, MeasurementRollup.measurement_type, base, types
+    )
+    rollups = (
+        select(
+            rollup_key,
+            MeasurementRollup.value_sum,
+            MeasurementRollup.value_count,
+        )
+        .join(Component, Component.id == MeasurementRollup.component_id)
+        .where(MeasurementRollup.bucket >= from_date)
+        .where(MeasurementRollup.bucket < to_date)
+        .where(
+            *measurement_conditions(
+                filters,
+                MeasurementRollup.component_id,
+                MeasurementRollup.measurement_type,
+            )
+        )
+    )
+    for chunk in _fetch_chunks(db, rollups, chunk_rows):
+        keys = chunk[:, 0].astype(np.int64)
+        sums += np.bincount(keys, weights=chunk[:, 1], minlength=cells)
+        counts += np.bincount(keys, weights=chunk[:, 2], minlength=cells)
+
+    filled = np.flatnonzero(counts)
+    averages = sums[filled] / counts[filled]
+    days, type_codes, component_type_codes = np.unravel_index(filled, shape)
+    return [
+        (
+            base + timedelta(days=int(day)),
+            types[type_code],
+            ComponentType[_COMPONENT_TYPES[component_type_code]],
+            float(average),
+        )
+        for day, type_code, component_type_code, average in zip(
+            days, type_codes, component_type_codes, averages
+        )
+    ]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from typing import Iterator, Literal
+from uuid import UUID
+
+from sqlalchemy import func, select, true
+from sqlalchemy.orm import Session
+
+from app.models.reports import Report
+
+ReportSection = Literal[
+    "components_by_type",
+    "transformer_capacity_by_voltage",
+    "line_length_by_voltage",
+    "daily_measurement_averages",
+    "daily_measurement_quantiles",
+    "period_measurement_quantiles",
+]
+
+# the jsonb array every section is read from and the columns of its rows
+# (the csv header)
+REPORT_SECTIONS: dict[str, tuple] = {
+    "components_by_type": (
+        Report.components_by_type_json,
+        ["component_type", "count"],
+    ),
+    "transformer_capacity_by_voltage": (
+        Report.transformer_capacity_by_voltage_json,
+        ["voltage_kv", "capacity_mva"],
+    ),
+    "line_length_by_voltage": (
+        Report.line_length_by_voltage_json,
+        ["voltage_kv", "length_km"],
+    ),
+    "daily_measurement_averages": (
+        Report.daily_measurement_averages_json,
+        ["day", "measurement_type", "component_type", "avg_value"],
+    ),
+    "daily_measurement_quantiles": (
+        Report.measurement_quantiles_json["daily"],
+        ["day", "measurement_type", "component_type", "count", "p50", "p95", "p99"],
+    ),
+    "period_measurement_quantiles": (
+        Report.measurement_quantiles_json["period"],
+        ["measurement_type", "component_type", "count", "p50", "p95", "p99"],
+    ),
+}
+
+
+def section_columns(section: ReportSection) -> list[str]:
+    return REPORT_SECTIONS[section][1]
+
+
+def iter_report_section(
+    db: Session, report_id: UUID, section: ReportSection, batch_size: int = 2_000
+) -> Iterator[dict]:
+    """
+    yields the rows of one result section of a report.
+    the array is split by jsonb_array_elements in postgres and read
+    through a server-side cursor, the api never holds the whole section
+    (nor the whole report row) in memory.
+    """
+    column, _ = REPORT_SECTIONS[section]
+    rows = func.jsonb_array_elements(column).table_valued("value")
+
+    query = (
+        select(rows.c.value)
+        .select_from(Report)
+        .join(rows, true())
+        .where(Report.id == report_id)
+        .execution_options(yield_per=batch_size)
+    )
+    for (row,) in db.execute(query):
+        yield row
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.measurements import Measurement, MeasurementRollup
+
+
+def retention_cutoff(retention_days: int, now: datetime | None = None) -> datetime:
+    """
+    start of the hour retention_days ago: raw rows before it get rolled
+    up. cutting on an hour boundary means a rollup bucket is always
+    built from the whole hour of raw rows.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=retention_days)
+    return cutoff.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """
+    moves up to batch_size raw measurements older than cutoff into the
+    hourly rollups, with a single statement:
+    DELETE ... RETURNING feeds an aggregate that is upserted into
+    measurement_rollups, so a batch is either fully rolled up or not at all.
+    rows locked by someone else are skipped, nothing waits on locks.
+    it commits and returns the number of raw rows rolled up.
+    """
+    doomed_ids = (
+        select(Measurement.id)
+        .where(Measurement.timestamp < cutoff)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+    doomed = (
+        delete(Measurement)
+        .where(Measurement.id.in_(doomed_ids.scalar_subquery()))
+        .returning(
+            Measurement.component_id,
+            Measurement.measurement_type,
+            Measurement.timestamp,
+            Measurement.value,
+        )
+        .cte("doomed")
+    )
+
+    bucket = func.date_trunc("hour", doomed.c.timestamp)
+    aggregates = (
+        select(
+            doomed.c.component_id,
+            doomed.c.measurement_type,
+            bucket.label("bucket"),
+            func.count().label("value_count"),
+            func.sum(doomed.c.value).label("value_sum"),
+            func.min(doomed.c.value).label("value_min"),
+            func.max(doomed.c.value).label("value_max"),
+        )
+        .group_by(doomed.c.component_id, doomed.c.measurement_type, bucket)
+        .cte("aggregates")
+    )
+
+    upsert = insert(MeasurementRollup).from_select(
+        [
+            "component_id",
+            "measurement_type",
+            "bucket",
+            "value_count",
+            "value_sum",
+            "value_min",
+            "value_max",
+        ],
+        select(aggregates),
+    )
+    excluded = upsert.excluded
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[
+            MeasurementRollup.component_id,
+            MeasurementRollup.measurement_type,
+            MeasurementRollup.bucket,
+        ],
+        set_={
+            "value_count": MeasurementRollup.value_count + excluded.value_count,
+            "value_sum": MeasurementRollup.value_sum + excluded.value_sum,
+            "value_min": func.least(MeasurementRollup.value_min, excluded.value_min),
+            "value_max": func.greatest(
+                MeasurementRollup.value_max, excluded.value_max
+            ),
+        },
+    )
+
+    query = select(
+        func.coalesce(func.sum(aggregates.c.value_count), literal_column("0"))
+    ).add_cte(upsert.cte("upsert"))
+
+    rolled_up = int(db.execute(query).scalar_one())
+    db.commit()
+    return rolled_up
+
+
+def apply_retention(
+    db: Session,
+    retention_days: int,
+    batch_size: int,
+    max_seconds: float | None = None,
+    now: datetime | None = None,
+) -> int:
+    """
+    rolls up every raw measurement older than retention_days, one
+    batch (and transaction) at a time so locks and WAL stay bounded.
+    stops early after max_seconds, the next run picks up the rest.
+    returns the number of raw rows rolled up.
+    """
+    if retention_days <= 0:
+        return 0
+
+    cutoff = retention_cutoff(retention_days, now)
+    started = time.monotonic()
+    total = 0
+    while True:
+        rolled_up = rollup_batch(db, cutoff, batch_size)
+        total += rolled_up
+        if rolled_up < batch_size:
+            return total
+        if max_seconds is not None and time.monotonic() - started >= max_seconds:
+            return total
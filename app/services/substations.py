@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from collections import defaultdict
+
+from sqlalchemy import delete, func, insert as sa_insert, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.components import Component, ComponentType, Line, Transformer
+from app.models.substations import SubstationSummary
+
+_SUMMARY_COLUMNS = (
+    "transformer_count",
+    "line_count",
+    "switch_count",
+    "total_capacity_mva",
+    "total_length_km",
+)
+
+# substations per upsert, 6 bind parameters each: well below the 65535
+# parameters postgres accepts in one statement
+_UPSERT_CHUNK_SIZE = 5_000
+
+
+def component_contribution(
+    component_type: str,
+    substation: str,
+    capacity_mva: float | None = None,
+    length_km: float | None = None,
+    sign: int = 1,
+) -> dict:
+    """
+    what a single component adds to (sign=1) or removes from (sign=-1)
+    the summary of its substation.
+    """
+    component_type = ComponentType(component_type).value
+    return {
+        "substation": substation,
+        "transformer_count": sign * int(component_type == ComponentType.transformer),
+        "line_count": sign * int(component_type == ComponentType.line),
+        "switch_count": sign * int(component_type == ComponentType.switch),
+        "total_capacity_mva": sign * float(capacity_mva or 0.0),
+        "total_length_km": sign * float(length_km or 0.0),
+    }
+
+
+def apply_substation_deltas(db: Session, deltas: list[dict]) -> None:
+    """
+    adds the given contributions to the summaries, one upsert per
+    _UPSERT_CHUNK_SIZE substations.
+    it does not commit, it is meant to run in the same transaction
+    that changes the components.
+    """
+    merged: dict[str, dict] = defaultdict(
+        lambda: {column: 0 for column in _SUMMARY_COLUMNS}
+    )
+    for delta in deltas:
+        row = merged[delta["substation"]]
+        for column in _SUMMARY_COLUMNS:
+            row[column] += delta[column]
+
+    if not merged:
+        return
+
+    query = insert(SubstationSummary)
+    query = query.on_conflict_do_update(
+        index_elements=[SubstationSummary.substation],
+        set_={
+            column: getattr(SubstationSummary, column)
+            + getattr(query.excluded, column)
+            for column in _SUMMARY_COLUMNS
+        },
+    )
+
+    # sorted so concurrent writers always lock the rows in the same order
+    names = sorted(merged)
+    for start in range(0, len(names), _UPSERT_CHUNK_SIZE):
+        chunk = names[start : start + _UPSERT_CHUNK_SIZE]
+        db.execute(query, [{"substation": name, **merged[name]} for name in chunk])
+
+        # substations without components anymore disappear from the summary
+        db.execute(
+            delete(SubstationSummary)
+            .where(SubstationSummary.substation.in_(chunk))
+            .where(SubstationSummary.transformer_count <= 0)
+            .where(SubstationSummary.line_count <= 0)
+            .where(SubstationSummary.switch_count <= 0)
+        )
+
+
+def list_substation_summaries(
+    db: Session, limit: int = 50, offset: int = 0
+) -> list[SubstationSummary]:
+    query = (
+        select(SubstationSummary)
+        .order_by(SubstationSummary.substation)
+        .offset(offset)
+        .limit(limit)
+    )
+    return db.execute(query).scalars().all()
+
+
+def get_substation_summary(db: Session, substation: str) -> SubstationSummary | None:
+    return db.get(SubstationSummary, substation)
+
+
+def rebuild_substation_summaries(db: Session) -> None:
+    """
+    recomputes every summary from the components table.
+    only needed to repair the table after writes that bypassed the
+    component services (raw sql, manual fixes ecc...).
+    """
+    transformers = Transformer.__table__
+    lines = Line.__table__
+
+    aggregates = (
+        select(
+            Component.substation,
+            func.count()
+            .filter(Component.component_type == ComponentType.transformer)
+            .label("transformer_count"),
+            func.count()
+            .filter(Component.component_type == ComponentType.line)
+            .label("line_count"),
+            func.count()
+            .filter(Component.component_type == ComponentType.switch)
+            .label("switch_count"),
+            func.coalesce(func.sum(transformers.c.capacity_mva), 0.0).label(
+                "total_capacity_mva"
+            ),
+            func.coalesce(func.sum(lines.c.length_km), 0.0).label("total_length_km"),
+        )
+        .outerjoin(transformers, transformers.c.id == Component.id)
+        .outerjoin(lines, lines.c.id == Component.id)
+        .group_by(Component.substation)
+    )
+
+    db.execute(delete(SubstationSummary))
+    db.execute(
+        sa_insert(SubstationSummary).from_select(
+            ["substation", *_SUMMARY_COLUMNS], aggregates
+        )
+    )
+    db.commit()
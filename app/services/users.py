@@ -1,10 +1,71 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, select
 from sqlalchemy.orm import Session
 
-from app.core.security import verify_password
-from app.models.users import User
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import verify_and_update_password
+from app.models.users import User, UserRole
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    lightweight copy of the user used by the auth dependencies.
+    it is detached from any session so it can live in the cache.
+    """
+
+    id: uuid.UUID
+    username: str
+    role: UserRole
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> UserSnapshot:
+        return cls(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            is_active=user.is_active,
+        )
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    claims: dict[str, Any]
+    user: UserSnapshot
+
+
+# token -> (claims, user snapshot)
+token_cache: TTLCache[str, CachedToken] = TTLCache(
+    max_size=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_user_cache(user_id: uuid.UUID) -> int:
+    """
+    drops every cached token of the given user.
+    to be called whenever role, activation or username changes.
+    it goes by id so tokens issued under an old username are dropped too.
+    returns how many tokens were dropped.
+    """
+    return token_cache.discard_where(lambda cached: cached.user.id == user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_user_change(mapper, connection, target: User) -> None:
+    # any change to a user (role, is_active, ...) done through the ORM
+    # in this process invalidates its cached tokens right away,
+    # changes done elsewhere are bounded by AUTH_CACHE_TTL_SECONDS
+    invalidate_user_cache(target.id)
 
 
 def get_user_by_username(db: Session, username: str) -> User | None:
@@ -18,15 +79,32 @@ def get_user_by_username(db: Session, username: str) -> User | None:
     ).scalar_one_or_none()
 
 
-def authenticate_user(db: Session, username: str, password: str) -> User | None:
+async def authenticate_user(
+    db: Session, username: str, password: str
+) -> UserSnapshot | None:
     """
     from the username and the password authenticates or not the user.
     receives username and password.
-    return the User or None.
+    the password check runs on the bounded hashing pool so a login storm
+    can't starve the request threadpool, if the stored hash is outdated
+    it is replaced with a fresh one.
+    return a UserSnapshot or None.
+    raises PasswordHashingBusy if the hashing pool is saturated.
     """
-    user = get_user_by_username(db, username)
+    user = await run_in_threadpool(get_user_by_username, db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+
+    verified, updated_hash = await verify_and_update_password(
+        password, user.hashed_password
+    )
+    if not verified:
         return None
-    return user
+
+    snapshot = UserSnapshot.from_user(user)
+
+    if updated_hash:
+        user.hashed_password = updated_hash
+        await run_in_threadpool(db.commit)
+
+    return snapshot
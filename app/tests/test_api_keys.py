@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.services.api_keys import api_key_registry
+from app.tests.auth import login, logout
+
+
+def _create_key(client, name: str = "gateway-1") -> dict:
+    login(client)
+    response = client.post(
+        "/api-keys", json={"name": name, "scopes": ["measurements:ingest"]}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _measurement(client) -> dict:
+    response = client.get("/components?limit=1&offset=0")
+    return {
+        "component_id": response.json()[0]["id"],
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "value": 42.0,
+        "measurement_type": "Voltage",
+    }
+
+
+def test_create_api_key(client):
+    data = _create_key(client)
+
+    assert data["key"].startswith(data["key_prefix"])
+    assert data["scopes"] == ["measurements:ingest"]
+    assert data["revoked_at"] is None
+
+    # the clear key is never listed again
+    response = client.get("/api-keys")
+    assert response.status_code == 200
+    listed = [item for item in response.json() if item["id"] == data["id"]]
+    assert len(listed) == 1
+    assert "key" not in listed[0]
+
+
+def test_create_api_key_not_authorized(client):
+    login(client, username="user", password="userpass")
+    response = client.post(
+        "/api-keys", json={"name": "nope", "scopes": ["measurements:ingest"]}
+    )
+    assert response.status_code == 403
+
+
+def test_create_api_key_invalid_scope(client):
+    login(client)
+    response = client.post("/api-keys", json={"name": "nope", "scopes": ["admin"]})
+    assert response.status_code == 422
+
+
+def test_ingest_with_api_key(client):
+    key = _create_key(client)["key"]
+    payload = _measurement(client)
+    logout(client)
+
+    # fresh registry: the first lookup loads the keys from the db
+    api_key_registry.clear()
+
+    response = client.post("/measurements", json=payload, headers={"X-API-Key": key})
+    assert response.status_code == 201, response.text
+
+
+def test_ingest_with_invalid_api_key(client):
+    login(client)
+    payload = _measurement(client)
+    logout(client)
+
+    response = client.post(
+        "/measurements", json=payload, headers={"X-API-Key": "pgk_not-a-real-key"}
+    )
+    assert response.status_code == 401
+
+
+def test_api_key_is_not_a_manager_token(client):
+    key = _create_key(client)["key"]
+    logout(client)
+
+    response = client.post(
+        "/reports",
+        json={
+            "from_date": "2026-01-01T00:00:00+00:00",
+            "to_date": "2026-01-02T00:00:00+00:00",
+        },
+        headers={"X-API-Key": key},
+    )
+    assert response.status_code == 401
+
+
+def test_revoked_api_key(client):
+    data = _create_key(client)
+    payload = _measurement(client)
+
+    response = client.delete(f"/api-keys/{data['id']}")
+    assert response.status_code == 200
+    assert response.json()["revoked_at"] is not None
+
+    logout(client)
+    response = client.post(
+        "/measurements", json=payload, headers={"X-API-Key": data["key"]}
+    )
+    assert response.status_code == 401
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pwdlib.hashers.bcrypt import BcryptHasher
+from sqlalchemy import select
+
+import app.api.deps as deps
+import app.core.security as security
+from app.core.security import BoundedExecutor, PasswordHashingBusy, hash_password
+from app.models.users import User, UserRole
+from app.services.users import token_cache
+from app.tests.auth import login
+
+
+def _create_user(db, username: str) -> User:
+    user = db.execute(select(User).where(User.username == username)).scalar_one_or_none()
+    if user is None:
+        user = User(
+            username=username,
+            hashed_password=hash_password("cachepass"),
+            role=UserRole.user,
+            is_active=True,
+        )
+        db.add(user)
+    user.role = UserRole.user
+    user.is_active = True
+    db.commit()
+    return user
+
+
+def _report_payload() -> dict:
+    to_date = datetime.now(timezone.utc)
+    from_date = to_date - timedelta(days=1)
+    return {"from_date": from_date.isoformat(), "to_date": to_date.isoformat()}
+
+
+def test_token_cache_skips_user_query(client, monkeypatch):
+    token_cache.clear()
+    login(client, username="user", password="userpass")
+
+    calls = []
+    original = deps.get_user_by_username
+
+    def counting_get_user_by_username(db, username):
+        calls.append(username)
+        return original(db, username)
+
+    monkeypatch.setattr(deps, "get_user_by_username", counting_get_user_by_username)
+
+    for _ in range(5):
+        response = client.get("/components?limit=1")
+        assert response.status_code == 200
+
+    assert calls == ["user"]
+
+
+def test_token_cache_invalidated_on_role_change(client, db):
+    user = _create_user(db, "cache-role-user")
+    login(client, username="cache-role-user", password="cachepass")
+
+    response = client.post("/reports", json=_report_payload())
+    assert response.status_code == 403
+
+    # promoting the user must be visible on the very next request
+    user.role = UserRole.manager
+    db.commit()
+
+    response = client.post("/reports", json=_report_payload())
+    assert response.status_code == 202
+
+
+def test_token_cache_invalidated_on_deactivation(client, db):
+    user = _create_user(db, "cache-active-user")
+    login(client, username="cache-active-user", password="cachepass")
+
+    response = client.get("/components?limit=1")
+    assert response.status_code == 200
+
+    user.is_active = False
+    db.commit()
+
+    response = client.get("/components?limit=1")
+    assert response.status_code == 401
+
+
+def test_token_cache_invalidated_on_username_change(client, db):
+    user = _create_user(db, "cache-renamed-user")
+    login(client, username="cache-renamed-user", password="cachepass")
+
+    response = client.get("/components?limit=1")
+    assert response.status_code == 200
+
+    # the token names the old username, it must stop working right away
+    user.username = "cache-renamed-user-2"
+    db.commit()
+
+    response = client.get("/components?limit=1")
+    assert response.status_code == 401
+
+    db.delete(user)
+    db.commit()
+
+
+def test_bounded_executor_rejects_when_saturated():
+    executor = BoundedExecutor(max_workers=1, max_queue=1, name="test-hash")
+    release = threading.Event()
+
+    running = executor.submit(release.wait)
+    queued = executor.submit(release.wait)
+    with pytest.raises(PasswordHashingBusy):
+        executor.submit(release.wait)
+
+    release.set()
+    running.result(timeout=5)
+    queued.result(timeout=5)
+
+    # slots are given back once the jobs are done
+    assert executor.submit(lambda: 42).result(timeout=5) == 42
+
+
+def test_login_returns_503_when_hashing_pool_saturated(client, monkeypatch):
+    release = threading.Event()
+    saturated = BoundedExecutor(max_workers=1, max_queue=0, name="test-hash")
+    blocker = saturated.submit(release.wait)
+    monkeypatch.setattr(security, "password_executor", saturated)
+
+    response = client.post(
+        "/token",
+        data={"username": "user", "password": "userpass"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    release.set()
+    blocker.result(timeout=5)
+
+
+def test_login_rehashes_outdated_password(client, db):
+    user = _create_user(db, "rehash-user")
+    user.hashed_password = BcryptHasher().hash("rehashpass")
+    db.commit()
+
+    login(client, username="rehash-user", password="rehashpass")
+
+    db.refresh(user)
+    assert user.hashed_password.startswith("$argon2")
+
+    # the new hash still works
+    login(client, username="rehash-user", password="rehashpass")
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from uuid import uuid4
+
+from sqlalchemy import func, select
+
+from app.benchmarks.bench_suite import reset_grid
+from app.benchmarks.compare import compare
+from app.benchmarks.grid import (
+    BENCH_PREFIX,
+    GridSpec,
+    generate_components,
+    generate_measurements,
+)
+from app.models.components import Component, Transformer
+from app.models.measurements import Measurement
+from app.models.substations import SubstationSummary
+from app.schemas.components import ComponentCreate
+from app.scripts.seed_data import seed_grid
+from pydantic import TypeAdapter
+
+
+def test_grid_spec_sizes():
+    spec = GridSpec(
+        components=10,
+        measurement_types=("Voltage", "Current"),
+        sample_interval_seconds=60,
+        duration_seconds=3_600,
+    )
+    assert spec.samples_per_series == 60
+    assert spec.total_measurements == 10 * 2 * 60
+    assert spec.end - spec.start == timedelta(hours=1)
+
+    spec = GridSpec.for_measurements(1_000_000, components=100)
+    assert spec.total_measurements >= 1_000_000
+    assert spec.total_measurements - 1_000_000 < 100 * 3
+
+
+def test_generate_components_is_valid_and_deterministic():
+    spec = GridSpec(components=200)
+    components = generate_components(spec)
+
+    assert components == generate_components(spec)
+    assert len(components) == 200
+    assert all(c["substation"].startswith(BENCH_PREFIX) for c in components)
+    assert {c["component_type"] for c in components} == {
+        "transformer",
+        "line",
+        "switch",
+    }
+    # same payloads the bulk import accepts
+    TypeAdapter(list[ComponentCreate]).validate_python(components)
+
+
+def test_generate_measurements_batches():
+    spec = GridSpec(
+        components=3,
+        measurement_types=("Voltage", "Power"),
+        sample_interval_seconds=600,
+        duration_seconds=86_400,
+    )
+    ids = [uuid4() for _ in range(spec.components)]
+    batches = list(generate_measurements(spec, ids, batch_size=100))
+
+    assert all(len(batch) == 100 for batch in batches[:-1])
+    rows = [row for batch in batches for row in batch]
+    assert len(rows) == spec.total_measurements
+
+    timestamps = [row["timestamp"] for row in rows]
+    assert timestamps == sorted(timestamps)
+    assert timestamps[0] == spec.start
+    assert timestamps[-1] < spec.end
+    assert {(row["component_id"], row["measurement_type"]) for row in rows} == {
+        (component_id, measurement_type)
+        for component_id in ids
+        for measurement_type in spec.measurement_types
+    }
+
+
+def test_compare_flags_regressions():
+    baseline = {
+        "scenarios": {
+            "read": {"requests_per_second": 1000.0, "latency": {"p95_ms": 10.0}},
+            "list": {"latency": {"p95_ms": 10.0}},
+        }
+    }
+    current = {
+        "scenarios": {
+            "read": {"requests_per_second": 800.0, "latency": {"p95_ms": 10.5}},
+            "list": {"latency": {"p95_ms": 5.0}},
+        }
+    }
+    rows = {row["metric"]: row for row in compare(baseline, current, 0.1)}
+
+    assert rows["read.requests_per_second"]["regression"]
+    assert not rows["read.latency.p95_ms"]["regression"]
+    assert not rows["list.latency.p95_ms"]["regression"]
+
+
+def test_seed_grid_with_copy(db):
+    spec = GridSpec(
+        components=60,
+        measurement_types=("Voltage", "Current"),
+        sample_interval_seconds=900,
+        duration_seconds=86_400,
+    )
+    try:
+        result = seed_grid(db, spec, rows_per_chunk=1_000)
+        assert result["components"] == 60
+        assert result["measurements"] == spec.total_measurements
+
+        bench = Component.substation.like(f"{BENCH_PREFIX}%")
+        assert db.execute(select(func.count()).where(bench)).scalar_one() == 60
+
+        expected_transformers = sum(
+            c["component_type"] == "transformer" for c in generate_components(spec)
+        )
+        transformers = db.execute(
+            select(func.count(Transformer.id)).where(bench)
+        ).scalar_one()
+        assert transformers == expected_transformers
+
+        measurements = db.execute(
+            select(func.count(Measurement.id), func.min(Measurement.timestamp))
+            .join(Component, Component.id == Measurement.component_id)
+            .where(bench)
+        ).one()
+        assert measurements == (spec.total_measurements, spec.start)
+
+        # summaries rebuilt after the load
+        summaries = db.execute(
+            select(func.sum(SubstationSummary.transformer_count)).where(
+                SubstationSummary.substation.like(f"{BENCH_PREFIX}%")
+            )
+        ).scalar_one()
+        assert summaries == expected_transformers
+    finally:
+        reset_grid(db)
+        db.close()
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import csv
+import io
+import json
 import uuid
 
 from app.tests.auth import login, logout
@@ -245,3 +248,192 @@ def test_delete_component_not_found(client):
     fake_id = str(uuid.uuid4())
     response = client.delete(f"/components/{fake_id}")
     assert response.status_code == 404
+
+
+def test_search_components_prefix_first(client):
+    login(client)
+    response = client.get("/components/search?q=sw-seed-1")
+    assert response.status_code == 200
+
+    names = [component["name"] for component in response.json()]
+    assert "SW-seed-1" in names
+    assert all("sw-seed-1" in name.lower() for name in names)
+    # exact prefix matches are ranked before the others
+    assert names[0].lower().startswith("sw-seed-1")
+
+
+def test_search_components_substring(client):
+    login(client, username="user", password="userpass")
+    response = client.get("/components/search?q=seed-12")
+    assert response.status_code == 200
+
+    data = response.json()
+    names = {component["name"] for component in data}
+    assert {"L-seed-12", "SW-seed-12"} <= names
+
+    # type specific fields are returned as in the list endpoint
+    switch = next(c for c in data if c["name"] == "SW-seed-12")
+    assert switch["status"] in ("open", "closed")
+
+
+def test_search_components_escapes_wildcards(client):
+    login(client)
+    response = client.get("/components/search?q=%25%25")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_search_components_query_too_short(client):
+    login(client)
+    response = client.get("/components/search?q=T")
+    assert response.status_code == 422
+
+
+def test_search_components_not_authenticated(client):
+    response = client.get("/components/search?q=seed")
+    assert response.status_code == 401
+
+
+def test_list_components_sparse_fields(client):
+    login(client, username="user", password="userpass")
+    response = client.get("/components?fields=name,substation&limit=5")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data
+    assert all(set(component) == {"id", "name", "substation"} for component in data)
+
+
+def test_list_components_sparse_type_specific_fields(client):
+    login(client)
+    response = client.get("/components/search?q=seed-1&fields=capacity_mva,status")
+    assert response.status_code == 200
+
+    # a field is only there for the types that have it (none for lines)
+    keys = {frozenset(component) for component in response.json()}
+    assert {"id", "status"} in keys
+    assert keys <= {
+        frozenset({"id", "capacity_mva"}),
+        frozenset({"id", "status"}),
+        frozenset({"id"}),
+    }
+
+
+def test_list_components_unknown_field(client):
+    login(client)
+    response = client.get("/components?fields=name,bogus")
+    assert response.status_code == 400
+    assert "bogus" in response.json()["detail"]
+
+
+BULK_COMPONENTS = [
+    {
+        "component_type": "transformer",
+        "name": "T-bulk-1",
+        "substation": "S-bulk",
+        "capacity_mva": 40.0,
+        "voltage_kv": 132.0,
+    },
+    {
+        "component_type": "line",
+        "name": "L-bulk-1",
+        "substation": "S-bulk",
+        "length_km": 12.5,
+        "voltage_kv": 132.0,
+    },
+    {
+        "component_type": "switch",
+        "name": "SW-bulk-1",
+        "substation": "S-bulk",
+        "status": "open",
+    },
+]
+
+
+def test_bulk_import_json(client):
+    login(client)
+    response = client.post("/components/bulk", json=BULK_COMPONENTS)
+    assert response.status_code == 201, response.text
+    assert response.json() == {"created": 3}
+
+    response = client.get("/components?substation=S-bulk")
+    data = {component["name"]: component for component in response.json()}
+    assert data["T-bulk-1"]["capacity_mva"] == 40.0
+    assert data["L-bulk-1"]["length_km"] == 12.5
+    assert data["SW-bulk-1"]["status"] == "open"
+
+
+def test_bulk_import_csv(client):
+    login(client)
+    csv_body = (
+        "name,substation,component_type,capacity_mva,voltage_kv,length_km,status\n"
+        "T-csv-1,S-csv,transformer,10,110,,\n"
+        "L-csv-1,S-csv,line,,110,3.5,\n"
+        "SW-csv-1,S-csv,switch,,,,closed\n"
+    )
+    response = client.post(
+        "/components/bulk",
+        content=csv_body,
+        headers={"Content-Type": "text/csv"},
+    )
+    assert response.status_code == 201, response.text
+    assert response.json() == {"created": 3}
+
+    response = client.get("/components?substation=S-csv")
+    assert {component["name"] for component in response.json()} == {
+        "T-csv-1",
+        "L-csv-1",
+        "SW-csv-1",
+    }
+
+
+def test_bulk_import_is_all_or_nothing(client):
+    login(client)
+    payload = BULK_COMPONENTS + [
+        {"component_type": "transformer", "name": "T-broken", "substation": "S-none"}
+    ]
+    response = client.post("/components/bulk", json=payload)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][0] == 3
+
+    response = client.get("/components?substation=S-none")
+    assert response.json() == []
+
+
+def test_bulk_import_not_authorized(client):
+    login(client, username="user", password="userpass")
+    response = client.post("/components/bulk", json=BULK_COMPONENTS)
+    assert response.status_code == 403
+
+
+def test_export_ndjson(client):
+    login(client)
+    response = client.get("/components/export?substation=S-bulk")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert {row["component_type"] for row in rows} == {"transformer", "line", "switch"}
+    line = next(row for row in rows if row["component_type"] == "line")
+    assert line["length_km"] == 12.5
+    assert line["capacity_mva"] is None
+
+
+def test_export_csv_can_be_imported_back(client):
+    login(client)
+    response = client.get("/components/export?format=csv&substation=S-csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 3
+
+    # re-importing the export into another substation
+    exported = response.text.replace("S-csv", "S-csv-copy")
+    response = client.post(
+        "/components/bulk",
+        content=exported,
+        headers={"Content-Type": "text/csv"},
+    )
+    assert response.status_code == 201, response.text
+    assert response.json() == {"created": 3}
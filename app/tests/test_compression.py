@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+import pytest
+
+from app.api import compression
+from app.api.compression import negotiate_encoding
+from app.tests.auth import login
+
+
+def test_negotiate_encoding(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", object())
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip, deflate, br, zstd") == "zstd"
+    assert negotiate_encoding("zstd;q=0.5, gzip") == "gzip"
+    assert negotiate_encoding("zstd;q=0, *") == "gzip"
+    assert negotiate_encoding("*;q=0") is None
+
+    monkeypatch.setattr(compression, "zstandard", None)
+    assert negotiate_encoding("zstd") is None
+    assert negotiate_encoding("zstd, gzip") == "gzip"
+
+
+def _raw_get(client, url: str, accept_encoding: str):
+    """
+    the response and its body as sent, httpx decodes it otherwise.
+    """
+    with client.stream("GET", url, headers={"Accept-Encoding": accept_encoding}) as r:
+        return r, b"".join(r.iter_raw())
+
+
+def test_large_response_is_gzipped(client):
+    login(client)
+    response, body = _raw_get(client, "/components?limit=200", "gzip")
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) == len(body)
+
+    plain, plain_body = _raw_get(client, "/components?limit=200", "identity")
+    assert "content-encoding" not in plain.headers
+    assert json.loads(gzip.decompress(body)) == json.loads(plain_body)
+    assert len(body) < len(plain_body)
+
+
+def test_small_response_is_not_compressed(client):
+    response, body = _raw_get(client, "/hello", "gzip")
+    assert "content-encoding" not in response.headers
+    assert json.loads(body)["message"]
+
+
+def test_zstd_response(client):
+    zstandard = pytest.importorskip("zstandard")
+    login(client)
+    response, body = _raw_get(client, "/components?limit=200", "gzip, zstd")
+    assert response.headers["content-encoding"] == "zstd"
+    assert json.loads(zstandard.ZstdDecompressor().decompress(body))
+
+
+def test_streamed_export_is_compressed(client):
+    login(client)
+    response, body = _raw_get(client, "/components/export", "gzip")
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+
+    rows = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+    assert rows and all("id" in row for row in rows)
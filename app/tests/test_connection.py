@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import exc, text
+
+from app.core.config import settings
+from app.db import connection as db_connection
+from app.db.connection import ReadReplica, create_db_engine, pool_stats, read_session
+from app.tests.auth import login
+from app.tests.config import TEST_DATABASE_URL
+
+
+def test_pool_stats_count_timeouts(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT_SECONDS", 0.2)
+    engine = create_db_engine(TEST_DATABASE_URL, application_name="powergrid-test")
+
+    try:
+        with engine.connect() as connection:
+            assert connection.execute(text("SHOW application_name")).scalar() == (
+                "powergrid-test"
+            )
+
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+
+            stats = pool_stats(engine)
+            assert stats["checked_out"] == 1
+            assert stats["checkout_timeouts"] == 1
+            assert stats["wait_ms_max"] >= 200
+
+        assert pool_stats(engine)["checked_out"] == 0
+    finally:
+        engine.dispose()
+
+
+def test_statement_timeout(monkeypatch):
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 100)
+    engine = create_db_engine(TEST_DATABASE_URL)
+
+    try:
+        with engine.connect() as connection:
+            with pytest.raises(exc.OperationalError):
+                connection.execute(text("SELECT pg_sleep(2)"))
+    finally:
+        engine.dispose()
+
+
+def test_metrics_db_pool(client):
+    login(client)
+    response = client.get("/metrics/db-pool")
+    assert response.status_code == 200
+    assert {"pool_size", "checked_out", "overflow", "checkout_timeouts"} <= set(
+        response.json()["primary"]
+    )
+
+
+def test_metrics_db_pool_not_authorized(client):
+    login(client, username="user", password="userpass")
+    response = client.get("/metrics/db-pool")
+    assert response.status_code == 403
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    # a second engine on the test database stands in for the replica
+    replica = ReadReplica(TEST_DATABASE_URL)
+    monkeypatch.setattr(db_connection, "read_replica", replica)
+    yield replica
+    replica.engine.dispose()
+
+
+def test_read_routes_use_replica(client, replica):
+    assert replica.lag_seconds() == 0
+    login(client, username="user", password="userpass")
+
+    checkouts = pool_stats(replica.engine)["checkouts"]
+    response = client.get("/components?limit=5")
+    assert response.status_code == 200
+    assert len(response.json()) > 0
+    assert pool_stats(replica.engine)["checkouts"] > checkouts
+
+
+def test_lagging_replica_falls_back_to_primary(db, replica, monkeypatch):
+    monkeypatch.setattr(
+        replica, "measure_lag", lambda: settings.DB_REPLICA_MAX_LAG_SECONDS + 1
+    )
+    monkeypatch.setattr(replica, "_checked_at", None)
+
+    with read_session(db) as read_db:
+        assert read_db is db
+
+
+def test_unreachable_replica_falls_back_to_primary(client, monkeypatch):
+    replica = ReadReplica("postgresql+psycopg://postgres@127.0.0.1:1/nope")
+    monkeypatch.setattr(db_connection, "read_replica", replica)
+    login(client, username="user", password="userpass")
+
+    assert not replica.is_usable()
+    response = client.get("/components?limit=5")
+    assert response.status_code == 200
@@ -1,8 +1,16 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import asyncio
+from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
+import pytest
+from sqlalchemy import func, select
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.config import settings
+from app.core.pubsub import Broker
+from app.models.measurements import Measurement
 from app.tests.auth import login, logout
 
 
@@ -88,3 +96,224 @@ def test_create_measurement_invalid_payload(client):
 
     response = client.post("/measurements", json=payload)
     assert response.status_code == 422
+
+
+def _measurement(component_id: str, measurement_type: str, value: float) -> dict:
+    return {
+        "component_id": component_id,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "value": value,
+        "measurement_type": measurement_type,
+    }
+
+
+def test_live_measurements(client):
+    token = login(client)
+    components = client.get("/components?limit=2&offset=0").json()
+    watched, other = components[0]["id"], components[1]["id"]
+
+    with client.websocket_connect(f"/measurements/live?token={token}") as ws:
+        ws.send_json({"component_ids": [watched], "measurement_types": ["Voltage"]})
+        assert ws.receive_json() == {
+            "type": "subscribed",
+            "component_ids": [watched],
+            "measurement_types": ["Voltage"],
+        }
+
+        for payload in (
+            _measurement(other, "Voltage", 1.0),
+            _measurement(watched, "Current", 2.0),
+            _measurement(watched, "Voltage", 3.0),
+        ):
+            assert client.post("/measurements", json=payload).status_code == 201
+
+        # only the last one matches the subscription
+        event = ws.receive_json()
+        assert event["type"] == "measurement"
+        assert (event["component_id"], event["value"]) == (watched, 3.0)
+
+        # resubscribe to every type of the other component
+        ws.send_json({"component_ids": [other]})
+        assert ws.receive_json()["type"] == "subscribed"
+        client.post("/measurements", json=_measurement(other, "Current", 4.0))
+        event = ws.receive_json()
+        assert (event["component_id"], event["value"]) == (other, 4.0)
+
+        ws.send_json({"component_ids": ["not-a-uuid"]})
+        assert ws.receive_json()["type"] == "error"
+
+
+def test_live_measurements_not_authenticated(client):
+    with pytest.raises(WebSocketDisconnect) as error:
+        with client.websocket_connect("/measurements/live?token=nope") as ws:
+            ws.receive_json()
+    assert error.value.code == 1008
+
+
+def test_broker_subscription_to_several_topics():
+    async def scenario():
+        broker = Broker(queue_size=10)
+        assert not broker.active
+        with broker.subscribe("a", "b") as subscription:
+            assert broker.active
+            broker.publish("a", 1)
+            broker.publish("c", 2)
+            broker.publish("b", 3)
+            await asyncio.sleep(0)
+            assert [await subscription.get(timeout=1) for _ in range(2)] == [1, 3]
+        assert not broker.active
+
+    asyncio.run(scenario())
+
+
+def test_latest_values(client):
+    login(client)
+    component = {
+        "component_type": "switch",
+        "name": "SW-latest",
+        "substation": "S-latest",
+        "status": "closed",
+    }
+    component_id = client.post("/components", json=component).json()["id"]
+    assert client.get(f"/components/{component_id}/latest").json() == []
+
+    now = datetime.now(timezone.utc)
+    for minutes, value, measurement_type in (
+        (0, 1.0, "Voltage"),
+        (5, 2.0, "Voltage"),
+        # late sample, older than the current one: it must not win
+        (-5, 3.0, "Voltage"),
+        (1, 4.0, "Current"),
+    ):
+        payload = {
+            "component_id": component_id,
+            "timestamp": (now + timedelta(minutes=minutes)).isoformat(),
+            "value": value,
+            "measurement_type": measurement_type,
+        }
+        assert client.post("/measurements", json=payload).status_code == 201
+
+    response = client.get(f"/components/{component_id}/latest")
+    assert response.status_code == 200
+    assert [(row["measurement_type"], row["value"]) for row in response.json()] == [
+        ("Current", 4.0),
+        ("Voltage", 2.0),
+    ]
+
+    response = client.get(
+        "/measurements/latest?substation=S-latest&measurement_type=Voltage"
+    )
+    assert [(row["component_id"], row["value"]) for row in response.json()] == [
+        (component_id, 2.0)
+    ]
+    response = client.get(
+        "/measurements/latest?substation=S-latest&component_type=transformer"
+    )
+    assert response.json() == []
+
+    assert client.get(f"/components/{uuid4()}/latest").status_code == 404
+    assert client.delete(f"/components/{component_id}").status_code == 204
+
+
+def _count_measurements(db, component_id: str) -> int:
+    query = select(func.count()).where(Measurement.component_id == component_id)
+    count = db.execute(query).scalar_one()
+    db.close()
+    return count
+
+
+@pytest.fixture
+def retry_component(client):
+    login(client)
+    component = {
+        "component_type": "switch",
+        "name": "SW-retry",
+        "substation": "S-retry",
+        "status": "open",
+    }
+    component_id = client.post("/components", json=component).json()["id"]
+    yield component_id
+    login(client)
+    client.delete(f"/components/{component_id}")
+
+
+def test_retried_measurement_is_stored_once(client, db, retry_component):
+    payload = _measurement(retry_component, "Voltage", 1.0)
+    first = client.post("/measurements", json=payload)
+    assert first.status_code == 201
+
+    payload["value"] = 2.0
+    retry = client.post("/measurements", json=payload)
+    assert retry.status_code == 200
+    # the stored sample, the retry changed nothing
+    assert retry.json() == first.json()
+    assert _count_measurements(db, retry_component) == 1
+
+
+def test_batch_measurements_skip_duplicates(client, db, retry_component):
+    start = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    batch = [
+        {
+            "component_id": retry_component,
+            "timestamp": (start + timedelta(minutes=i)).isoformat(),
+            "value": float(i),
+            "measurement_type": "Power",
+        }
+        for i in range(10)
+    ]
+    # the last sample twice in the same batch
+    response = client.post("/measurements/batch", json=batch + batch[-1:])
+    assert response.status_code == 200
+    assert response.json() == {"received": 11, "written": 10, "duplicates": 1}
+
+    # a gateway resending after a timeout, plus one new sample
+    new = dict(batch[0], timestamp=(start + timedelta(hours=1)).isoformat())
+    response = client.post("/measurements/batch", json=batch + [new])
+    assert response.json() == {"received": 11, "written": 1, "duplicates": 10}
+    assert _count_measurements(db, retry_component) == 11
+
+    latest = client.get(f"/components/{retry_component}/latest").json()
+    assert [(row["measurement_type"], row["value"]) for row in latest] == [
+        ("Power", 0.0)
+    ]
+
+    unknown = dict(new, component_id=str(uuid4()))
+    response = client.post("/measurements/batch", json=[new, unknown])
+    assert response.status_code == 404
+    assert client.post("/measurements/batch", json=[]).status_code == 422
+
+
+def test_measurement_conflict_update(client, db, retry_component, monkeypatch):
+    monkeypatch.setattr(settings, "MEASUREMENT_ON_CONFLICT", "update")
+    payload = _measurement(retry_component, "Current", 1.0)
+    assert client.post("/measurements", json=payload).status_code == 201
+
+    # a corrected value replaces the stored one, and the latest value
+    payload["value"] = 5.0
+    response = client.post("/measurements", json=payload)
+    assert response.status_code == 201
+    assert response.json()["value"] == 5.0
+    # the same value again is a no-op
+    assert client.post("/measurements", json=payload).status_code == 200
+
+    assert _count_measurements(db, retry_component) == 1
+    latest = client.get(f"/components/{retry_component}/latest").json()
+    assert [row["value"] for row in latest] == [5.0]
+
+
+def test_measurement_older_than_retention(client, db, retry_component, monkeypatch):
+    # its hour may be rolled up already, a retry would be counted twice
+    monkeypatch.setattr(settings, "MEASUREMENT_RETENTION_DAYS", 30)
+    now = datetime.now(timezone.utc)
+    old = dict(
+        _measurement(retry_component, "Voltage", 1.0),
+        timestamp=(now - timedelta(days=31)).isoformat(),
+    )
+    response = client.post("/measurements", json=old)
+    assert response.status_code == 422
+
+    recent = dict(old, timestamp=(now - timedelta(days=29)).isoformat())
+    assert client.post("/measurements/batch", json=[recent, old]).status_code == 422
+    assert _count_measurements(db, retry_component) == 0
+
+    assert client.post("/measurements", json=recent).status_code == 201
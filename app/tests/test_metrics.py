@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+
+from app.core.config import settings
+from app.core.metrics import LatencyHistogram, route_db_metrics, route_latency_metrics
+from app.core.profiling import SamplingProfiler
+from app.core.security import hash_password
+from app.models.users import User, UserRole
+from app.tests.auth import login
+
+
+def test_server_timing_header(client):
+    login(client)
+    response = client.get("/components?limit=5")
+    assert response.status_code == 200
+
+    match = re.fullmatch(
+        r'db;dur=([0-9.]+);desc="(\d+) queries"', response.headers["Server-Timing"]
+    )
+    assert match is not None
+    assert int(match.group(2)) >= 1
+    assert float(match.group(1)) > 0
+
+
+def test_route_db_metrics(client):
+    route_db_metrics.clear()
+    login(client)
+
+    for _ in range(3):
+        client.get("/components?limit=5")
+    client.get("/hello")
+
+    response = client.get("/metrics/routes")
+    assert response.status_code == 200
+    routes = {item["route"]: item for item in response.json()}
+
+    assert routes["GET /components"]["requests"] == 3
+    assert routes["GET /components"]["queries_total"] >= 3
+    assert routes["GET /hello"]["queries_total"] == 0
+
+
+def test_route_db_metrics_uses_route_template(client):
+    route_db_metrics.clear()
+    login(client)
+    client.get("/substations/S-not-there")
+
+    response = client.get("/metrics/routes")
+    assert "GET /substations/{substation}" in {
+        item["route"] for item in response.json()
+    }
+
+
+def test_route_db_metrics_unmatched_paths_share_a_label(client):
+    route_db_metrics.clear()
+    for i in range(5):
+        assert client.get(f"/not-a-route-{i}/x").status_code == 404
+
+    labels = [item["route"] for item in route_db_metrics.snapshot()]
+    assert labels == ["GET <unmatched>"]
+
+
+def test_slow_queries_are_logged_with_route(client, monkeypatch, caplog):
+    login(client)
+    monkeypatch.setattr(settings, "DB_SLOW_QUERY_MS", 0.0001)
+
+    with caplog.at_level(logging.WARNING, logger="app.db.slow_queries"):
+        client.get("/components?limit=5")
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("route=GET /components" in message for message in messages)
+
+
+def test_metrics_routes_not_authorized(client):
+    login(client, username="user", password="userpass")
+    response = client.get("/metrics/routes")
+    assert response.status_code == 403
+
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+
+    # bucket bounds are at most 25% wider than the real value
+    assert 0.050 <= histogram.quantile(0.50) <= 0.050 * 1.25
+    assert 0.095 <= histogram.quantile(0.95) <= 0.095 * 1.25
+    assert histogram.quantile(0.99) <= histogram.max == 0.1
+
+
+def test_route_latency_metrics(client):
+    route_latency_metrics.clear()
+    login(client)
+    for _ in range(5):
+        client.get("/components?limit=5")
+
+    response = client.get("/metrics/latency")
+    assert response.status_code == 200
+    routes = {item["route"]: item for item in response.json()}
+
+    components = routes["GET /components"]
+    assert components["requests"] == 5
+    assert 0 < components["p50_ms"] <= components["p95_ms"] <= components["p99_ms"]
+
+
+def test_route_latency_metrics_unmatched_paths_share_a_label(client):
+    route_latency_metrics.clear()
+    for i in range(5):
+        client.get(f"/components/not-a-route-{i}/x")
+
+    labels = [item["route"] for item in route_latency_metrics.snapshot()]
+    assert labels == ["GET <unmatched>"]
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler_folded_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+
+    profiler = SamplingProfiler(interval_seconds=0.001)
+    profiler.start()
+    time.sleep(0.1)
+    folded = profiler.stop()
+
+    stop.set()
+    worker.join()
+
+    busy = [line for line in folded.splitlines() if line.startswith("busy;")]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    assert "_busy_loop" in stack
+    assert int(count) > 0
+
+
+def test_profile_request_as_manager(client):
+    login(client)
+    response = client.get("/components?limit=50", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    response = client.get("/metrics/profiles")
+    assert profile_id in {profile["id"] for profile in response.json()}
+
+    response = client.get(f"/metrics/profiles/{profile_id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+def test_profile_request_ignored_for_users(client):
+    login(client, username="user", password="userpass")
+    response = client.get("/components?limit=5", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_profile_request_ignored_for_demoted_manager(client, db):
+    user = User(
+        username="profile-demoted",
+        hashed_password=hash_password("profilepass"),
+        role=UserRole.manager,
+        is_active=True,
+    )
+    db.add(user)
+    db.commit()
+    login(client, username="profile-demoted", password="profilepass")
+
+    # the token still says manager, the user isn't one anymore
+    user.role = UserRole.user
+    db.commit()
+    response = client.get("/components?limit=5", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+    db.delete(user)
+    db.commit()
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select, text
+
+from app.models.components import Component, Switch
+from app.models.measurements import (
+    Measurement,
+    MeasurementSketch,
+    MeasurementSketchDay,
+)
+from app.services.quantiles import (
+    QUANTILES,
+    RELATIVE_ACCURACY,
+    closed_days,
+    compute_quantiles,
+    ensure_sketches,
+    rebuild_dirty_sketches,
+    sketch_quantiles,
+    value_bucket,
+)
+from app.services.components import delete_component
+from app.services.measurements import insert_measurements
+
+# far from the days used by the other tests, the sketches aggregate every
+# component of a type
+DAY = datetime(2001, 3, 10, tzinfo=timezone.utc)
+NOW = datetime(2001, 6, 1, tzinfo=timezone.utc)
+
+
+def _exact(values: list[float], quantile: float) -> float:
+    return sorted(values)[int(quantile * (len(values) - 1))]
+
+
+def test_sketch_quantiles_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(3, 1.5) for _ in range(10_000)]
+    values += [-value for value in values[:500]] + [0.0] * 100
+
+    result = sketch_quantiles(Counter(value_bucket(value) for value in values))
+
+    assert result["count"] == len(values)
+    for name, quantile in QUANTILES.items():
+        exact = _exact(values, quantile)
+        assert result[name] == pytest.approx(exact, rel=RELATIVE_ACCURACY)
+
+
+def test_closed_days():
+    from_date = DAY + timedelta(hours=6)
+    to_date = DAY + timedelta(days=4)
+    # the partial first day is left out, the last one isn't over yet
+    now = DAY + timedelta(days=3, hours=12)
+    assert closed_days(from_date, to_date, now) == [
+        DAY + timedelta(days=1),
+        DAY + timedelta(days=2),
+    ]
+
+
+@pytest.fixture
+def sampled_switch(db):
+    """
+    a switch with "Loading" samples over two days.
+    """
+    switch = Switch(
+        component_type="switch", name="SW-quantiles", substation="S-q", status="open"
+    )
+    db.add(switch)
+    db.commit()
+
+    rng = random.Random(3)
+    rows = [
+        {
+            "component_id": switch.id,
+            "timestamp": DAY + timedelta(minutes=i),
+            "value": rng.uniform(-10, 500) if i % 50 else 0.0,
+            "measurement_type": "Loading",
+        }
+        for i in range(2 * 24 * 60)
+    ]
+    db.execute(Measurement.__table__.insert(), rows)
+    db.commit()
+
+    yield rows
+
+    db.execute(delete(Component).where(Component.id == switch.id))
+    db.execute(delete(MeasurementSketch).where(MeasurementSketch.day >= DAY))
+    db.execute(delete(MeasurementSketchDay).where(MeasurementSketchDay.day >= DAY))
+    db.commit()
+    db.close()
+
+
+def _loading(result: dict) -> dict:
+    return {
+        "daily": [
+            row for row in result["daily"] if row["measurement_type"] == "Loading"
+        ],
+        "period": [
+            row for row in result["period"] if row["measurement_type"] == "Loading"
+        ],
+    }
+
+
+def test_stored_sketches_give_the_raw_quantiles(db, sampled_switch):
+    from_date, to_date = DAY, DAY + timedelta(days=2)
+    raw = _loading(compute_quantiles(db, from_date, to_date, NOW))
+
+    assert ensure_sketches(db, from_date, to_date, NOW) == 2
+    assert ensure_sketches(db, from_date, to_date, NOW) == 0
+    days = db.execute(select(MeasurementSketchDay.day)).scalars().all()
+    assert sorted(days) == [DAY, DAY + timedelta(days=1)]
+
+    stored = _loading(compute_quantiles(db, from_date, to_date, NOW))
+    assert stored == raw
+
+    values = [row["value"] for row in sampled_switch]
+    (period,) = stored["period"]
+    assert period["count"] == len(values)
+    for name, quantile in QUANTILES.items():
+        exact = _exact(values, quantile)
+        assert period[name] == pytest.approx(exact, rel=RELATIVE_ACCURACY)
+
+    assert [row["day"] for row in stored["daily"]] == ["2001-03-10", "2001-03-11"]
+    first_day = [row["value"] for row in sampled_switch[: 24 * 60]]
+    assert stored["daily"][0]["p99"] == pytest.approx(
+        _exact(first_day, 0.99), rel=RELATIVE_ACCURACY
+    )
+
+
+def test_partial_days_read_the_raw_samples(db, sampled_switch):
+    ensure_sketches(db, DAY, DAY + timedelta(days=2), NOW)
+
+    # from noon: the first day is partial, only the second one is stored
+    from_date = DAY + timedelta(hours=12)
+    result = _loading(compute_quantiles(db, from_date, DAY + timedelta(days=2), NOW))
+    assert [row["count"] for row in result["daily"]] == [12 * 60, 24 * 60]
+
+
+def _dirty_days(db) -> list[datetime]:
+    query = (
+        select(MeasurementSketchDay.day)
+        .where(MeasurementSketchDay.dirty)
+        .where(MeasurementSketchDay.day.between(DAY, DAY + timedelta(days=1)))
+    )
+    return sorted(db.execute(query).scalars())
+
+
+def test_late_sample_rebuilds_the_sketch(db, sampled_switch):
+    from_date, to_date = DAY, DAY + timedelta(days=2)
+    ensure_sketches(db, from_date, to_date, NOW)
+
+    late = {**sampled_switch[0], "timestamp": DAY + timedelta(seconds=30)}
+    insert_measurements(db, [late])
+    db.commit()
+    assert _dirty_days(db) == [DAY]
+
+    # the dirty day is read from the raw samples right away
+    result = _loading(compute_quantiles(db, from_date, to_date, NOW))
+    assert [row["count"] for row in result["daily"]] == [24 * 60 + 1, 24 * 60]
+
+    assert rebuild_dirty_sketches(db, NOW) == 1
+    assert _dirty_days(db) == []
+    assert _loading(compute_quantiles(db, from_date, to_date, NOW)) == result
+
+
+def test_deleted_component_rebuilds_the_sketch(db, sampled_switch):
+    from_date, to_date = DAY, DAY + timedelta(days=2)
+    ensure_sketches(db, from_date, to_date, NOW)
+
+    delete_component(db, sampled_switch[0]["component_id"])
+    assert _dirty_days(db) == [DAY, DAY + timedelta(days=1)]
+
+    assert ensure_sketches(db, from_date, to_date, NOW) == 2
+    assert _loading(compute_quantiles(db, from_date, to_date, NOW))["period"] == []
+
+
+def test_sketch_days_are_utc_days(db, sampled_switch):
+    db.execute(text("SET TIME ZONE 'America/New_York'"))
+    try:
+        ensure_sketches(db, DAY, DAY + timedelta(days=2), NOW)
+        days = db.execute(select(MeasurementSketch.day).distinct()).scalars()
+        assert sorted(days) == [DAY, DAY + timedelta(days=1)]
+
+        result = _loading(compute_quantiles(db, DAY, DAY + timedelta(days=2), NOW))
+        assert [row["count"] for row in result["daily"]] == [24 * 60, 24 * 60]
+    finally:
+        db.rollback()
+        db.execute(text("RESET TIME ZONE"))
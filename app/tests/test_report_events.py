@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+
+from app.core.pubsub import Broker
+from app.report_worker import claim_one_report, process_report
+from app.services.report_events import report_broker
+from app.tests.auth import login
+
+
+REPORT = {
+    "from_date": "2026-01-01T00:00:00+00:00",
+    "to_date": "2026-01-02T00:00:00+00:00",
+}
+
+
+def _events(body: str) -> list[dict]:
+    return [
+        json.loads(line.removeprefix("data: "))
+        for line in body.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+def test_broker_fan_out_from_another_thread():
+    async def scenario():
+        broker = Broker(queue_size=2)
+        first = broker.subscribe("topic")
+        second = broker.subscribe("topic")
+
+        thread = threading.Thread(target=broker.publish, args=("topic", "hello"))
+        thread.start()
+        thread.join()
+
+        assert await first.get(timeout=1) == "hello"
+        assert await second.get(timeout=1) == "hello"
+
+        # slow subscriber: the oldest messages are dropped
+        for message in ("a", "b", "c"):
+            broker.publish("topic", message)
+        await asyncio.sleep(0)
+        assert [await first.get(timeout=1) for _ in range(2)] == ["b", "c"]
+        assert first.dropped == 1
+
+        first.close()
+        second.close()
+        assert broker.subscribers("topic") == 0
+        assert broker.publish("topic", "nobody") == 0
+
+    asyncio.run(scenario())
+
+
+def test_report_events_stream_until_done(client, db):
+    login(client)
+    response = client.post("/reports", json=REPORT)
+    report_id = response.json()["id"]
+
+    def worker():
+        # waits for the stream to subscribe, then runs the report
+        deadline = time.monotonic() + 10
+        while not report_broker.subscribers(report_id):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        # older pending reports of other tests go first
+        while (report := claim_one_report(db)) is not None:
+            process_report(db, report)
+            if str(report.id) == report_id:
+                break
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    response = client.get(f"/reports/{report_id}/events")
+    thread.join()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert [event["status"] for event in _events(response.text)] == [
+        "PENDING",
+        "RUNNING",
+        "DONE",
+    ]
+    assert report_broker.subscribers(report_id) == 0
+
+
+def test_report_events_of_finished_report(client, db):
+    login(client)
+    report_id = client.post("/reports", json=REPORT).json()["id"]
+    while (report := claim_one_report(db)) is not None:
+        process_report(db, report)
+
+    response = client.get(f"/reports/{report_id}/events")
+    assert [event["status"] for event in _events(response.text)] == ["DONE"]
+
+
+def test_report_events_not_found(client):
+    login(client)
+    response = client.get("/reports/00000000-0000-0000-0000-000000000000/events")
+    assert response.status_code == 404
+
+
+def test_get_report_wait_returns_when_done(client, db):
+    login(client)
+    report_id = client.post("/reports", json=REPORT).json()["id"]
+
+    def worker():
+        deadline = time.monotonic() + 10
+        while not report_broker.subscribers(report_id):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        while (report := claim_one_report(db)) is not None:
+            process_report(db, report)
+            if str(report.id) == report_id:
+                break
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    started = time.monotonic()
+    response = client.get(f"/reports/{report_id}?wait=30")
+    thread.join()
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "DONE"
+    assert response.json()["daily_measurement_averages_json"] is not None
+    assert time.monotonic() - started < 10
+
+
+def test_get_report_wait_times_out(client):
+    login(client)
+    report_id = client.post("/reports", json=REPORT).json()["id"]
+
+    started = time.monotonic()
+    response = client.get(f"/reports/{report_id}?wait=0.5")
+    assert response.status_code == 200
+    assert response.json()["status"] == "PENDING"
+    assert time.monotonic() - started >= 0.5
+    assert report_broker.subscribers(report_id) == 0
+
+
+def test_get_report_wait_bounds(client):
+    login(client)
+    report_id = client.post("/reports", json=REPORT).json()["id"]
+
+    response = client.get(f"/reports/{report_id}?wait=100000")
+    assert response.status_code == 422
+
+    response = client.get("/reports/00000000-0000-0000-0000-000000000000?wait=1")
+    assert response.status_code == 404
@@ -1,14 +1,28 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+import pytest
 
 from app.models.components import Component, Transformer, Line, Switch
-from app.models.measurements import Measurement
+from app.core.config import settings
+from app.models.measurements import (
+    Measurement,
+    MeasurementRollup,
+    MeasurementSketch,
+    MeasurementSketchDay,
+)
 from app.models.reports import Report, ReportStatus
 
 from app.tests.auth import login, logout
 
-from app.report_worker import claim_one_report, process_report
+from app.report_worker import (
+    claim_one_report,
+    daily_averages,
+    daily_averages_query,
+    process_report,
+)
+from app.services.report_filters import normalize_filters
 
 from sqlalchemy import select, delete
 
@@ -27,6 +41,8 @@ def test_worker_expected_vs_actual_all_aggregations(client, db):
 
     # cleaning like cinderella
     db.execute(delete(Measurement))
+    db.execute(delete(MeasurementSketch))
+    db.execute(delete(MeasurementSketchDay))
     db.execute(delete(Report))
     db.execute(delete(Component))
     db.commit()
@@ -219,3 +235,188 @@ def test_worker_expected_vs_actual_all_aggregations(client, db):
                 assert abs(actual["avg_value"] - expected["avg_value"]) < 1e-9
                 found = True
         assert found, f"Missing daily average row: {expected}"
+
+    # quantiles: the closed day got its sketch stored and merged
+    quantiles = report.measurement_quantiles_json
+    power = [
+        row
+        for row in quantiles["period"]
+        if (row["measurement_type"], row["component_type"]) == ("Power", "switch")
+    ]
+    assert len(power) == 1
+    assert power[0]["count"] == 4
+    assert abs(power[0]["p50"] - 200.0) <= 200.0 * quantiles["relative_accuracy"]
+    # lower quantiles: rank 0.99 * 3 is still the third sample
+    assert abs(power[0]["p99"] - 300.0) <= 300.0 * quantiles["relative_accuracy"]
+    assert len(quantiles["daily"]) == len(expected_daily_averages)
+
+
+def test_worker_filtered_report(client, db):
+    """
+    two substations, the report only looks at the lines of one of them.
+    """
+    login(client)
+
+    day = datetime(2002, 4, 1, 12, 0, tzinfo=timezone.utc)
+    components = [
+        Line(
+            component_type="line",
+            name=f"L-filter-{substation}-{i}",
+            substation=substation,
+            length_km=float(i),
+            voltage_kv=66.0,
+        )
+        for substation in ("S-filter-a", "S-filter-b")
+        for i in (1, 2)
+    ]
+    components.append(
+        Switch(
+            component_type="switch",
+            name="SW-filter",
+            substation="S-filter-a",
+            status="open",
+        )
+    )
+    db.add_all(components)
+    db.commit()
+
+    db.add_all(
+        Measurement(
+            component_id=component.id,
+            timestamp=day,
+            measurement_type=measurement_type,
+            value=value,
+        )
+        for value, component in enumerate(components, start=1)
+        for measurement_type in ("Current", "Power")
+    )
+    db.commit()
+
+    response = client.post(
+        "/reports",
+        json={
+            "from_date": "2002-04-01T00:00:00+00:00",
+            "to_date": "2002-04-02T00:00:00+00:00",
+            "filters": {
+                "substations": ["S-filter-a"],
+                "component_types": ["line"],
+                "measurement_types": ["Current"],
+            },
+        },
+    )
+    report_id = response.json()["id"]
+
+    # older pending reports of other tests go first
+    while (claimed := claim_one_report(db)) is not None:
+        process_report(db, claimed)
+        if str(claimed.id) == report_id:
+            break
+
+    report = db.get(Report, claimed.id)
+    assert report.status == ReportStatus.DONE
+    assert report.components_by_type_json == [{"component_type": "line", "count": 2}]
+    assert report.transformer_capacity_by_voltage_json == []
+    assert report.line_length_by_voltage_json == [
+        {"voltage_kv": 66.0, "length_km": 3.0}
+    ]
+    assert report.daily_measurement_averages_json == [
+        {
+            "day": "2002-04-01",
+            "measurement_type": "Current",
+            "component_type": "line",
+            "avg_value": 1.5,
+        }
+    ]
+    (period,) = report.measurement_quantiles_json["period"]
+    assert (period["measurement_type"], period["count"]) == ("Current", 2)
+
+    db.execute(delete(Component).where(Component.name.like("%-filter%")))
+    db.commit()
+
+
+def test_numpy_backend_matches_sql(db, monkeypatch):
+    """
+    same daily averages from the numpy backend as from the sql query, raw
+    rows and rollups mixed, with every kind of filter.
+    """
+    pytest.importorskip("numpy")
+
+    start = datetime(2003, 5, 1, tzinfo=timezone.utc)
+    components = [
+        Line(
+            component_type="line",
+            name="L-numpy",
+            substation="S-numpy",
+            length_km=1.0,
+            voltage_kv=66.0,
+        ),
+        Transformer(
+            component_type="transformer",
+            name="T-numpy",
+            substation="S-numpy",
+            capacity_mva=10.0,
+            voltage_kv=132.0,
+        ),
+        Switch(
+            component_type="switch",
+            name="SW-numpy",
+            substation="S-numpy-b",
+            status="open",
+        ),
+    ]
+    db.add_all(components)
+    db.commit()
+
+    db.add_all(
+        Measurement(
+            component_id=component.id,
+            timestamp=start + timedelta(hours=5 * i),
+            measurement_type=measurement_type,
+            value=float(i * (j + 1)),
+        )
+        for j, component in enumerate(components)
+        # "frequency" sorts last by code point, not with a linguistic collation
+        for measurement_type in ("Current", "Voltage", "frequency")
+        for i in range(12)
+    )
+    db.add(
+        MeasurementRollup(
+            component_id=components[0].id,
+            measurement_type="Current",
+            bucket=start + timedelta(hours=1),
+            value_count=4,
+            value_sum=100.0,
+            value_min=10.0,
+            value_max=40.0,
+        )
+    )
+    db.commit()
+
+    end = start + timedelta(days=3)
+    report_filters = [
+        {},
+        {"measurement_types": ["Current"]},
+        {"substations": ["S-numpy"]},
+        {"component_types": ["transformer", "switch"]},
+        {"component_ids": [str(components[0].id), str(components[2].id)]},
+        {
+            "substations": ["S-numpy"],
+            "component_types": ["line"],
+            "measurement_types": ["Current"],
+        },
+    ]
+    monkeypatch.setattr(settings, "REPORT_BACKEND", "numpy")
+    for filters in map(normalize_filters, report_filters):
+        query = daily_averages_query(start, end, filters)
+        expected = [(day.date(), *rest) for day, *rest in db.execute(query)]
+        actual = daily_averages(db, start, end, filters)
+
+        assert expected
+        # same rows in the same order, the report sections are compared as is
+        assert [row[:3] for row in actual] == [row[:3] for row in expected]
+        assert [row[3] for row in actual] == pytest.approx(
+            [row[3] for row in expected]
+        )
+
+    db.execute(delete(Component).where(Component.name.like("%-numpy")))
+    db.commit()
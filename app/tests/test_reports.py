@@ -1,8 +1,26 @@
 from __future__ import annotations
 
+import csv
+import io
+import json
 from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
 
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.api.routes.reports import report_body_cache
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.connection import get_read_db
+from app.main import app
+from app.models.reports import Report
+from app.report_worker import claim_one_report, process_report
+from app.schemas.reports import ReportRead
+from app.services.report_events import get_report_status
 from app.tests.auth import login, logout
+from app.tests.config import TEST_DATABASE_URL
 
 
 def test_post_report(client):
@@ -68,3 +86,184 @@ def test_post_report_invalid_from_to_date(client):
 
     response = client.post("/reports", json=report)
     assert response.status_code == 400
+
+
+def test_post_report_with_filters(client):
+    login(client)
+
+    report = {
+        "from_date": "2026-01-01T00:00:00+00:00",
+        "to_date": "2026-01-02T00:00:00+00:00",
+        "filters": {"substations": ["S1"], "component_types": ["transformer"]},
+    }
+
+    response = client.post("/reports", json=report)
+    assert response.status_code == 202
+    assert response.json()["filters_json"] == {
+        "substations": ["S1"],
+        "component_types": ["transformer"],
+    }
+
+    report["filters"] = {"component_types": ["pipe"]}
+    assert client.post("/reports", json=report).status_code == 422
+    report["filters"] = {"substations": []}
+    assert client.post("/reports", json=report).status_code == 422
+
+
+def test_download_report_sections(client, db):
+    login(client)
+    report = {
+        "from_date": "2026-01-01T00:00:00+00:00",
+        "to_date": "2026-01-03T00:00:00+00:00",
+    }
+    report_id = client.post("/reports", json=report).json()["id"]
+
+    response = client.get(f"/reports/{report_id}/download")
+    assert response.status_code == 409
+
+    # older pending reports of other tests go first
+    while (claimed := claim_one_report(db)) is not None:
+        process_report(db, claimed)
+        if str(claimed.id) == report_id:
+            break
+    db.close()
+
+    full = client.get(f"/reports/{report_id}").json()
+
+    response = client.get(f"/reports/{report_id}/download")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == full["daily_measurement_averages_json"]
+
+    response = client.get(
+        f"/reports/{report_id}/download",
+        params={"section": "components_by_type", "format": "csv"},
+    )
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["component_type"], int(row["count"])) for row in rows] == [
+        (row["component_type"], row["count"])
+        for row in full["components_by_type_json"]
+    ]
+
+    response = client.get(
+        f"/reports/{report_id}/download",
+        params={"section": "period_measurement_quantiles"},
+    )
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == full["measurement_quantiles_json"]["period"]
+
+    response = client.get(f"/reports/{report_id}/download?section=nope")
+    assert response.status_code == 422
+    assert client.get(f"/reports/{uuid4()}/download").status_code == 404
+
+
+def test_download_report_not_replicated_yet(client, db):
+    login(client)
+    report = {
+        "from_date": "2026-01-01T00:00:00+00:00",
+        "to_date": "2026-01-02T00:00:00+00:00",
+    }
+    # a replica lagging behind: a snapshot taken before the report is DONE
+    engine = create_engine(TEST_DATABASE_URL)
+    replica = Session(engine.execution_options(isolation_level="REPEATABLE READ"))
+    replica.execute(select(1))
+    app.dependency_overrides[get_read_db] = lambda: replica
+    try:
+        report_id = client.post("/reports", json=report).json()["id"]
+        response = client.get(f"/reports/{report_id}/download")
+        assert response.status_code == 409
+
+        while (claimed := claim_one_report(db)) is not None:
+            process_report(db, claimed)
+            if str(claimed.id) == report_id:
+                break
+        db.close()
+
+        assert get_report_status(replica, UUID(report_id)) is None
+        response = client.get(
+            f"/reports/{report_id}/download",
+            params={"section": "components_by_type", "format": "csv"},
+        )
+        assert response.status_code == 200
+        assert response.text.startswith("component_type,count")
+    finally:
+        del app.dependency_overrides[get_read_db]
+        replica.close()
+        engine.dispose()
+
+
+def test_get_report_sparse_fields(client):
+    login(client)
+    report = {
+        "from_date": "2026-01-01T00:00:00+00:00",
+        "to_date": "2026-01-02T00:00:00+00:00",
+    }
+    report_id = client.post("/reports", json=report).json()["id"]
+
+    response = client.get(f"/reports/{report_id}?fields=status")
+    assert response.status_code == 200
+    assert response.json() == {"id": report_id, "status": "PENDING"}
+
+    response = client.get("/reports?fields=from_date,status&limit=3")
+    assert response.status_code == 200
+    assert all(set(r) == {"id", "from_date", "status"} for r in response.json())
+
+    assert client.get(f"/reports/{report_id}?fields=nope").status_code == 400
+
+
+def test_done_report_body_is_cached_compressed(client, db, monkeypatch):
+    # whatever the size of the report with the test data
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 0)
+    login(client)
+    report = {
+        "from_date": "2026-01-02T00:00:00+00:00",
+        "to_date": "2026-01-04T00:00:00+00:00",
+    }
+    report_id = client.post("/reports", json=report).json()["id"]
+    while (claimed := claim_one_report(db)) is not None:
+        process_report(db, claimed)
+        if str(claimed.id) == report_id:
+            break
+    # what the response model gives
+    expected = jsonable_encoder(ReportRead.model_validate(db.get(Report, report_id)))
+    db.close()
+
+    headers = {"Accept-Encoding": "gzip"}
+    response = client.get(f"/reports/{report_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == expected
+
+    cached = report_body_cache.get((UUID(report_id), "gzip"))
+    assert cached is not None
+    assert cached[0] == "gzip"
+    assert client.get(f"/reports/{report_id}", headers=headers).content == (
+        response.content
+    )
+
+    response = client.get(
+        f"/reports/{report_id}", headers={"Accept-Encoding": "identity"}
+    )
+    assert "content-encoding" not in response.headers
+    assert response.json() == expected
+
+
+def test_body_cache_is_bounded_by_bytes():
+    cache = TTLCache(
+        max_size=100, ttl_seconds=60, max_bytes=10, size_of=lambda body: len(body)
+    )
+    cache.set("a", b"12345")
+    cache.set("b", b"12345")
+    assert cache.bytes == 10
+
+    # the oldest body goes to make room, one bigger than the budget is skipped
+    cache.set("c", b"123")
+    assert (cache.get("a"), cache.get("b"), cache.bytes) == (None, b"12345", 8)
+    cache.set("d", b"12345678901")
+    assert cache.get("d") is None
+    assert cache.bytes == 8
+
+    cache.set("b", b"1")
+    assert cache.bytes == 4
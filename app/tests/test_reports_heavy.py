@@ -6,7 +6,11 @@ import pytest
 from sqlalchemy import delete
 
 from app.models.components import Component, Transformer, Line, Switch
-from app.models.measurements import Measurement
+from app.models.measurements import (
+    Measurement,
+    MeasurementSketch,
+    MeasurementSketchDay,
+)
 from app.models.reports import Report, ReportStatus
 from app.report_worker import claim_one_report, process_report
 from app.tests.auth import login
@@ -24,6 +28,8 @@ def test_reports_heavy_validation(client, db):
 
     # cleaning the db so we can create controlled data
     db.execute(delete(Measurement))
+    db.execute(delete(MeasurementSketch))
+    db.execute(delete(MeasurementSketchDay))
     db.execute(delete(Report))
     db.execute(delete(Component))
     db.commit()
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from app.models.components import Component, Switch
+from app.models.measurements import Measurement, MeasurementRollup
+from app.models.reports import Report
+from app.report_worker import compute_report
+from app.services.retention import apply_retention, retention_cutoff
+
+# far in the past so the retention never touches the rows of other tests
+NOW = datetime(2000, 6, 1, 12, 30, tzinfo=timezone.utc)
+OLD_DAY = datetime(2000, 1, 10, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def old_measurements(db):
+    """
+    a switch with 3 hours of old "Retention" samples (one every 10
+    minutes) and one recent sample.
+    """
+    switch = Switch(
+        component_type="switch", name="SW-retention", substation="S-ret", status="open"
+    )
+    db.add(switch)
+    db.commit()
+
+    rows = [
+        {
+            "component_id": switch.id,
+            "timestamp": OLD_DAY + timedelta(hours=8, minutes=10 * i),
+            "value": float(i),
+            "measurement_type": "Retention",
+        }
+        for i in range(18)
+    ]
+    rows.append(
+        {
+            "component_id": switch.id,
+            "timestamp": NOW - timedelta(days=1),
+            "value": 1000.0,
+            "measurement_type": "Retention",
+        }
+    )
+    db.execute(Measurement.__table__.insert(), rows)
+    db.commit()
+
+    yield switch
+
+    db.execute(delete(Component).where(Component.id == switch.id))
+    db.commit()
+    db.close()
+
+
+def _daily_averages(db, from_date, to_date) -> list[dict]:
+    report = Report(from_date=from_date, to_date=to_date)
+    rows = compute_report(db, report)[3]
+    db.rollback()
+    return [row for row in rows if row["measurement_type"] == "Retention"]
+
+
+def test_retention_cutoff_is_on_the_hour():
+    assert retention_cutoff(30, NOW) == datetime(2000, 5, 2, 12, tzinfo=timezone.utc)
+
+
+def test_apply_retention_rolls_up_old_rows(db, old_measurements):
+    rolled_up = apply_retention(db, retention_days=30, batch_size=5, now=NOW)
+    assert rolled_up == 18
+
+    raw = db.execute(
+        select(func.count())
+        .select_from(Measurement)
+        .where(Measurement.component_id == old_measurements.id)
+    ).scalar_one()
+    assert raw == 1  # the recent one
+
+    rollups = db.execute(
+        select(MeasurementRollup)
+        .where(MeasurementRollup.component_id == old_measurements.id)
+        .order_by(MeasurementRollup.bucket)
+    ).scalars().all()
+
+    assert [rollup.bucket for rollup in rollups] == [
+        OLD_DAY + timedelta(hours=hour) for hour in (8, 9, 10)
+    ]
+    first = rollups[0]
+    assert (first.value_count, first.value_sum) == (6, float(sum(range(6))))
+    assert (first.value_min, first.value_max) == (0.0, 5.0)
+    assert rollups[2].value_max == 17.0
+
+    # nothing left to do
+    assert apply_retention(db, retention_days=30, batch_size=5, now=NOW) == 0
+
+
+def test_apply_retention_disabled(db, old_measurements):
+    assert apply_retention(db, retention_days=0, batch_size=5, now=NOW) == 0
+
+
+def test_report_reads_rollups(db, old_measurements):
+    from_date, to_date = OLD_DAY, OLD_DAY + timedelta(days=1)
+    before = _daily_averages(db, from_date, to_date)
+    assert before == [
+        {
+            "day": "2000-01-10",
+            "measurement_type": "Retention",
+            "component_type": "switch",
+            "avg_value": 8.5,
+        }
+    ]
+
+    apply_retention(db, retention_days=30, batch_size=1_000, now=NOW)
+    assert _daily_averages(db, from_date, to_date) == before
+
+    # a period with both raw rows and rollups
+    recent = _daily_averages(db, from_date, NOW)
+    assert [row["avg_value"] for row in recent] == [8.5, 1000.0]
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from sqlalchemy import func, select
+
+from app.models.substations import SubstationSummary
+from app.services.substations import (
+    apply_substation_deltas,
+    component_contribution,
+    rebuild_substation_summaries,
+)
+from app.tests.auth import login
+
+
+TRANSFORMER = {
+    "component_type": "transformer",
+    "name": "T-sum",
+    "substation": "S-sum",
+    "capacity_mva": 100.0,
+    "voltage_kv": 132.0,
+}
+
+LINE = {
+    "component_type": "line",
+    "name": "L-sum",
+    "substation": "S-sum",
+    "length_km": 7.5,
+    "voltage_kv": 132.0,
+}
+
+
+def _summary(client, substation: str):
+    response = client.get(f"/substations/{substation}")
+    if response.status_code == 404:
+        return None
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_summary_matches_rebuild(client, db):
+    rebuild_substation_summaries(db)
+    login(client, username="user", password="userpass")
+
+    response = client.get("/substations?limit=1000")
+    assert response.status_code == 200
+    summaries = {row["substation"]: row for row in response.json()}
+
+    response = client.get("/components?limit=10000")
+    components = response.json()
+    for substation, summary in summaries.items():
+        in_substation = [c for c in components if c["substation"] == substation]
+        assert summary["transformer_count"] == sum(
+            c["component_type"] == "transformer" for c in in_substation
+        )
+        assert summary["line_count"] == sum(
+            c["component_type"] == "line" for c in in_substation
+        )
+        assert summary["switch_count"] == sum(
+            c["component_type"] == "switch" for c in in_substation
+        )
+
+
+def test_summary_follows_create_update_delete(client, db):
+    rebuild_substation_summaries(db)
+    login(client)
+
+    transformer = client.post("/components", json=TRANSFORMER).json()
+    line = client.post("/components", json=LINE).json()
+
+    summary = _summary(client, "S-sum")
+    assert summary["transformer_count"] == 1
+    assert summary["line_count"] == 1
+    assert summary["switch_count"] == 0
+    assert summary["total_capacity_mva"] == 100.0
+    assert summary["total_length_km"] == 7.5
+
+    # bigger transformer
+    response = client.put(
+        f"/components/{transformer['id']}",
+        json={**TRANSFORMER, "capacity_mva": 150.0},
+    )
+    assert response.status_code == 200
+    assert _summary(client, "S-sum")["total_capacity_mva"] == 150.0
+
+    # line moved to another substation
+    response = client.put(
+        f"/components/{line['id']}", json={**LINE, "substation": "S-sum-2"}
+    )
+    assert response.status_code == 200
+    assert _summary(client, "S-sum")["line_count"] == 0
+    assert _summary(client, "S-sum")["total_length_km"] == 0.0
+    assert _summary(client, "S-sum-2")["line_count"] == 1
+    assert _summary(client, "S-sum-2")["total_length_km"] == 7.5
+
+    # deleting the last component removes the substation
+    response = client.delete(f"/components/{line['id']}")
+    assert response.status_code == 204
+    assert _summary(client, "S-sum-2") is None
+
+    response = client.delete(f"/components/{transformer['id']}")
+    assert response.status_code == 204
+    assert _summary(client, "S-sum") is None
+
+
+def test_summary_follows_bulk_import(client, db):
+    rebuild_substation_summaries(db)
+    login(client)
+
+    response = client.post(
+        "/components/bulk",
+        json=[
+            {**TRANSFORMER, "substation": "S-sum-bulk"},
+            {**TRANSFORMER, "substation": "S-sum-bulk"},
+            {**LINE, "substation": "S-sum-bulk"},
+        ],
+    )
+    assert response.status_code == 201
+
+    summary = _summary(client, "S-sum-bulk")
+    assert summary["transformer_count"] == 2
+    assert summary["line_count"] == 1
+    assert summary["total_capacity_mva"] == 200.0
+
+
+def test_deltas_of_many_substations(db):
+    # more substations than fit in one statement (6 parameters each)
+    names = [f"S-many-{i}" for i in range(12_000)]
+    deltas = [
+        component_contribution("line", name, length_km=1.0) for name in names
+    ]
+    apply_substation_deltas(db, deltas)
+    many = select(func.count()).where(SubstationSummary.substation.in_(names))
+    assert db.execute(many).scalar_one() == 12_000
+
+    apply_substation_deltas(db, [{**delta, "line_count": -1} for delta in deltas])
+    assert db.execute(many).scalar_one() == 0
+    db.rollback()
+
+
+def test_substations_not_authenticated(client):
+    response = client.get("/substations")
+    assert response.status_code == 401
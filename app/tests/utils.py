@@ -118,8 +118,12 @@ class TestDatabase:
             ]
 
             for i in range(1, 100):
+                # random day, the minute keeps (component, type, timestamp)
+                # unique
                 dayspan = random.randint(1, 9)
-                timestamp = start_measurement_time + timedelta(days=dayspan)
+                timestamp = start_measurement_time + timedelta(
+                    days=dayspan, minutes=i
+                )
 
                 value = random.randint(100, 200)
 